@@ -1,8 +1,145 @@
 from django.contrib import admin
-from .models import PerfilUsuario
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
 
+from .models import CorteCaja, Cuenta, GastoExtra, Mesa, Orden, PerfilUsuario, Platillo, Sucursal
+
+
+# -------------------------
+# Listados de tablas grandes
+# -------------------------
+class PaginadorEstimado(Paginator):
+    """Sin filtros, toma el número de renglones de sqlite_stat1 (ANALYZE) en lugar de COUNT(*).
+
+    Con filtros, o si la tabla es chica o nunca se analizó, cuenta de verdad.
+    """
+    # Debajo de esto COUNT(*) es barato y el número exacto vale la pena
+    UMBRAL = 50_000
+
+    @cached_property
+    def count(self):
+        consulta = self.object_list
+        if not consulta.query.where:
+            with connections[consulta.db].cursor() as cursor:
+                try:
+                    cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [consulta.model._meta.db_table])
+                    filas = cursor.fetchall()
+                except Exception:  # sin ANALYZE la tabla sqlite_stat1 no existe
+                    filas = []
+            # El primer número de cada renglón es cuántos renglones cubre el índice
+            # (los índices parciales cubren menos): el mayor es el tamaño de la tabla
+            estimado = max((int(stat.split()[0]) for stat, in filas), default=0)
+            if estimado >= self.UMBRAL:
+                return estimado
+        return super().count
+
+
+class AdminTablaGrande(admin.ModelAdmin):
+    paginator = PaginadorEstimado
+    # Evita el segundo COUNT(*) sobre la tabla completa al filtrar
+    show_full_result_count = False
+    list_per_page = 50
+
+
+# -------------------------
+# Catálogos
+# -------------------------
 @admin.register(PerfilUsuario)
 class PerfilUsuarioAdmin(admin.ModelAdmin):
     list_display = ('user', 'role')
     search_fields = ('user__username', 'user__email')
-    list_filter = ('role',)
\ No newline at end of file
+    list_filter = ('role',)
+
+
+@admin.register(Sucursal)
+class SucursalAdmin(admin.ModelAdmin):
+    list_display = ('nombre', 'clave', 'base_datos', 'activa')
+    search_fields = ('nombre', 'clave')
+
+
+@admin.register(Platillo)
+class PlatilloAdmin(admin.ModelAdmin):
+    # El manejador por defecto es `todos`: aquí también se ven los dados de baja
+    list_display = ('nombre', 'precio', 'activo', 'sucursal', 'user', 'eliminado_en')
+    list_select_related = ('sucursal', 'user')
+    list_filter = ('activo', ('eliminado_en', admin.EmptyFieldListFilter), 'sucursal')
+    search_fields = ('nombre',)
+    autocomplete_fields = ('sucursal', 'user')
+
+
+@admin.register(Mesa)
+class MesaAdmin(admin.ModelAdmin):
+    list_display = ('numero', 'zona', 'activa', 'sucursal', 'eliminado_en')
+    list_select_related = ('sucursal',)
+    list_filter = ('activa', ('eliminado_en', admin.EmptyFieldListFilter), 'sucursal')
+    search_fields = ('=numero', 'zona')
+    autocomplete_fields = ('sucursal',)
+
+
+# -------------------------
+# Ventas
+# -------------------------
+@admin.register(Cuenta)
+class CuentaAdmin(AdminTablaGrande):
+    list_display = ('id', 'mesa', 'usuario', 'total', 'num_ordenes', 'activa', 'creada', 'cerrada', 'sucursal')
+    list_select_related = ('mesa', 'usuario', 'sucursal')
+    list_filter = ('activa', 'sucursal')
+    search_fields = ('=id', 'usuario__username')
+    date_hierarchy = 'creada'
+    autocomplete_fields = ('sucursal', 'mesa', 'usuario', 'platillos')
+
+    def get_queryset(self, request):
+        # Subconsulta correlacionada: SQLite solo la evalúa para los renglones de la página
+        ordenes = Orden.objects.filter(cuenta=OuterRef('pk')).values('cuenta').annotate(n=Count('id')).values('n')
+        return super().get_queryset(request).annotate(num_ordenes=Coalesce(Subquery(ordenes), 0))
+
+    @admin.display(description="Órdenes", ordering='num_ordenes')
+    def num_ordenes(self, cuenta):
+        return cuenta.num_ordenes
+
+
+@admin.register(Orden)
+class OrdenAdmin(AdminTablaGrande):
+    list_display = ('id', 'cuenta', 'estado', 'usuario', 'preparada_por', 'importe', 'creada', 'servida_en')
+    list_select_related = ('cuenta__mesa', 'usuario', 'preparada_por')
+    list_filter = ('estado',)
+    search_fields = ('=id', '=cuenta__id')
+    date_hierarchy = 'creada'
+    autocomplete_fields = ('cuenta', 'usuario', 'preparada_por', 'platillos')
+
+    def get_queryset(self, request):
+        # En lugar de la propiedad Orden.total (una consulta por renglón)
+        renglones = (
+            Orden.platillos.through.objects.filter(orden=OuterRef('pk'))
+            .values('orden').annotate(suma=Sum('platillo__precio')).values('suma')
+        )
+        campo = DecimalField(max_digits=10, decimal_places=2)
+        return super().get_queryset(request).annotate(
+            importe=Coalesce(Subquery(renglones, output_field=campo), 0, output_field=campo)
+        )
+
+    @admin.display(description="Importe", ordering='importe')
+    def importe(self, orden):
+        return orden.importe
+
+
+@admin.register(GastoExtra)
+class GastoExtraAdmin(AdminTablaGrande):
+    list_display = ('fecha', 'monto', 'descripcion', 'creado_por', 'sucursal')
+    list_select_related = ('creado_por', 'sucursal')
+    list_filter = ('sucursal',)
+    search_fields = ('descripcion',)
+    date_hierarchy = 'fecha'
+    autocomplete_fields = ('sucursal', 'creado_por')
+
+
+@admin.register(CorteCaja)
+class CorteCajaAdmin(AdminTablaGrande):
+    list_display = ('fecha', 'efectivo_inicial', 'ventas_totales', 'gastos_totales', 'dinero_en_caja', 'creado_por', 'sucursal')
+    list_select_related = ('creado_por', 'sucursal')
+    list_filter = ('sucursal',)
+    date_hierarchy = 'fecha'
+    autocomplete_fields = ('sucursal', 'creado_por')
@@ -0,0 +1,215 @@
+# ⏱️ Analítica de cocina: tiempos de preparación, cola y ritmo por cocinero
+#
+# resumir() recalcula los renglones de ResumenPreparacion de cada día con
+# órdenes tocadas desde la última marca de agua (Orden.actualizada). Cada día se
+# lee en bloque con values_list y se calcula con NumPy, sin ciclos por orden.
+# tablero() solo lee resúmenes: suma los histogramas de los días del rango para
+# sacar percentiles sin volver a leer las órdenes.
+#
+# El tiempo de preparación es de `creada` a `servida_en` (incluye la espera en
+# cola). NumPy se importa al usarse, igual que openpyxl en reportes.
+from datetime import datetime, time as hora_del_dia, timedelta
+
+from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.utils import timezone
+
+from . import cache
+from .models import MarcaAgua, Orden, Platillo, ResumenPreparacion
+
+MARCA = 'preparacion'
+
+# Límite superior (segundos) de cada cubeta; la última cubeta es "más de 2 h"
+CUBETAS = (60, 120, 180, 240, 300, 420, 600, 900, 1200, 1800, 2700, 3600, 5400, 7200)
+
+PERCENTILES = (50, 90, 99)
+
+# Se vuelve a revisar este margen antes de la marca: cubre órdenes que se
+# guardaron con `actualizada` anterior a la marca pero se confirmaron después
+SOLAPE = timedelta(minutes=5)
+
+# Resolución del muestreo de la cola
+PASO_COLA = 60
+
+
+def _segundos(np, fechas, base):
+    """Columna de datetimes (con None) a segundos desde `base`; None → NaN."""
+    referencia = base.timestamp()
+    return np.fromiter(
+        (f.timestamp() - referencia if f is not None else np.nan for f in fechas), dtype=float, count=len(fechas)
+    )
+
+
+def _grupos(np, claves, valores):
+    """Parte `valores` según `claves` (ambos arreglos) ordenando una sola vez."""
+    if not len(claves):
+        return
+    orden = np.argsort(claves, kind='stable')
+    claves, valores = claves[orden], valores[orden]
+    cortes = np.flatnonzero(np.diff(claves)) + 1
+    for clave, grupo in zip(claves[np.r_[0, cortes]], np.split(valores, cortes)):
+        yield int(clave), grupo
+
+
+def _estadisticas(np, duraciones):
+    p50, p90, p99 = np.percentile(duraciones, PERCENTILES)
+    histograma = np.bincount(np.searchsorted(CUBETAS, duraciones, side='left'), minlength=len(CUBETAS) + 1)
+    return {
+        'ordenes': int(duraciones.size),
+        'segundos_total': float(duraciones.sum()),
+        'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+        'histograma': histograma.tolist(),
+    }
+
+
+def _cola_por_hora(np, llegadas, salidas, duracion_dia):
+    """Órdenes esperando (creadas y no servidas ni canceladas), muestreadas cada minuto."""
+    muestras = np.arange(0, duracion_dia, PASO_COLA)
+    en_cola = (
+        np.searchsorted(np.sort(llegadas), muestras, side='right')
+        - np.searchsorted(np.sort(salidas), muestras, side='right')
+    )
+    horas = (muestras // 3600).astype(int)
+    inicios = np.flatnonzero(np.r_[True, np.diff(horas) != 0])
+    promedios = np.add.reduceat(en_cola, inicios) / np.diff(np.r_[inicios, muestras.size])
+    maximos = np.maximum.reduceat(en_cola, inicios)
+    return {int(horas[i]): (float(p), int(m)) for i, p, m in zip(inicios, promedios, maximos)}
+
+
+def resumir_dia(sucursal, fecha):
+    """Recalcula (borra y vuelve a escribir) los resúmenes de un día."""
+    import numpy as np
+
+    inicio = timezone.make_aware(datetime.combine(fecha, hora_del_dia.min))
+    fin = timezone.make_aware(datetime.combine(fecha + timedelta(days=1), hora_del_dia.min))
+    ahora = timezone.now()
+    ordenes = Orden.objects.filter(cuenta__sucursal=sucursal, creada__gte=inicio, creada__lt=fin)
+
+    filas = list(ordenes.values_list('id', 'estado', 'creada', 'servida_en', 'actualizada', 'preparada_por_id'))
+    renglones = []
+    if filas:
+        ids, estados, creadas, servidas, actualizadas, cocineros = zip(*filas)
+        ids = np.array(ids)
+        estados = np.array(estados)
+        creada = _segundos(np, creadas, inicio)
+        servida = _segundos(np, servidas, inicio)
+        cocinero = np.array([c or 0 for c in cocineros])
+
+        servidas_mask = (estados == 'servida') & ~np.isnan(servida)
+        duracion = servida - creada
+        hora = np.clip((creada // 3600).astype(int), 0, 23)
+
+        def agregar(dimension, clave, estadisticas, **extra):
+            renglones.append(ResumenPreparacion(
+                sucursal=sucursal, fecha=fecha, dimension=dimension, clave=clave, **estadisticas, **extra,
+            ))
+
+        # Por platillo: cada renglón de la tabla intermedia hereda la duración de su orden
+        intermedia = Orden.platillos.through.objects.filter(orden_id__in=ordenes.values('id'))
+        pares = np.array(list(intermedia.values_list('orden_id', 'platillo_id')), dtype=np.int64).reshape(-1, 2)
+        por_id = np.argsort(ids)
+        posicion = por_id[np.searchsorted(ids, pares[:, 0], sorter=por_id)]
+        con_tiempo = servidas_mask[posicion]
+        for platillo_id, grupo in _grupos(np, pares[con_tiempo, 1], duracion[posicion[con_tiempo]]):
+            agregar('platillo', platillo_id, _estadisticas(np, grupo))
+
+        # Por cocinero: órdenes servidas = ritmo de trabajo
+        con_cocinero = servidas_mask & (cocinero > 0)
+        for cocinero_id, grupo in _grupos(np, cocinero[con_cocinero], duracion[con_cocinero]):
+            agregar('cocinero', cocinero_id, _estadisticas(np, grupo))
+
+        # Por hora de llegada, con la profundidad de la cola en esa hora
+        salida = np.where(servidas_mask, servida, np.inf)
+        canceladas = estados == 'cancelada'
+        salida[canceladas] = _segundos(np, [a for a, c in zip(actualizadas, canceladas) if c], inicio)
+        duracion_dia = min(fin, max(ahora, inicio)) - inicio
+        cola = _cola_por_hora(np, creada, salida, duracion_dia.total_seconds())
+        tiempos = dict(_grupos(np, hora[servidas_mask], duracion[servidas_mask]))
+        for h in sorted(set(tiempos) | {h for h, (_, maxima) in cola.items() if maxima}):
+            estadisticas = _estadisticas(np, tiempos[h]) if h in tiempos else {'histograma': [0] * (len(CUBETAS) + 1)}
+            promedio, maxima = cola.get(h, (None, None))
+            agregar('hora', h, estadisticas, cola_promedio=promedio, cola_maxima=maxima)
+
+    with transaction.atomic(using=router.db_for_write(ResumenPreparacion)):
+        ResumenPreparacion.objects.de(sucursal).filter(fecha=fecha).delete()
+        ResumenPreparacion.objects.bulk_create(renglones)
+    return len(renglones)
+
+
+def resumir(sucursal, completo=False):
+    """Recalcula los días con órdenes nuevas o cambiadas desde la última marca.
+
+    Devuelve {'dias': n, 'renglones': n}. Con ``completo`` recalcula todo el historial.
+    """
+    ahora = timezone.now()
+    marca = MarcaAgua.objects.de(sucursal).filter(nombre=MARCA).first()
+    ordenes = Orden.objects.filter(cuenta__sucursal=sucursal)
+    if marca and not completo:
+        ordenes = ordenes.filter(actualizada__gt=marca.valor - SOLAPE)
+
+    dias = sorted({d.date() for d in ordenes.datetimes('creada', 'day')})
+    renglones = sum(resumir_dia(sucursal, dia) for dia in dias)
+
+    MarcaAgua.objects.update_or_create(sucursal=sucursal, nombre=MARCA, defaults={'valor': ahora})
+    if dias:
+        cache.invalidar('preparacion')
+    return {'dias': len(dias), 'renglones': renglones}
+
+
+def _percentil_histograma(np, acumulado, total, percentil):
+    """Percentil interpolado linealmente dentro de la cubeta donde cae."""
+    objetivo = total * percentil / 100
+    i = int(np.searchsorted(acumulado, objetivo, side='left'))
+    if i >= len(CUBETAS):
+        return float(CUBETAS[-1])
+    inferior = CUBETAS[i - 1] if i else 0
+    previo = acumulado[i - 1] if i else 0
+    en_cubeta = acumulado[i] - previo
+    fraccion = (objetivo - previo) / en_cubeta if en_cubeta else 0
+    return float(inferior + fraccion * (CUBETAS[i] - inferior))
+
+
+def tablero(sucursal, desde, hasta):
+    """Tablero de un rango de fechas armado solo con los resúmenes diarios (JSON)."""
+    def calcular():
+        import numpy as np
+
+        filas = list(
+            ResumenPreparacion.objects.de(sucursal).filter(fecha__range=(desde, hasta))
+            .order_by('fecha', 'dimension', 'clave')
+            .values_list('fecha', 'dimension', 'clave', 'ordenes', 'segundos_total', 'histograma',
+                         'cola_promedio', 'cola_maxima')
+        )
+        sumas = {}
+        cola = []
+        for fecha, dimension, clave, ordenes, segundos, histograma, cola_promedio, cola_maxima in filas:
+            suma = sumas.setdefault((dimension, clave), [0, 0.0, np.zeros(len(CUBETAS) + 1, dtype=np.int64)])
+            suma[0] += ordenes
+            suma[1] += segundos
+            suma[2] += histograma
+            if dimension == 'hora' and cola_maxima is not None:
+                cola.append({'fecha': fecha.isoformat(), 'hora': clave,
+                             'promedio': round(cola_promedio, 2), 'maxima': cola_maxima})
+
+        nombres = {
+            'platillo': dict(Platillo.todos.filter(id__in=[c for d, c in sumas if d == 'platillo']).values_list('id', 'nombre')),
+            'cocinero': dict(User.objects.filter(id__in=[c for d, c in sumas if d == 'cocinero']).values_list('id', 'username')),
+        }
+        dias = max((hasta - desde).days + 1, 1)
+        resultado = {'desde': desde.isoformat(), 'hasta': hasta.isoformat(), 'cubetas': list(CUBETAS),
+                     'platillo': [], 'hora': [], 'cocinero': [], 'cola': cola}
+        for (dimension, clave), (ordenes, segundos, histograma) in sorted(sumas.items()):
+            renglon = {'clave': clave, 'ordenes': ordenes}
+            if dimension in nombres:
+                renglon['nombre'] = nombres[dimension].get(clave, f"#{clave}")
+            if ordenes:
+                acumulado = np.cumsum(histograma)
+                renglon['promedio'] = round(segundos / ordenes, 1)
+                renglon.update({f"p{p}": round(_percentil_histograma(np, acumulado, ordenes, p), 1) for p in PERCENTILES})
+                renglon['histograma'] = histograma.tolist()
+            if dimension == 'cocinero':
+                renglon['por_dia'] = round(ordenes / dias, 2)
+            resultado[dimension].append(renglon)
+        return resultado
+
+    return cache.obtener('preparacion', [getattr(sucursal, 'pk', sucursal), desde.isoformat(), hasta.isoformat()], calcular)
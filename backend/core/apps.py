@@ -3,3 +3,13 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'backend.core'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401
+        from .consultas_lentas import instalar
+
+        if settings.CONSULTAS_LENTAS_MS > 0:
+            connection_created.connect(instalar, dispatch_uid='consultas_lentas')
@@ -0,0 +1,69 @@
+# 🚀 Arranque en caliente de los trabajadores
+#
+# Con CC_PRECALENTAR=1, config/wsgi.py y config/asgi.py llaman a precalentar()
+# antes de atender peticiones: importa las vistas (URLconf), compila las
+# plantillas del proyecto y llena la caché de menú y plano de mesas. Con servidores que
+# precargan y luego hacen fork (`gunicorn --preload`) esto ocurre una sola vez
+# en el proceso maestro; por eso al final se cierran las conexiones, que no
+# deben compartirse entre procesos hijos.
+#
+# No se hace en AppConfig.ready(): ahí Django desaconseja tocar la base y
+# correría también con cada comando de manage.py.
+import logging
+import os
+import time
+
+from django.db import DatabaseError, connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+from . import cache, plano
+from .models import Sucursal
+from .routers import usar_sucursal
+
+logger = logging.getLogger(__name__)
+
+
+def compilar_plantillas():
+    """Carga en el loader en caché todas las plantillas de los DIRS del proyecto."""
+    compiladas = 0
+    for motor in engines.all():
+        for directorio in motor.dirs:
+            for raiz, _, archivos in os.walk(directorio):
+                for archivo in archivos:
+                    if not archivo.endswith('.html'):
+                        continue
+                    nombre = os.path.relpath(os.path.join(raiz, archivo), directorio).replace(os.sep, '/')
+                    try:
+                        motor.get_template(nombre)
+                        compiladas += 1
+                    except TemplateSyntaxError as error:
+                        logger.warning(f"Plantilla {nombre} no compila: {error}")
+    return compiladas
+
+
+def precalentar_datos():
+    """Llena la caché compartida con el menú y el plano de mesas de cada sucursal activa."""
+    sucursales = 0
+    for sucursal in Sucursal.objects.filter(activa=True):
+        with usar_sucursal(sucursal):
+            cache.menu_de(sucursal)
+            plano.plano_de(sucursal)
+        sucursales += 1
+    return sucursales
+
+
+def precalentar():
+    """Deja el proceso listo para atender sin pagar importaciones ni cachés en frío."""
+    inicio = time.perf_counter()
+    resumen = {'patrones': len(get_resolver().url_patterns), 'plantillas': compilar_plantillas()}
+    try:
+        resumen['sucursales'] = precalentar_datos()
+    except DatabaseError as error:
+        # Sin migraciones aplicadas todavía: el arranque no debe fallar por esto
+        logger.warning(f"Precalentamiento de datos omitido: {error}")
+    finally:
+        connections.close_all()
+    resumen['segundos'] = round(time.perf_counter() - inicio, 3)
+    logger.info(f"Precalentamiento listo: {resumen}")
+    return resumen
@@ -0,0 +1,183 @@
+# 🗄️ Caché de objetos calientes (menú, mesas, roles, totales de corte, tablero de cocina)
+#
+# Sobre el backend compartido de settings.CACHES (archivos por defecto, base de
+# datos o Redis), con:
+#   - llaves por espacio: cc:<espacio>:v<versión>:<partes>
+#   - invalidación por versión: invalidar('menu') incrementa la versión y las
+#     llaves viejas simplemente expiran
+#   - una sola recomputación a la vez por llave (candado local + cache.add)
+#   - una capa local LRU con TTL corto para no deserializar en cada acceso
+#   - contadores de aciertos/fallos por espacio, sumados entre procesos
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from zlib import crc32
+
+from django.core.cache import cache
+
+# TTL (segundos) del backend compartido por espacio
+ESPACIOS = {
+    'menu': 300,
+    'mesas': 300,
+    'roles': 600,
+    'corte': 120,
+    'preparacion': 600,
+}
+
+# Capa local por proceso
+TTL_LOCAL = 2
+MAX_LOCAL = 256
+
+# Espera máxima por el valor que calcula otro proceso
+ESPERA_CANDADO = 2.0
+TTL_CANDADO = 30
+
+# Cada cuánto se suman los contadores locales al backend compartido
+INTERVALO_CONTADORES = 5
+
+_FALTA = object()
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+_candados = [threading.Lock() for _ in range(64)]
+_contadores = defaultdict(int)
+_ultimo_volcado = time.monotonic()
+
+
+def _llave_version(espacio):
+    return f"cc:v:{espacio}"
+
+
+def version(espacio):
+    valor = cache.get(_llave_version(espacio))
+    if valor is None:
+        cache.add(_llave_version(espacio), 1, None)
+        valor = cache.get(_llave_version(espacio)) or 1
+    return valor
+
+
+def llave(espacio, *partes):
+    return f"cc:{espacio}:v{version(espacio)}:{':'.join(str(p) for p in partes)}"
+
+
+def _leer_local(k):
+    with _local_lock:
+        entrada = _local.get(k)
+        if entrada is None:
+            return _FALTA
+        valor, expira = entrada
+        if expira < time.monotonic():
+            del _local[k]
+            return _FALTA
+        _local.move_to_end(k)
+        return valor
+
+
+def _guardar_local(k, valor):
+    with _local_lock:
+        _local[k] = (valor, time.monotonic() + TTL_LOCAL)
+        _local.move_to_end(k)
+        while len(_local) > MAX_LOCAL:
+            _local.popitem(last=False)
+
+
+def _contar(espacio, tipo):
+    global _ultimo_volcado
+    _contadores[(espacio, tipo)] += 1
+    if time.monotonic() - _ultimo_volcado >= INTERVALO_CONTADORES:
+        volcar_contadores()
+
+
+def volcar_contadores():
+    """Suma los contadores locales a los compartidos."""
+    global _ultimo_volcado
+    _ultimo_volcado = time.monotonic()
+    pendientes = list(_contadores.items())
+    _contadores.clear()
+    for (espacio, tipo), delta in pendientes:
+        k = f"cc:stats:{espacio}:{tipo}"
+        cache.add(k, 0, None)
+        try:
+            cache.incr(k, delta)
+        except ValueError:
+            cache.set(k, delta, None)
+
+
+def obtener(espacio, partes, calcular, ttl=None):
+    """Devuelve el valor en caché o lo calcula una sola vez entre hilos y procesos."""
+    ttl = ESPACIOS.get(espacio, 300) if ttl is None else ttl
+    k = llave(espacio, *partes)
+
+    valor = _leer_local(k)
+    if valor is _FALTA:
+        valor = cache.get(k, _FALTA)
+        if valor is not _FALTA:
+            _guardar_local(k, valor)
+    if valor is not _FALTA:
+        _contar(espacio, 'aciertos')
+        return valor
+
+    _contar(espacio, 'fallos')
+    with _candados[crc32(k.encode()) % len(_candados)]:
+        # Otro hilo pudo calcularlo mientras esperábamos
+        valor = cache.get(k, _FALTA)
+        if valor is not _FALTA:
+            _guardar_local(k, valor)
+            return valor
+
+        candado = f"{k}:candado"
+        if not cache.add(candado, 1, TTL_CANDADO):
+            # Otro proceso lo está calculando: esperar un poco su resultado
+            limite = time.monotonic() + ESPERA_CANDADO
+            while time.monotonic() < limite:
+                time.sleep(0.05)
+                valor = cache.get(k, _FALTA)
+                if valor is not _FALTA:
+                    _guardar_local(k, valor)
+                    return valor
+        try:
+            valor = calcular()
+            cache.set(k, valor, ttl)
+            _guardar_local(k, valor)
+        finally:
+            cache.delete(candado)
+    return valor
+
+
+def invalidar(espacio):
+    """Invalida todo el espacio subiendo su versión."""
+    try:
+        cache.incr(_llave_version(espacio))
+    except ValueError:
+        cache.set(_llave_version(espacio), 2, None)
+    prefijo = f"cc:{espacio}:"
+    with _local_lock:
+        for k in [k for k in _local if k.startswith(prefijo)]:
+            del _local[k]
+
+
+def estadisticas():
+    """Aciertos, fallos y proporción de aciertos por espacio (todos los procesos)."""
+    volcar_contadores()
+    datos = {}
+    for espacio in ESPACIOS:
+        aciertos = cache.get(f"cc:stats:{espacio}:aciertos", 0)
+        fallos = cache.get(f"cc:stats:{espacio}:fallos", 0)
+        total = aciertos + fallos
+        datos[espacio] = {
+            'aciertos': aciertos,
+            'fallos': fallos,
+            'proporcion': round(aciertos / total, 4) if total else None,
+            'version': version(espacio),
+        }
+    return datos
+
+
+# -------------------------
+# Consultas en caché
+# -------------------------
+def menu_de(sucursal):
+    """Platillos activos de la sucursal."""
+    from .models import Platillo
+
+    return obtener('menu', [sucursal.id], lambda: list(Platillo.objects.de(sucursal).filter(activo=True)))
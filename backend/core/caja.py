@@ -0,0 +1,163 @@
+# 💰 Caja: pagos y bitácora de movimientos con saldo acumulado
+#
+# Cada movimiento actualiza en la misma transacción la fila SaldoCaja de su
+# turno (fecha) y método de pago, así el efectivo en caja se lee con una sola
+# consulta por llave en cualquier momento.
+from decimal import Decimal
+
+from django.db import router, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Cuenta, CorteCaja, MovimientoCaja, Pago, SaldoCaja
+
+# Tipo de movimiento -> columna acumulada en SaldoCaja
+_CAMPOS_POR_TIPO = {
+    'fondo': 'fondo',
+    'venta': 'ventas',
+    'propina': 'propinas',
+    'gasto': 'gastos',
+    'extra': 'extra',
+}
+
+
+def registrar_movimiento(sucursal, tipo, monto, metodo='efectivo', fecha=None, usuario=None, descripcion='',
+                         pago=None, gasto=None):
+    """Agrega un movimiento a la bitácora y actualiza el saldo de su turno."""
+    fecha = fecha or timezone.localdate()
+    monto = Decimal(monto)
+    campo = _CAMPOS_POR_TIPO[tipo]
+
+    with transaction.atomic(using=router.db_for_write(SaldoCaja)):
+        saldo, _ = SaldoCaja.objects.get_or_create(sucursal=sucursal, fecha=fecha, metodo=metodo)
+        # El UPDATE toma el candado de escritura: los movimientos del turno quedan en serie
+        SaldoCaja.objects.filter(pk=saldo.pk).update(
+            saldo=F('saldo') + monto,
+            movimientos=F('movimientos') + 1,
+            actualizado=timezone.now(),
+            **{campo: F(campo) + monto},
+        )
+        saldo.refresh_from_db(fields=['saldo'])
+        return MovimientoCaja.objects.create(
+            sucursal=sucursal,
+            fecha=fecha,
+            metodo=metodo,
+            tipo=tipo,
+            monto=monto,
+            saldo=saldo.saldo,
+            descripcion=descripcion,
+            pago=pago,
+            gasto=gasto,
+            usuario=usuario,
+        )
+
+
+def registrar_pago(cuenta, monto, metodo='efectivo', propina=0, usuario=None):
+    """Registra un pago (parcial o total) de una cuenta y sus movimientos de caja."""
+    monto, propina = Decimal(monto), Decimal(propina or 0)
+    with transaction.atomic(using=router.db_for_write(Pago)):
+        pago = Pago.objects.create(cuenta=cuenta, metodo=metodo, monto=monto, propina=propina, usuario=usuario)
+        registrar_movimiento(cuenta.sucursal, 'venta', monto, metodo, usuario=usuario, pago=pago,
+                             descripcion=f"Cuenta #{cuenta.id}")
+        if propina:
+            registrar_movimiento(cuenta.sucursal, 'propina', propina, metodo, usuario=usuario, pago=pago,
+                                 descripcion=f"Propina cuenta #{cuenta.id}")
+    return pago
+
+
+def pendiente_por_pagar(cuenta):
+    pagado = cuenta.pagos.aggregate(total=Sum('monto'))['total'] or 0
+    return max(Decimal(cuenta.total) - pagado, Decimal(0))
+
+
+def saldar_cuenta(cuenta, metodo='efectivo', propina=0, usuario=None):
+    """Paga lo que falte de una cuenta ya cerrada (el total debe estar calculado)."""
+    restante = pendiente_por_pagar(cuenta)
+    if restante or propina:
+        return registrar_pago(cuenta, restante, metodo, propina, usuario)
+    return None
+
+
+def saldar_cuentas(sucursal, ids, metodo='efectivo', usuario=None):
+    """Salda en bloque cuentas recién cerradas de una sucursal: un Pago por cuenta y un movimiento por lote."""
+    pagado = dict(
+        Pago.objects.filter(cuenta_id__in=ids).values('cuenta_id')
+        .annotate(total=Sum('monto')).values_list('cuenta_id', 'total')
+    )
+    pagos = []
+    for cuenta_id, total in Cuenta.objects.filter(id__in=ids).values_list('id', 'total'):
+        restante = total - pagado.get(cuenta_id, 0)
+        if restante > 0:
+            pagos.append(Pago(cuenta_id=cuenta_id, metodo=metodo, monto=restante, usuario=usuario))
+    if not pagos:
+        return []
+    with transaction.atomic(using=router.db_for_write(Pago)):
+        Pago.objects.bulk_create(pagos)
+        registrar_movimiento(sucursal, 'venta', sum(p.monto for p in pagos), metodo, usuario=usuario,
+                             descripcion=f"Cierre de turno ({len(pagos)} cuentas)")
+    return pagos
+
+
+def registrar_fondo(sucursal, efectivo_inicial, fecha=None, usuario=None):
+    """Fija el fondo inicial del turno registrando solo la diferencia contra el actual."""
+    efectivo_inicial = Decimal(efectivo_inicial)
+    if not efectivo_inicial.is_finite():
+        raise ValueError(f"Fondo inicial inválido: {efectivo_inicial}")
+    fecha = fecha or timezone.localdate()
+    actual = (
+        SaldoCaja.objects.filter(sucursal=sucursal, fecha=fecha, metodo='efectivo')
+        .values_list('fondo', flat=True).first() or 0
+    )
+    diferencia = efectivo_inicial - actual
+    if diferencia:
+        registrar_movimiento(sucursal, 'fondo', diferencia, 'efectivo', fecha, usuario, descripcion="Fondo inicial")
+
+
+def saldos_del_turno(sucursal, fecha=None):
+    fecha = fecha or timezone.localdate()
+    return {saldo.metodo: saldo for saldo in SaldoCaja.objects.filter(sucursal=sucursal, fecha=fecha)}
+
+
+def efectivo_en_caja(sucursal, fecha=None):
+    """Efectivo en caja en este momento: una sola fila por llave única."""
+    fecha = fecha or timezone.localdate()
+    return (
+        SaldoCaja.objects.filter(sucursal=sucursal, fecha=fecha, metodo='efectivo')
+        .values_list('saldo', flat=True).first() or Decimal(0)
+    )
+
+
+def resumen_del_turno(sucursal, fecha=None):
+    """Totales del turno sumando las filas de saldo (una por método), o None sin bitácora."""
+    saldos = saldos_del_turno(sucursal, fecha)
+    if not saldos:
+        return None
+    efectivo = saldos.get('efectivo')
+    return {
+        'efectivo_inicial': efectivo.fondo if efectivo else Decimal(0),
+        'ventas_totales': sum(s.ventas for s in saldos.values()),
+        'propinas': sum(s.propinas for s in saldos.values()),
+        'gastos_totales': -sum(s.gastos for s in saldos.values()),
+        'monto_extra': sum(s.extra for s in saldos.values()),
+        'dinero_en_caja': efectivo.saldo if efectivo else Decimal(0),
+        'saldos': saldos,
+    }
+
+
+def snapshot_corte(sucursal, fecha=None, usuario=None):
+    """Guarda el corte del día como fotografía de la bitácora, sin recalcular ventas."""
+    fecha = fecha or timezone.localdate()
+    resumen = resumen_del_turno(sucursal, fecha)
+    if resumen is None:
+        return None
+    defaults = {
+        'efectivo_inicial': resumen['efectivo_inicial'],
+        'ventas_totales': resumen['ventas_totales'],
+        'gastos_totales': resumen['gastos_totales'],
+        'monto_extra': resumen['monto_extra'],
+        'dinero_en_caja': resumen['dinero_en_caja'],
+    }
+    if usuario is not None:
+        defaults['creado_por'] = usuario
+    corte, _ = CorteCaja.objects.update_or_create(sucursal=sucursal, fecha=fecha, defaults=defaults)
+    return corte
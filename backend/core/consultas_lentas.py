@@ -0,0 +1,128 @@
+# 🐢 Bitácora de consultas lentas
+#
+# Un execute_wrapper instalado en cada conexión mide todas las consultas (de
+# vistas, tareas y comandos). Las que pasan de CONSULTAS_LENTAS_MS se anotan en
+# CONSULTAS_LENTAS_ARCHIVO (una línea JSON por consulta) con sus parámetros, la
+# vista o tarea que la lanzó, la pila dentro del proyecto y, en SQLite, su
+# EXPLAIN QUERY PLAN. `python manage.py reporte_consultas_lentas` las agrupa por
+# huella (SQL normalizado).
+import hashlib
+import json
+import os
+import re
+import time
+import traceback
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils import timezone
+
+# Vista o tarea en curso, para atribuir la consulta
+origen_actual = ContextVar('origen_consulta', default='')
+
+# Cuadros de pila del proyecto que se guardan por consulta
+PROFUNDIDAD_PILA = 8
+
+_CADENA = re.compile(r"'(?:[^']|'')*'")
+_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTA = re.compile(r'\(\s*(?:\?\s*,\s*)+\?\s*\)')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def huella(sql):
+    """SQL normalizado: literales y listas IN colapsados, para agrupar variantes."""
+    normal = sql.replace('%s', '?')
+    normal = _CADENA.sub('?', normal)
+    normal = _NUMERO.sub('?', normal)
+    normal = _LISTA.sub('(...)', normal)
+    normal = _ESPACIOS.sub(' ', normal).strip()
+    return normal, hashlib.sha1(normal.encode()).hexdigest()[:12]
+
+
+def _pila():
+    raiz = str(settings.BASE_DIR)
+    cuadros = [
+        f"{os.path.relpath(c.filename, raiz)}:{c.lineno} {c.name}"
+        for c in traceback.extract_stack()
+        if c.filename.startswith(raiz) and not c.filename.endswith(('consultas_lentas.py', 'middleware.py'))
+    ]
+    return cuadros[-PROFUNDIDAD_PILA:]
+
+
+def _plan(conexion, sql, params):
+    """EXPLAIN QUERY PLAN directo sobre la conexión, sin pasar de nuevo por los wrappers."""
+    if conexion.vendor != 'sqlite' or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    from django.db.backends.sqlite3.base import SQLiteCursorWrapper
+
+    cursor = conexion.connection.cursor(factory=SQLiteCursorWrapper)
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+        return [fila[-1] for fila in cursor.fetchall()]
+    except Exception as error:  # el plan es informativo: nunca debe romper la consulta
+        return [f"(sin plan: {error})"]
+    finally:
+        cursor.close()
+
+
+def escaneos_completos(plan):
+    """Pasos del plan que recorren una tabla completa (SCAN sin índice)."""
+    return [paso for paso in plan or [] if paso.startswith('SCAN ') and ' USING ' not in paso]
+
+
+def _anotar(registro):
+    linea = json.dumps(registro, default=str, ensure_ascii=False) + '\n'
+    os.makedirs(os.path.dirname(settings.CONSULTAS_LENTAS_ARCHIVO), exist_ok=True)
+    # O_APPEND: cada línea se agrega completa aunque escriban varios procesos
+    descriptor = os.open(settings.CONSULTAS_LENTAS_ARCHIVO, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    try:
+        os.write(descriptor, linea.encode('utf-8'))
+    finally:
+        os.close(descriptor)
+
+
+def medir(execute, sql, params, many, context):
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        milisegundos = (time.perf_counter() - inicio) * 1000
+        if milisegundos >= settings.CONSULTAS_LENTAS_MS:
+            conexion = context['connection']
+            plan = None if many else _plan(conexion, sql, params)
+            normal, clave = huella(sql)
+            _anotar({
+                'momento': timezone.now().isoformat(),
+                'ms': round(milisegundos, 2),
+                'bd': conexion.alias,
+                'origen': origen_actual.get() or 'sin_origen',
+                'huella': clave,
+                'sql_normal': normal,
+                'sql': sql,
+                'parametros': [repr(p)[:200] for p in params][:50] if params and not many else None,
+                'plan': plan,
+                'escaneo_completo': bool(escaneos_completos(plan)),
+                'pila': _pila(),
+            })
+
+
+def instalar(sender, connection, **kwargs):
+    """Receptor de connection_created: agrega el wrapper una sola vez por conexión.
+
+    Va al inicio de la lista: los execute_wrapper() temporales (p. ej. el de
+    MetricasMiddleware) quitan siempre el último elemento al salir.
+    """
+    if medir not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, medir)
+
+
+def leer(archivo=None):
+    archivo = archivo or settings.CONSULTAS_LENTAS_ARCHIVO
+    if not os.path.exists(archivo):
+        return
+    with open(archivo, encoding='utf-8') as entrada:
+        for linea in entrada:
+            try:
+                yield json.loads(linea)
+            except ValueError:
+                continue  # línea a medio escribir
@@ -0,0 +1,134 @@
+# 🧊 Cubo de ventas: día × hora × platillo
+#
+# Al cerrarse una cuenta (sola o en el cierre de turno) sus órdenes no
+# canceladas se suman a las celdas de CuboVentas según la hora local en que se
+# pidió cada orden. Consultar un año es agrupar unos miles de celdas en lugar de
+# recorrer cada Orden. reconstruir() rehace cualquier rango desde las cuentas
+# cerradas (tras corregir datos, o para llenar el historial la primera vez).
+#
+# El importe usa el precio actual del platillo, igual que Cuenta.total.
+from datetime import datetime, time as hora_del_dia, timedelta
+from io import BytesIO
+
+from django.db import router, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .models import CuboVentas, Orden, Platillo
+
+DIMENSIONES = ('fecha', 'hora', 'dia_semana', 'platillo')
+
+DIAS = ('Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom')
+
+# Cuentas por consulta, bajo el límite de parámetros de SQLite
+LOTE = 400
+
+
+def _celdas(renglones):
+    """Agrupa renglones de la tabla intermedia orden↔platillo en celdas del cubo."""
+    return (
+        renglones.exclude(orden__estado='cancelada')
+        .annotate(fecha=TruncDate('orden__creada'), hora=ExtractHour('orden__creada'))
+        .values('orden__cuenta__sucursal', 'fecha', 'hora', 'platillo')
+        .annotate(cantidad=Count('id'), importe=Sum('platillo__precio'))
+        .order_by()
+    )
+
+
+def acumular(cuenta_ids):
+    """Suma al cubo las órdenes de cuentas recién cerradas."""
+    intermedia = Orden.platillos.through.objects
+    with transaction.atomic(using=router.db_for_write(CuboVentas)):
+        for inicio in range(0, len(cuenta_ids), LOTE):
+            for celda in _celdas(intermedia.filter(orden__cuenta_id__in=cuenta_ids[inicio:inicio + LOTE])):
+                llave = {
+                    'sucursal_id': celda['orden__cuenta__sucursal'],
+                    'fecha': celda['fecha'],
+                    'hora': celda['hora'],
+                    'platillo_id': celda['platillo'],
+                }
+                actualizadas = CuboVentas.objects.filter(**llave).update(
+                    cantidad=F('cantidad') + celda['cantidad'], importe=F('importe') + (celda['importe'] or 0),
+                )
+                if not actualizadas:
+                    CuboVentas.objects.create(
+                        **llave, dia_semana=celda['fecha'].isoweekday(),
+                        cantidad=celda['cantidad'], importe=celda['importe'] or 0,
+                    )
+
+
+def reconstruir(sucursal, desde, hasta):
+    """Rehace las celdas de un rango de fechas desde las cuentas cerradas. Devuelve cuántas escribió."""
+    inicio = timezone.make_aware(datetime.combine(desde, hora_del_dia.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), hora_del_dia.min))
+    renglones = Orden.platillos.through.objects.filter(
+        orden__cuenta__sucursal=sucursal, orden__cuenta__activa=False,
+        orden__creada__gte=inicio, orden__creada__lt=fin,
+    )
+    celdas = [
+        CuboVentas(
+            sucursal_id=celda['orden__cuenta__sucursal'], fecha=celda['fecha'], hora=celda['hora'],
+            dia_semana=celda['fecha'].isoweekday(), platillo_id=celda['platillo'],
+            cantidad=celda['cantidad'], importe=celda['importe'] or 0,
+        )
+        for celda in _celdas(renglones).iterator()
+    ]
+    with transaction.atomic(using=router.db_for_write(CuboVentas)):
+        CuboVentas.objects.de(sucursal).filter(fecha__range=(desde, hasta)).delete()
+        CuboVentas.objects.bulk_create(celdas, batch_size=500)
+    return len(celdas)
+
+
+def consultar(sucursal, desde, hasta, dimensiones=('dia_semana', 'hora')):
+    """Suma cantidad e importe del rango agrupando por las dimensiones pedidas."""
+    filas = list(
+        CuboVentas.objects.de(sucursal).filter(fecha__range=(desde, hasta))
+        .values(*dimensiones)
+        .annotate(cantidad=Sum('cantidad'), importe=Sum('importe'))
+        .order_by(*dimensiones)
+    )
+    if 'platillo' in dimensiones:
+        nombres = dict(Platillo.todos.filter(id__in={f['platillo'] for f in filas}).values_list('id', 'nombre'))
+        for fila in filas:
+            fila['nombre'] = nombres.get(fila['platillo'], f"#{fila['platillo']}")
+    return filas
+
+
+def construir_cubo_excel(sucursal, desde, hasta):
+    """Libro con el mapa de calor (hora × día de la semana) y las ventas por platillo y hora."""
+    # Importación diferida, como en reportes.construir_corte_excel
+    import openpyxl
+    from openpyxl.formatting.rule import ColorScaleRule
+    from openpyxl.utils import get_column_letter
+
+    escala = ColorScaleRule(start_type='min', start_color='FFFFFF', end_type='max', end_color='F8696B')
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Mapa de calor"
+    ws.append(["Hora", *DIAS])
+    mapa = {(f['hora'], f['dia_semana']): f['cantidad'] for f in consultar(sucursal, desde, hasta, ('hora', 'dia_semana'))}
+    for hora in range(24):
+        ws.append([f"{hora:02d}:00", *(mapa.get((hora, dia), 0) for dia in range(1, 8))])
+    ws.conditional_formatting.add("B2:H25", escala)
+
+    ws_platillos = wb.create_sheet(title="Por platillo")
+    ws_platillos.append(["Platillo", *(f"{hora:02d}:00" for hora in range(24)), "Total", "Importe"])
+    por_platillo = {}
+    for fila in consultar(sucursal, desde, hasta, ('platillo', 'hora')):
+        renglon = por_platillo.setdefault(fila['nombre'], [[0] * 24, 0])
+        renglon[0][fila['hora']] += fila['cantidad']
+        renglon[1] += fila['importe']
+    for nombre, (horas, importe) in sorted(por_platillo.items(), key=lambda par: -sum(par[1][0])):
+        ws_platillos.append([nombre, *horas, sum(horas), float(importe)])
+    if por_platillo:
+        ws_platillos.conditional_formatting.add(f"B2:{get_column_letter(25)}{len(por_platillo) + 1}", escala)
+
+    salida = BytesIO()
+    wb.save(salida)
+    return salida.getvalue()
+
+
+def nombre_archivo_cubo(desde, hasta):
+    return f"Ventas_por_hora_{desde.strftime('%Y%m%d')}_{hasta.strftime('%Y%m%d')}.xlsx"
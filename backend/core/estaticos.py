@@ -0,0 +1,197 @@
+# 🎨 Archivos estáticos: paquetes por página, huellas y variantes comprimidas
+#
+# - PaquetesFinder arma paquetes/<página>.css|.js concatenando y minificando
+#   las fuentes de PAQUETES; en desarrollo se sirven como cualquier estático.
+# - EstaticosComprimidosStorage (collectstatic) agrega la huella al nombre vía
+#   manifiesto y escribe hermanos .gz/.br de CSS, JS y SVG.
+# - servir_estatico entrega STATIC_ROOT sin DEBUG: los nombres con huella van
+#   con caché inmutable de un año, así una tableta no vuelve a pedirlos.
+import gzip
+import logging
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.finders import BaseFinder
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+
+from .paginas import CODIFICACIONES, brotli, codificaciones_aceptadas
+
+logger = logging.getLogger(__name__)
+
+# Paquete -> fuentes en orden (rutas relativas a los directorios de estáticos)
+PAQUETES = {
+    'paquetes/bienvenida.css': ['clases_CSS/styleBienvenido.css'],
+    'paquetes/bienvenida.js': ['js/desvanecerMensajes.js'],
+    'paquetes/acerca.css': ['clases_CSS/paginas_bienvenido/styleAcercaNosotros.css'],
+    'paquetes/ayuda.css': ['clases_CSS/paginas_bienvenido/styleAyuda.css'],
+    'paquetes/politicas.css': ['clases_CSS/paginas_bienvenido/stylePoliticasPrivacidad.css'],
+    'paquetes/login.css': ['clases_CSS/stylesInicioSesion.css'],
+    'paquetes/nuevo_usuario.css': ['clases_CSS/styleNuevoUsuario.css'],
+    'paquetes/dashboard.css': ['clases_CSS/styleDashboard.css'],
+    'paquetes/mesas.css': ['clases_CSS/styleMesas.css'],
+    'paquetes/menu_comida.css': ['clases_CSS/styleMenu.css'],
+    'paquetes/cuentas.css': ['clases_CSS/styleCuentas.css'],
+    'paquetes/corte.css': ['clases_CSS/styleCorte.css'],
+    'paquetes/corte.js': ['js/exportarCorte.js'],
+    'paquetes/ajustes.css': ['clases_CSS/styleAjustes.css'],
+    'paquetes/agregar_mesa.css': ['clases_CSS/Ajustes/styleAgregarMesa.css'],
+    'paquetes/editar_mesas.css': ['clases_CSS/Ajustes/styleEditarMesa.css'],
+    'paquetes/agregar_platillo.css': ['clases_CSS/Ajustes/styleAgregarPlatillo.css'],
+    'paquetes/editar_platillo.css': ['clases_CSS/Ajustes/styleEditarPlatillo.css'],
+    'paquetes/editar_menu.css': ['clases_CSS/Ajustes/styleEditarMenu.css'],
+    'paquetes/agregar_usuario.css': ['clases_CSS/Ajustes/styleAgregarUsuario.css'],
+    'paquetes/editar_usuario.css': ['clases_CSS/Ajustes/styleEditarUsuario.css'],
+    'paquetes/centro_de_usuarios.css': ['clases_CSS/Ajustes/styleCentroUsuarios.css'],
+}
+
+# Extensiones que vale la pena precomprimir
+COMPRIMIBLES = ('.css', '.js', '.svg', '.txt', '.json', '.map')
+
+# Un año: los nombres con huella nunca cambian de contenido
+MAX_AGE_INMUTABLE = 31536000
+
+
+# -------------------------
+# Minificación
+# -------------------------
+def minificar_css(texto):
+    texto = re.sub(r'/\*.*?\*/', '', texto, flags=re.S)
+    texto = re.sub(r'\s+', ' ', texto)
+    texto = re.sub(r'\s*([{};,>])\s*', r'\1', texto)
+    return texto.replace(';}', '}').strip() + '\n'
+
+
+def minificar_js(texto):
+    """Conservadora: quita sangrías, líneas vacías y comentarios de línea completa."""
+    lineas = (linea.strip() for linea in texto.splitlines())
+    return '\n'.join(l for l in lineas if l and not l.startswith('//')) + '\n'
+
+
+def construir_paquete(nombre):
+    """Concatena y minifica las fuentes de un paquete; devuelve su texto."""
+    partes = []
+    for fuente in PAQUETES[nombre]:
+        ruta = finders.find(fuente)
+        if not ruta:
+            raise FileNotFoundError(f"Fuente de '{nombre}' no encontrada: {fuente}")
+        with open(ruta, encoding='utf-8') as entrada:
+            partes.append(entrada.read())
+    minificar = minificar_css if nombre.endswith('.css') else minificar_js
+    # ';' entre fuentes JS por si alguna no termina en punto y coma
+    separador = '\n' if nombre.endswith('.css') else ';\n'
+    return minificar(separador.join(partes))
+
+
+class PaquetesFinder(BaseFinder):
+    """Finder que expone los paquetes, regenerándolos si alguna fuente cambió."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.storage = FileSystemStorage(location=settings.PAQUETES_ROOT)
+
+    def _fuentes(self, nombre):
+        return [finders.find(fuente) for fuente in PAQUETES[nombre]]
+
+    def _asegurar(self, nombre):
+        destino = self.storage.path(nombre)
+        fuentes = [ruta for ruta in self._fuentes(nombre) if ruta]
+        if os.path.exists(destino) and all(os.path.getmtime(f) <= os.path.getmtime(destino) for f in fuentes):
+            return destino
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, 'w', encoding='utf-8') as salida:
+            salida.write(construir_paquete(nombre))
+        return destino
+
+    def find(self, path, find_all=False, **kwargs):
+        if path not in PAQUETES:
+            return []
+        destino = self._asegurar(path)
+        return [destino] if find_all else destino
+
+    def list(self, ignore_patterns):
+        for nombre in PAQUETES:
+            self._asegurar(nombre)
+            yield nombre, self.storage
+
+
+# -------------------------
+# Storage de collectstatic
+# -------------------------
+def _comprimir(ruta):
+    with open(ruta, 'rb') as entrada:
+        datos = entrada.read()
+    with open(ruta + '.gz', 'wb') as salida:
+        salida.write(gzip.compress(datos, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(ruta + '.br', 'wb') as salida:
+            salida.write(brotli.compress(datos, quality=11))
+
+
+class EstaticosComprimidosStorage(ManifestStaticFilesStorage):
+    """Manifiesto con huellas más variantes .gz/.br de los archivos de texto."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        procesados = set()
+        for original, procesado, hecho in super().post_process(paths, dry_run, **options):
+            if procesado and not isinstance(hecho, Exception):
+                procesados.update((original, procesado))
+            yield original, procesado, hecho
+        if dry_run:
+            return
+        for nombre in procesados:
+            if nombre.endswith(COMPRIMIBLES):
+                _comprimir(self.path(nombre))
+
+    def stored_name(self, name):
+        # Una referencia rota en una plantilla no debe tirar la página completa
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            logger.warning(f"Estático sin entrada en el manifiesto: {name}")
+            return name
+
+
+# -------------------------
+# Servir STATIC_ROOT
+# -------------------------
+_con_huella = {'manifiesto': None, 'nombres': frozenset()}
+
+
+def _nombres_con_huella():
+    if _con_huella['manifiesto'] is not staticfiles_storage.hashed_files:
+        _con_huella['manifiesto'] = staticfiles_storage.hashed_files
+        _con_huella['nombres'] = frozenset(staticfiles_storage.hashed_files.values())
+    return _con_huella['nombres']
+
+
+def servir_estatico(request, ruta):
+    try:
+        archivo = safe_join(settings.STATIC_ROOT, ruta)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(archivo):
+        raise Http404
+
+    content_type = mimetypes.guess_type(archivo)[0] or 'application/octet-stream'
+    aceptadas = codificaciones_aceptadas(request)
+    codificacion = None
+    for nombre, extension in CODIFICACIONES:
+        if nombre in aceptadas and os.path.isfile(archivo + extension):
+            codificacion, archivo = nombre, archivo + extension
+            break
+
+    respuesta = FileResponse(open(archivo, 'rb'), content_type=content_type)
+    if codificacion:
+        respuesta['Content-Encoding'] = codificacion
+    respuesta['Vary'] = 'Accept-Encoding'
+    if ruta in _nombres_con_huella():
+        respuesta['Cache-Control'] = f"public, max-age={MAX_AGE_INMUTABLE}, immutable"
+    else:
+        respuesta['Cache-Control'] = 'public, max-age=3600'
+    return respuesta
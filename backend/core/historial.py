@@ -0,0 +1,282 @@
+# 📦 Exportación del historial de ventas para contabilidad y BI
+#
+# Cuatro tablas planas: cuentas, órdenes, renglones (un platillo de una orden,
+# con su precio) y gastos. Cada tabla se lee por lotes: cada lote es una
+# consulta corta por índice, la memoria queda acotada a un lote y no se sostiene
+# una lectura larga (en WAL no frena a quien escribe, pero sí los checkpoints).
+# Cuentas y gastos se paginan por id (id > último del lote anterior); órdenes y
+# renglones, por ventanas de cuentas (ver _ventanas()).
+#
+# Formatos: csv.gz siempre; parquet y arrow (archivo IPC, comprimido con zstd)
+# con pyarrow, que se importa al usarse, igual que openpyxl en reportes.
+#
+# Incremental: con marca de agua (una por formato) solo sale lo cambiado desde
+# la corrida anterior: cuentas creadas o cerradas, órdenes por `actualizada`
+# (con sus renglones) y gastos por `actualizado`. Los renglones llevan su id:
+# quien los carga reemplaza por id, así el SOLAPE no duplica nada.
+#
+# El precio de los renglones es el precio actual del platillo: el historial no
+# guarda el precio de cada venta.
+import csv
+import gzip
+import importlib.util
+import io
+from datetime import datetime, time as hora_del_dia, timedelta
+from pathlib import Path
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Cuenta, GastoExtra, MarcaAgua, Orden
+
+LOTE = 20_000
+
+# Estimado para que una ventana de cuentas traiga alrededor de LOTE renglones
+RENGLONES_POR_CUENTA = 10
+
+FORMATOS = ('csv', 'parquet', 'arrow')
+
+EXTENSIONES = {'csv': 'csv.gz', 'parquet': 'parquet', 'arrow': 'arrow'}
+
+# El nivel 9 (el de gzip por omisión) tarda varias veces más por muy poco menos tamaño
+NIVEL_GZIP = 5
+
+# Se vuelve a revisar este margen antes de la marca (ver analitica.SOLAPE)
+SOLAPE = timedelta(minutes=5)
+
+# (columna, campo, tipo) de cada tabla, en el orden del archivo
+COLUMNAS = {
+    'cuentas': (
+        ('id', 'id', 'entero'),
+        ('mesa', 'mesa__numero', 'entero'),
+        ('mesero', 'usuario__username', 'texto'),
+        ('total', 'total', 'decimal'),
+        ('activa', 'activa', 'booleano'),
+        ('creada', 'creada', 'momento'),
+        ('cerrada', 'cerrada', 'momento'),
+    ),
+    'ordenes': (
+        ('id', 'id', 'entero'),
+        ('cuenta_id', 'cuenta_id', 'entero'),
+        ('mesa', 'cuenta__mesa__numero', 'entero'),
+        ('estado', 'estado', 'texto'),
+        ('mesero', 'usuario__username', 'texto'),
+        ('cocinero', 'preparada_por__username', 'texto'),
+        ('creada', 'creada', 'momento'),
+        ('iniciada_en', 'iniciada_en', 'momento'),
+        ('servida_en', 'servida_en', 'momento'),
+        ('actualizada', 'actualizada', 'momento'),
+    ),
+    'renglones': (
+        ('id', 'id', 'entero'),
+        ('orden_id', 'orden_id', 'entero'),
+        ('cuenta_id', 'orden__cuenta_id', 'entero'),
+        ('platillo_id', 'platillo_id', 'entero'),
+        ('platillo', 'platillo__nombre', 'texto'),
+        ('precio', 'platillo__precio', 'decimal'),
+        ('creada', 'orden__creada', 'momento'),
+    ),
+    'gastos': (
+        ('id', 'id', 'entero'),
+        ('fecha', 'fecha', 'fecha'),
+        ('monto', 'monto', 'decimal'),
+        ('descripcion', 'descripcion', 'texto'),
+        ('creado_por', 'creado_por__username', 'texto'),
+        ('actualizado', 'actualizado', 'momento'),
+    ),
+}
+
+
+def formato_disponible(formato):
+    if formato == 'csv':
+        return True
+    return formato in FORMATOS and importlib.util.find_spec('pyarrow') is not None
+
+
+def _momento(fecha):
+    return timezone.make_aware(datetime.combine(fecha, hora_del_dia.min))
+
+
+def _consulta(sucursal, tabla, inicio=None, fin=None, desde=None):
+    """Renglones de la tabla en el rango de fechas [inicio, fin] y cambiados después de `desde`."""
+    # Rangos sobre la columna tal cual (no __date) para que usen los índices
+    rango = {}
+    if inicio:
+        rango['gte'] = _momento(inicio)
+    if fin:
+        rango['lt'] = _momento(fin + timedelta(days=1))
+
+    if tabla == 'cuentas':
+        consulta = Cuenta.objects.de(sucursal).filter(**{f'creada__{k}': v for k, v in rango.items()})
+        if desde:
+            consulta = consulta.filter(Q(creada__gt=desde) | Q(cerrada__gt=desde))
+    elif tabla in ('ordenes', 'renglones'):
+        prefijo = 'orden__' if tabla == 'renglones' else ''
+        filtros = {f'{prefijo}cuenta__sucursal': sucursal}
+        filtros.update({f'{prefijo}creada__{k}': v for k, v in rango.items()})
+        if desde:
+            filtros[f'{prefijo}actualizada__gt'] = desde
+        modelo = Orden.platillos.through if tabla == 'renglones' else Orden
+        consulta = modelo.objects.filter(**filtros)
+    else:
+        consulta = GastoExtra.objects.de(sucursal)
+        if inicio:
+            consulta = consulta.filter(fecha__gte=inicio)
+        if fin:
+            consulta = consulta.filter(fecha__lte=fin)
+        if desde:
+            consulta = consulta.filter(actualizado__gt=desde)
+    return consulta
+
+
+def _ventanas(sucursal, consulta, campo_cuenta, campos, cuentas_por_lote):
+    # SQLite llega a las órdenes desde el índice de sucursal de Cuenta: paginar por
+    # el id de la orden le haría ordenar en cada lote todo lo que falta. Con un rango
+    # de cuentas recorre solo esa ventana y ordena solo lo que devuelve.
+    cuentas = Cuenta.objects.de(sucursal).order_by('id').values_list('id', flat=True)
+    ultima = 0
+    while True:
+        tope = cuentas.filter(id__gt=ultima)[cuentas_por_lote - 1:cuentas_por_lote].first()
+        ventana = {f'{campo_cuenta}__gt': ultima}
+        if tope is not None:
+            ventana[f'{campo_cuenta}__lte'] = tope
+        filas = list(consulta.filter(**ventana).values_list(*campos))
+        if filas:
+            yield filas
+        if tope is None:
+            return
+        ultima = tope
+
+
+def lotes(sucursal, tabla, inicio=None, fin=None, desde=None, lote=LOTE):
+    """Genera listas de tuplas con las columnas de la tabla, en orden de id dentro de cada lote."""
+    consulta = _consulta(sucursal, tabla, inicio, fin, desde).order_by('id')
+    campos = [campo for _, campo, _ in COLUMNAS[tabla]]
+    if tabla in ('ordenes', 'renglones'):
+        campo_cuenta = 'orden__cuenta_id' if tabla == 'renglones' else 'cuenta_id'
+        yield from _ventanas(sucursal, consulta, campo_cuenta, campos, max(1, lote // RENGLONES_POR_CUENTA))
+        return
+    ultimo = 0
+    while True:
+        filas = list(consulta.filter(id__gt=ultimo).values_list(*campos)[:lote])
+        if not filas:
+            return
+        yield filas
+        ultimo = filas[-1][0]
+
+
+# -------------------------
+# Escritores
+# -------------------------
+class _EscritorCSV:
+    def __init__(self, archivo, columnas):
+        # newline='' lo pide el módulo csv; el gzip queda abierto para cerrar el flujo a mano
+        self.texto = io.TextIOWrapper(gzip.GzipFile(fileobj=archivo, mode='wb', compresslevel=NIVEL_GZIP), encoding='utf-8', newline='')
+        self.csv = csv.writer(self.texto)
+        self.csv.writerow([nombre for nombre, _, _ in columnas])
+
+    def escribir(self, filas):
+        self.csv.writerows(filas)
+        self.texto.flush()
+
+    def cerrar(self):
+        # Cierra el gzip (escribe su cola) pero no el archivo de destino
+        self.texto.close()
+
+
+class _EscritorArrow:
+    def __init__(self, archivo, columnas, formato):
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError(f"El formato {formato} requiere pyarrow (pip install pyarrow).") from None
+        tipos = {
+            'entero': pa.int64(), 'texto': pa.string(), 'booleano': pa.bool_(), 'fecha': pa.date32(),
+            'decimal': pa.decimal128(12, 2), 'momento': pa.timestamp('us', tz='UTC'),
+        }
+        self.pa = pa
+        self.esquema = pa.schema([(nombre, tipos[tipo]) for nombre, _, tipo in columnas])
+        if formato == 'parquet':
+            import pyarrow.parquet as pq
+            self.escritor = pq.ParquetWriter(archivo, self.esquema, compression='zstd')
+        else:
+            self.escritor = pa.ipc.new_file(
+                archivo, self.esquema, options=pa.ipc.IpcWriteOptions(compression='zstd')
+            )
+
+    def escribir(self, filas):
+        # Cada lote es un grupo de renglones del parquet / un lote del archivo IPC
+        columnas = zip(*filas)
+        self.escritor.write_batch(self.pa.record_batch(
+            [self.pa.array(valores, type=campo.type) for valores, campo in zip(columnas, self.esquema)],
+            schema=self.esquema,
+        ))
+
+    def cerrar(self):
+        self.escritor.close()
+
+
+def _escritor(archivo, tabla, formato):
+    if formato == 'csv':
+        return _EscritorCSV(archivo, COLUMNAS[tabla])
+    return _EscritorArrow(archivo, COLUMNAS[tabla], formato)
+
+
+def escribir_tabla(archivo, sucursal, tabla, formato='csv', inicio=None, fin=None, desde=None, lote=LOTE):
+    """Escribe la tabla en el archivo binario abierto. Devuelve cuántos renglones escribió."""
+    escritor = _escritor(archivo, tabla, formato)
+    total = 0
+    try:
+        for filas in lotes(sucursal, tabla, inicio, fin, desde, lote):
+            escritor.escribir(filas)
+            total += len(filas)
+    finally:
+        escritor.cerrar()
+    return total
+
+
+def csv_en_trozos(sucursal, tabla, inicio=None, fin=None, desde=None, lote=LOTE):
+    """csv.gz de una tabla en trozos de bytes, un lote a la vez (para StreamingHttpResponse)."""
+    salida = io.BytesIO()
+    escritor = _EscritorCSV(salida, COLUMNAS[tabla])
+    for filas in lotes(sucursal, tabla, inicio, fin, desde, lote):
+        escritor.escribir(filas)
+        yield salida.getvalue()
+        salida.seek(0)
+        salida.truncate()
+    escritor.cerrar()
+    yield salida.getvalue()
+
+
+def nombre_archivo(sucursal, tabla, formato):
+    return f"{tabla}_{sucursal.clave}.{EXTENSIONES[formato]}"
+
+
+def exportar(sucursal, carpeta, formato='csv', inicio=None, fin=None, incremental=False, lote=LOTE):
+    """Escribe un archivo por tabla en `carpeta`.
+
+    Con ``incremental`` solo sale lo cambiado desde la marca de agua del formato,
+    que se adelanta al terminar. Devuelve {'archivos': [...], 'renglones': {tabla: n}, 'desde': iso|None}.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    # La marca se toma antes de leer: lo que cambie mientras tanto sale en la siguiente
+    ahora = timezone.now()
+    nombre_marca = f"historial:{formato}"
+    desde = None
+    if incremental:
+        marca = MarcaAgua.objects.de(sucursal).filter(nombre=nombre_marca).first()
+        desde = marca.valor - SOLAPE if marca else None
+
+    resultado = {'archivos': [], 'renglones': {}, 'desde': desde.isoformat() if desde else None}
+    for tabla in COLUMNAS:
+        ruta = carpeta / nombre_archivo(sucursal, tabla, formato)
+        with open(ruta, 'wb') as archivo:
+            resultado['renglones'][tabla] = escribir_tabla(archivo, sucursal, tabla, formato, inicio, fin, desde, lote)
+        resultado['archivos'].append(str(ruta))
+
+    if incremental:
+        MarcaAgua.objects.update_or_create(sucursal=sucursal, nombre=nombre_marca, defaults={'valor': ahora})
+    return resultado
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.core.models import Sucursal
+from backend.core.reportes import cerrar_turno
+from backend.core.routers import usar_sucursal
+
+
+class Command(BaseCommand):
+    help = "Cierra en bloque todas las cuentas activas (fin de turno) y actualiza el corte del día."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sucursal', help="Clave de la sucursal (por defecto, todas las activas).")
+
+    def handle(self, *args, **opciones):
+        sucursales = Sucursal.objects.filter(activa=True)
+        if opciones['sucursal']:
+            sucursales = sucursales.filter(clave=opciones['sucursal'])
+            if not sucursales.exists():
+                raise CommandError(f"No existe la sucursal '{opciones['sucursal']}'.")
+
+        for sucursal in sucursales:
+            with usar_sucursal(sucursal):
+                ids = cerrar_turno(sucursal)
+            self.stdout.write(self.style.SUCCESS(f"🔒 {sucursal}: {len(ids)} cuentas cerradas."))
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.db.models import Count, Max
+
+from backend.core.models import Cuenta, Mesa, Orden, Platillo, Sucursal
+from backend.core.routers import usar_sucursal
+
+
+class Command(BaseCommand):
+    help = ("Prueba de concurrencia: varios hilos piden a la vez en las mismas mesas y se verifica "
+            "que cada mesa termine con una sola cuenta activa y ninguna orden perdida.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--mesas', type=int, default=3, help="Mesas temporales (menos mesas = más choques).")
+        parser.add_argument('--pedidos', type=int, default=20, help="Órdenes por hilo.")
+        parser.add_argument('--sucursal', help="Clave de la sucursal (por defecto, la principal).")
+        parser.add_argument('--conservar', action='store_true', help="No borra las mesas, cuentas y órdenes de prueba.")
+
+    def handle(self, *args, **opciones):
+        if opciones['sucursal']:
+            sucursal = Sucursal.objects.filter(clave=opciones['sucursal']).first()
+            if not sucursal:
+                raise CommandError(f"No existe la sucursal '{opciones['sucursal']}'.")
+        else:
+            sucursal = Sucursal.principal()
+        usuario = User.objects.filter(is_active=True).order_by('id').first()
+        if not usuario:
+            raise CommandError("Se necesita al menos un usuario activo.")
+
+        with usar_sucursal(sucursal):
+            platillo = Platillo.objects.de(sucursal).filter(activo=True).first()
+            if not platillo:
+                raise CommandError("La sucursal no tiene platillos activos.")
+            base = (Mesa.todos.de(sucursal).aggregate(n=Max('numero'))['n'] or 0) + 1000
+            mesas = Mesa.objects.bulk_create(
+                # Desactivadas: no aparecen en el plano mientras dura la prueba
+                [Mesa(sucursal=sucursal, numero=base + i, zona='Prueba de estrés', activa=False)
+                 for i in range(opciones['mesas'])]
+            )
+            try:
+                self._estresar(sucursal, usuario, platillo, mesas, opciones)
+            finally:
+                if not opciones['conservar']:
+                    Cuenta.objects.filter(mesa__in=mesas).delete()
+                    Mesa.todos.filter(id__in=[m.id for m in mesas]).delete()
+
+    def _estresar(self, sucursal, usuario, platillo, mesas, opciones):
+        hilos, pedidos = opciones['hilos'], opciones['pedidos']
+        salida = threading.Barrier(hilos)
+        errores, esperas = [], []
+
+        def trabajar(numero_hilo):
+            try:
+                with usar_sucursal(sucursal):
+                    salida.wait()
+                    for i in range(pedidos):
+                        mesa = mesas[(numero_hilo + i) % len(mesas)]
+                        inicio = time.perf_counter()
+                        try:
+                            with transaction.atomic(using=router.db_for_write(Cuenta)):
+                                cuenta, _ = Cuenta.objects.abierta(sucursal, mesa, usuario)
+                                cuenta.agregar_orden(usuario, [platillo])
+                        except Exception as error:
+                            errores.append(f"{type(error).__name__}: {error}")
+                        esperas.append(time.perf_counter() - inicio)
+            finally:
+                connections.close_all()
+
+        inicio = time.perf_counter()
+        trabajadores = [threading.Thread(target=trabajar, args=(n,)) for n in range(hilos)]
+        for t in trabajadores:
+            t.start()
+        for t in trabajadores:
+            t.join()
+        duracion = time.perf_counter() - inicio
+
+        activas = dict(
+            Cuenta.objects.filter(mesa__in=mesas, activa=True).values('mesa').annotate(n=Count('id')).values_list('mesa', 'n')
+        )
+        ordenes = Orden.objects.filter(cuenta__mesa__in=mesas).count()
+        esperas.sort()
+        self.stdout.write(
+            f"⏱️ {hilos} hilos × {pedidos} órdenes en {len(mesas)} mesas: {duracion:.2f} s "
+            f"({len(esperas) / duracion:.0f} órdenes/s, p50 {esperas[len(esperas) // 2] * 1000:.1f} ms, "
+            f"máx {esperas[-1] * 1000:.1f} ms)"
+        )
+        esperadas = hilos * pedidos - len(errores)
+        problemas = []
+        if errores:
+            problemas.append(f"{len(errores)} órdenes fallaron (p. ej. {errores[0]})")
+        if any(n != 1 for n in activas.values()) or len(activas) != len(mesas):
+            problemas.append(f"cuentas activas por mesa: {activas}")
+        if ordenes != esperadas:
+            problemas.append(f"se esperaban {esperadas} órdenes y hay {ordenes}")
+        if problemas:
+            raise CommandError("❌ " + "; ".join(problemas))
+        self.stdout.write(self.style.SUCCESS(f"✅ Una cuenta activa por mesa y {ordenes} órdenes registradas."))
@@ -0,0 +1,45 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from backend.core import historial
+from backend.core.models import Sucursal
+from backend.core.routers import usar_sucursal
+
+
+class Command(BaseCommand):
+    help = ("Exporta el historial de ventas (cuentas, órdenes, renglones y gastos) por lotes a csv.gz, "
+            "parquet o arrow; con --incremental solo lo cambiado desde la corrida anterior.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('carpeta', help="Carpeta de salida (un archivo por tabla y sucursal).")
+        parser.add_argument('--formato', choices=historial.FORMATOS, default='csv')
+        parser.add_argument('--desde', type=parse_date, help="AAAA-MM-DD (por defecto, desde el principio).")
+        parser.add_argument('--hasta', type=parse_date, help="AAAA-MM-DD (por defecto, hasta hoy).")
+        parser.add_argument('--incremental', action='store_true', help="Solo lo cambiado desde la marca de agua.")
+        parser.add_argument('--sucursal', help="Clave de la sucursal (por defecto, todas las activas).")
+        parser.add_argument('--lote', type=int, default=historial.LOTE)
+
+    def handle(self, *args, **opciones):
+        if not historial.formato_disponible(opciones['formato']):
+            raise CommandError(f"El formato {opciones['formato']} requiere pyarrow (pip install pyarrow).")
+        sucursales = Sucursal.objects.filter(activa=True)
+        if opciones['sucursal']:
+            sucursales = sucursales.filter(clave=opciones['sucursal'])
+            if not sucursales.exists():
+                raise CommandError(f"No existe la sucursal '{opciones['sucursal']}'.")
+
+        for sucursal in sucursales:
+            inicio = time.perf_counter()
+            with usar_sucursal(sucursal):
+                resultado = historial.exportar(
+                    sucursal, Path(opciones['carpeta']), opciones['formato'], opciones['desde'], opciones['hasta'],
+                    incremental=opciones['incremental'], lote=opciones['lote'],
+                )
+            renglones = ", ".join(f"{n} {tabla}" for tabla, n in resultado['renglones'].items())
+            desde = f" (cambios desde {resultado['desde']})" if resultado['desde'] else ""
+            self.stdout.write(self.style.SUCCESS(
+                f"📦 {sucursal}: {renglones} en {time.perf_counter() - inicio:.2f} s{desde}."
+            ))
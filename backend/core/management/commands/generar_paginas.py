@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from backend.core import paginas
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-renderiza las páginas públicas a HTML estático con variantes gzip (y brotli si está instalado). "
+        "Ejecutar después de collectstatic para que enlacen los estáticos con huella."
+    )
+
+    def handle(self, *args, **opciones):
+        manifiesto = paginas.construir()
+        for url, datos in manifiesto.items():
+            variantes = ', '.join(datos['variantes'])
+            self.stdout.write(f"  {url} -> {datos['archivo']} ({variantes})")
+        if paginas.brotli is None:
+            self.stdout.write(self.style.WARNING("brotli no está instalado: solo se generó gzip."))
+        self.stdout.write(self.style.SUCCESS(f"🌐 {len(manifiesto)} páginas generadas en {paginas.directorio()}"))
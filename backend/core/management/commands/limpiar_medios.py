@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from backend.core import medios
+
+
+class Command(BaseCommand):
+    help = "Borra las fotos sin referencias del almacén por contenido y, opcionalmente, migra las fotos antiguas a él."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--migrar', action='store_true',
+                            help="Pasa primero las fotos con nombre antiguo al almacén por contenido.")
+        parser.add_argument('--gracia', type=int, default=medios.GRACIA_HUERFANOS,
+                            help="Segundos que se respeta un archivo nuevo aún sin referencia (por defecto: %(default)s).")
+        parser.add_argument('--simular', action='store_true', help="Solo muestra lo que se haría.")
+
+    def handle(self, *args, **opciones):
+        simular = opciones['simular']
+
+        if opciones['migrar']:
+            cambios = medios.migrar_existentes(aplicar=not simular)
+            for anterior, nuevo in cambios:
+                self.stdout.write(f"  {anterior} -> {nuevo or '(pendiente)'}")
+            self.stdout.write(self.style.SUCCESS(f"📦 {len(cambios)} fotos migradas al almacén por contenido."))
+
+        total = liberado = 0
+        for nombre, tamano in medios.huerfanos(opciones['gracia']):
+            if not simular:
+                medios.borrar_huerfano(nombre)
+            total += 1
+            liberado += tamano
+            self.stdout.write(f"  🗑️ {nombre}")
+        accion = "se borrarían" if simular else "borrados"
+        self.stdout.write(self.style.SUCCESS(f"🧹 {total} huérfanos {accion} ({liberado / 1024:.1f} KiB)."))
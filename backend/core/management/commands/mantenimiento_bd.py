@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.core import mantenimiento
+from backend.core.tareas import programar_mantenimiento
+
+
+class Command(BaseCommand):
+    help = ("Mantenimiento en caliente de las bases SQLite: respaldo por pasos, PRAGMA optimize/ANALYZE, "
+            "checkpoint del WAL, vacío incremental y quick_check. Seguro con el restaurante en servicio.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bd', action='append', help="Alias de la base (por defecto, todas).")
+        parser.add_argument('--sin-respaldo', action='store_true')
+        parser.add_argument('--analizar', action='store_true', help="ANALYZE completo, sin límite por índice, en lugar de PRAGMA optimize "
+                                 "(toma el candado de escritura mientras dura: fuera de servicio).")
+        parser.add_argument('--activar-incremental', action='store_true',
+                            help="Pasa la base a auto_vacuum=INCREMENTAL con un VACUUM completo (bloquea escrituras: "
+                                 "solo fuera de servicio).")
+        parser.add_argument('--programar', action='store_true',
+                            help="Solo encola la tarea nocturna, que después se reprograma sola.")
+
+    def handle(self, *args, **opciones):
+        if opciones['programar']:
+            tarea = programar_mantenimiento()
+            self.stdout.write(self.style.SUCCESS(f"🗓️ Mantenimiento programado para {timezone.localtime(tarea.disponible_en):%Y-%m-%d %H:%M} (tarea #{tarea.id})."))
+            return
+
+        disponibles = mantenimiento.alias_sqlite()
+        bases = opciones['bd'] or disponibles
+        desconocidas = set(bases) - set(disponibles)
+        if desconocidas:
+            raise CommandError(f"Bases desconocidas: {', '.join(sorted(desconocidas))}.")
+
+        fallas = []
+        for alias in bases:
+            if opciones['activar_incremental']:
+                self.stdout.write(f"⏳ {alias}: VACUUM para activar el vacío incremental…")
+                mantenimiento.activar_vacio_incremental(alias)
+            r = mantenimiento.mantener(alias, respaldo=not opciones['sin_respaldo'], analizar=opciones['analizar'])
+            self.stdout.write(self.style.MIGRATE_HEADING(f"🧰 {alias}"))
+            if 'respaldo' in r:
+                self.stdout.write(
+                    f"  💾 respaldo      {r['respaldo']['segundos']:7.3f} s  {r['respaldo']['archivo']} "
+                    f"({r['respaldo']['bytes'] / 1024:.0f} KiB, {r['respaldo']['pasos']} pasos, "
+                    f"{r['respaldo']['reinicios']} reinicios)"
+                )
+            optimizar = r['optimizar']
+            if not optimizar['analyze']:
+                analisis = 'PRAGMA optimize'
+            elif optimizar['limite'] is None:
+                analisis = 'ANALYZE completo'
+            else:
+                analisis = f"ANALYZE acotado ({optimizar['limite']} renglones por índice)"
+            self.stdout.write(f"  📊 estadísticas  {optimizar['segundos']:7.3f} s  {analisis}")
+            self.stdout.write(
+                f"  📜 checkpoint    {r['checkpoint']['segundos']:7.3f} s  "
+                f"{r['checkpoint']['copiadas']}/{r['checkpoint']['paginas_wal']} páginas del WAL"
+            )
+            vacio = r['vacio']
+            if vacio['incremental']:
+                detalle = f"{vacio['paginas_liberadas']} páginas liberadas, {vacio['paginas_libres']} libres"
+            else:
+                detalle = (f"{vacio['paginas_libres']} páginas libres; auto_vacuum no es incremental "
+                           f"(usa --activar-incremental fuera de servicio)")
+            self.stdout.write(f"  🧹 vacío         {vacio['segundos']:7.3f} s  {detalle}")
+            revision = r['revision']
+            self.stdout.write(
+                f"  🔎 quick_check   {revision['segundos']:7.3f} s  {'ok' if revision['ok'] else revision['errores']}"
+            )
+            if not revision['ok']:
+                fallas.append(alias)
+        if fallas:
+            raise CommandError(f"❌ quick_check encontró errores en: {', '.join(fallas)}.")
@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Se ejecuta en un proceso nuevo para medir un arranque realmente en frío
+SCRIPT = r'''
+import json, os, sys, time
+inicio = time.perf_counter()
+import django
+django.setup()
+t_setup = time.perf_counter()
+from django.core.servers.basehttp import get_internal_wsgi_application
+get_internal_wsgi_application()
+t_wsgi = time.perf_counter()
+from django.contrib.auth.models import User
+from django.test import Client
+cliente = Client(HTTP_HOST='localhost')
+if os.environ['CC_MEDIR_USUARIO']:
+    cliente.force_login(User.objects.get(username=os.environ['CC_MEDIR_USUARIO']))
+tiempos, estados = [], []
+for _ in range(int(os.environ['CC_MEDIR_PETICIONES'])):
+    t = time.perf_counter()
+    estados.append(cliente.get(os.environ['CC_MEDIR_RUTA']).status_code)
+    tiempos.append(time.perf_counter() - t)
+print(json.dumps({
+    'setup': t_setup - inicio,
+    'wsgi': t_wsgi - t_setup,
+    'peticiones': tiempos,
+    'estados': estados,
+    'openpyxl_cargado': 'openpyxl' in sys.modules,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = "Mide en un proceso nuevo el tiempo de importación/arranque y la latencia de las primeras peticiones."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ruta', default='/login/', help="Ruta a pedir (por defecto: %(default)s).")
+        parser.add_argument('--usuario', default='', help="Inicia sesión como este usuario antes de pedir la ruta.")
+        parser.add_argument('--peticiones', type=int, default=3)
+        parser.add_argument('--precalentar', action='store_true', help="Arranca con CC_PRECALENTAR=1.")
+        parser.add_argument('--top', type=int, default=10, help="Módulos más lentos de importar a mostrar.")
+        parser.add_argument('--json', action='store_true', help="Salida en JSON para seguimiento.")
+
+    def handle(self, *args, **opciones):
+        entorno = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),
+            CC_PRECALENTAR='1' if opciones['precalentar'] else '0',
+            CC_MEDIR_RUTA=opciones['ruta'],
+            CC_MEDIR_USUARIO=opciones['usuario'],
+            CC_MEDIR_PETICIONES=str(max(opciones['peticiones'], 1)),
+        )
+        proceso = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', SCRIPT],
+            cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            raise CommandError(proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else "Falló la medición")
+        medicion = json.loads(proceso.stdout.strip().splitlines()[-1])
+        medicion['importaciones'] = self._importaciones(proceso.stderr, opciones['top'])
+        medicion['precalentado'] = opciones['precalentar']
+
+        if opciones['json']:
+            self.stdout.write(json.dumps(medicion, indent=2))
+            return
+
+        self.stdout.write(f"⏱️ django.setup(): {medicion['setup'] * 1000:.0f} ms")
+        self.stdout.write(f"⏱️ aplicación WSGI{' + precalentamiento' if opciones['precalentar'] else ''}: "
+                          f"{medicion['wsgi'] * 1000:.0f} ms")
+        for numero, (tiempo, estado) in enumerate(zip(medicion['peticiones'], medicion['estados']), start=1):
+            self.stdout.write(f"⏱️ petición {numero} a {opciones['ruta']} ({estado}): {tiempo * 1000:.1f} ms")
+        self.stdout.write(f"openpyxl cargado al arrancar: {'sí' if medicion['openpyxl_cargado'] else 'no'}")
+        self.stdout.write("Importaciones más lentas (acumulado):")
+        for modulo, milisegundos in medicion['importaciones']:
+            self.stdout.write(f"  {milisegundos:8.1f} ms  {modulo}")
+
+    def _importaciones(self, salida, top):
+        """Módulos de primer nivel ordenados por tiempo acumulado de `python -X importtime`."""
+        tiempos = []
+        for linea in salida.splitlines():
+            if not linea.startswith('import time:') or '|' not in linea:
+                continue
+            _, acumulado, modulo = linea[len('import time:'):].split('|')
+            # Solo los de primer nivel (sin sangría): su tiempo incluye el de sus dependencias
+            if not acumulado.strip().isdigit() or modulo.startswith('   '):
+                continue
+            tiempos.append((modulo.strip(), int(acumulado) / 1000))
+        return sorted(tiempos, key=lambda t: -t[1])[:top]
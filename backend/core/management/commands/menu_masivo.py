@@ -0,0 +1,57 @@
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.core import menu_masivo
+from backend.core.models import Sucursal
+from backend.core.routers import usar_sucursal
+
+
+class Command(BaseCommand):
+    help = "Exporta el menú a CSV/XLSX o lo importa en bloque (con --simular solo muestra los cambios)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('accion', choices=['exportar', 'importar'])
+        parser.add_argument('archivo', help="Ruta .csv o .xlsx.")
+        parser.add_argument('--sucursal', default=Sucursal.CLAVE_PRINCIPAL)
+        parser.add_argument('--usuario', help="Dueño de los platillos nuevos (por defecto, el primer superusuario).")
+        parser.add_argument('--simular', action='store_true', help="Valida y muestra el diff sin escribir.")
+
+    def handle(self, *args, **opciones):
+        sucursal = Sucursal.objects.filter(clave=opciones['sucursal']).first()
+        if sucursal is None:
+            raise CommandError(f"No existe la sucursal '{opciones['sucursal']}'.")
+        archivo = opciones['archivo']
+
+        with usar_sucursal(sucursal):
+            if opciones['accion'] == 'exportar':
+                exportar = menu_masivo.exportar_xlsx if archivo.lower().endswith('.xlsx') else menu_masivo.exportar_csv
+                with open(archivo, 'wb') as salida:
+                    salida.write(exportar(sucursal))
+                self.stdout.write(self.style.SUCCESS(f"📤 Menú de {sucursal} exportado a {archivo}."))
+                return
+
+            usuario = self._usuario(opciones['usuario'])
+            if not os.path.exists(archivo):
+                raise CommandError(f"No existe {archivo}.")
+            with open(archivo, 'rb') as entrada:
+                try:
+                    resultado = menu_masivo.importar(sucursal, usuario, entrada, archivo, simular=opciones['simular'])
+                except menu_masivo.ArchivoInvalido as error:
+                    raise CommandError(str(error))
+
+        self.stdout.write(json.dumps(resultado, indent=2, ensure_ascii=False, default=str))
+        if resultado['errores']:
+            raise CommandError(f"{len(resultado['errores'])} renglones con errores: no se aplicó nada.")
+        if resultado['aplicado']:
+            self.stdout.write(self.style.SUCCESS(
+                f"📥 {resultado['creados']} platillos nuevos, {resultado['actualizados']} actualizados."
+            ))
+
+    def _usuario(self, nombre):
+        usuario = User.objects.filter(username=nombre).first() if nombre else User.objects.filter(is_superuser=True).first()
+        if usuario is None:
+            raise CommandError("Indica un --usuario existente para los platillos nuevos.")
+        return usuario
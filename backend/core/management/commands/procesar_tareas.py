@@ -0,0 +1,72 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from backend.core import tareas
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de tareas en segundo plano (exportaciones, fotos, cortes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=2, help="Hilos por proceso.")
+        parser.add_argument('--procesos', type=int, default=1, help="Procesos trabajadores.")
+        parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos de espera con la cola vacía.")
+        parser.add_argument('--una-vez', action='store_true', help="Vacía la cola y termina.")
+
+    def handle(self, *args, **opciones):
+        self.detener = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self.detener.set())
+        signal.signal(signal.SIGINT, lambda *_: self.detener.set())
+
+        liberadas = tareas.liberar_abandonadas()
+        if liberadas:
+            self.stdout.write(f"↩️ {liberadas} tareas abandonadas regresaron a la cola.")
+
+        procesos = max(1, opciones['procesos'])
+        if procesos == 1:
+            self._proceso(opciones)
+            return
+
+        # Cerrar conexiones antes de bifurcar: cada hijo abre la suya
+        connections.close_all()
+        contexto = multiprocessing.get_context('fork')
+        hijos = [contexto.Process(target=self._proceso, args=(opciones,)) for _ in range(procesos)]
+        for hijo in hijos:
+            hijo.start()
+        while any(hijo.is_alive() for hijo in hijos):
+            if self.detener.is_set():
+                # SIGTERM a los hijos: terminan la tarea en curso y salen
+                for hijo in hijos:
+                    if hijo.is_alive():
+                        hijo.terminate()
+            for hijo in hijos:
+                hijo.join(timeout=1)
+
+    def _proceso(self, opciones):
+        hilos = [
+            threading.Thread(target=self._bucle, args=(opciones,), daemon=True)
+            for _ in range(max(1, opciones['hilos']))
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+    def _bucle(self, opciones):
+        trabajador = f"{tareas.nombre_trabajador()}:{threading.get_ident()}"
+        try:
+            while not self.detener.is_set():
+                close_old_connections()
+                tarea = tareas.procesar_siguiente(trabajador)
+                if tarea is not None:
+                    self.stdout.write(f"✅ Tarea #{tarea.id} ({tarea.tipo}) → {tarea.estado}")
+                    continue
+                if opciones['una_vez']:
+                    break
+                self.detener.wait(opciones['intervalo'])
+        finally:
+            connections.close_all()
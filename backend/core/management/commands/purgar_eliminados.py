@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.core.models import Sucursal
+from backend.core.purga import LOTE, purgar_sucursal, purgar_usuarios
+from backend.core.routers import usar_sucursal
+
+
+class Command(BaseCommand):
+    help = "Borra definitivamente platillos y mesas dados de baja y usuarios inactivos sin historial."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=90, help="Antigüedad mínima de la baja (por defecto 90).")
+        parser.add_argument('--lote', type=int, default=LOTE, help="Registros por transacción.")
+        parser.add_argument('--simular', action='store_true', help="Solo cuenta lo que se borraría.")
+        parser.add_argument('--sucursal', help="Clave de la sucursal (por defecto, todas).")
+
+    def handle(self, *args, **opciones):
+        if opciones['dias'] < 1 or opciones['lote'] < 1:
+            raise CommandError("--dias y --lote deben ser mayores que cero.")
+        sucursales = Sucursal.objects.all()
+        if opciones['sucursal']:
+            sucursales = sucursales.filter(clave=opciones['sucursal'])
+            if not sucursales.exists():
+                raise CommandError(f"No existe la sucursal '{opciones['sucursal']}'.")
+
+        verbo = "se borrarían" if opciones['simular'] else "borrados"
+        for sucursal in sucursales:
+            with usar_sucursal(sucursal):
+                r = purgar_sucursal(sucursal, opciones['dias'], opciones['lote'], opciones['simular'])
+            self.stdout.write(self.style.SUCCESS(
+                f"🧹 {sucursal}: {r['platillos']} platillos y {r['mesas']} mesas {verbo} "
+                f"({r['cuentas_sin_mesa']} cuentas quedan sin mesa); {r['cambios']} cambios de sincronización."
+            ))
+
+        if not opciones['sucursal']:
+            usuarios = purgar_usuarios(opciones['dias'], opciones['lote'], opciones['simular'])
+            self.stdout.write(self.style.SUCCESS(f"🧹 Usuarios inactivos sin historial {verbo}: {usuarios}."))
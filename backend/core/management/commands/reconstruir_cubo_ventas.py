@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from backend.core.cubo import reconstruir
+from backend.core.models import Orden, Sucursal
+from backend.core.routers import usar_sucursal
+
+
+class Command(BaseCommand):
+    help = "Rehace el cubo de ventas (día × hora × platillo) desde las cuentas cerradas de un rango."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sucursal', help="Clave de la sucursal (por defecto, todas las activas).")
+        parser.add_argument('--desde', help="AAAA-MM-DD (por defecto, la primera orden).")
+        parser.add_argument('--hasta', help="AAAA-MM-DD (por defecto, hoy).")
+
+    def handle(self, *args, **opciones):
+        sucursales = Sucursal.objects.filter(activa=True)
+        if opciones['sucursal']:
+            sucursales = sucursales.filter(clave=opciones['sucursal'])
+            if not sucursales.exists():
+                raise CommandError(f"No existe la sucursal '{opciones['sucursal']}'.")
+        desde = self._fecha(opciones['desde']) if opciones['desde'] else None
+        hasta = self._fecha(opciones['hasta']) if opciones['hasta'] else timezone.localdate()
+
+        for sucursal in sucursales:
+            with usar_sucursal(sucursal):
+                inicio = desde or self._primera_orden(sucursal) or hasta
+                celdas = reconstruir(sucursal, inicio, hasta)
+            self.stdout.write(self.style.SUCCESS(f"🧊 {sucursal}: {celdas} celdas de {inicio} a {hasta}."))
+
+    def _fecha(self, valor):
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise CommandError(f"Fecha inválida: {valor}")
+        return fecha
+
+    def _primera_orden(self, sucursal):
+        primera = Orden.objects.filter(cuenta__sucursal=sucursal).order_by('creada').values_list('creada', flat=True).first()
+        return timezone.localdate(primera) if primera else None
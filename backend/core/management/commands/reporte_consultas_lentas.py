@@ -0,0 +1,80 @@
+import os
+from datetime import datetime, time as hora_del_dia
+from statistics import median
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from backend.core import consultas_lentas
+
+
+def _desde(valor):
+    """Fecha/hora ISO o fecha sola (medianoche local); sin zona se toma la hora local."""
+    try:
+        momento = parse_datetime(valor)
+        if momento is None:
+            fecha = parse_date(valor)
+            momento = datetime.combine(fecha, hora_del_dia.min) if fecha else None
+    except ValueError:
+        momento = None
+    if momento is None:
+        raise CommandError(f"--desde inválido: '{valor}' (usa AAAA-MM-DD o AAAA-MM-DDTHH:MM).")
+    return timezone.make_aware(momento) if timezone.is_naive(momento) else momento
+
+
+class Command(BaseCommand):
+    help = "Agrupa la bitácora de consultas lentas por huella de SQL y muestra dónde falta un índice."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help="Huellas a mostrar (por defecto: %(default)s).")
+        parser.add_argument('--origen', help="Solo consultas de esta vista o tarea (p. ej. vista_corte).")
+        parser.add_argument('--desde', help="Solo consultas desde esta fecha u hora ISO (hora local si no lleva zona).")
+        parser.add_argument('--escaneos', action='store_true', help="Solo consultas con escaneo completo de tabla.")
+        parser.add_argument('--limpiar', action='store_true', help="Vacía la bitácora después del reporte.")
+
+    def handle(self, *args, **opciones):
+        desde = _desde(opciones['desde']) if opciones['desde'] else None
+        grupos = {}
+        for registro in consultas_lentas.leer():
+            if opciones['origen'] and registro['origen'] != opciones['origen']:
+                continue
+            if desde and parse_datetime(registro['momento']) < desde:
+                continue
+            if opciones['escaneos'] and not registro['escaneo_completo']:
+                continue
+            grupo = grupos.setdefault(registro['huella'], {
+                'sql': registro['sql_normal'], 'tiempos': [], 'origenes': {}, 'escaneo': False,
+                'plan': None, 'pila': registro['pila'], 'parametros': registro['parametros'],
+            })
+            grupo['tiempos'].append(registro['ms'])
+            grupo['origenes'][registro['origen']] = grupo['origenes'].get(registro['origen'], 0) + 1
+            if registro['plan']:
+                grupo['plan'] = registro['plan']
+                grupo['escaneo'] = grupo['escaneo'] or registro['escaneo_completo']
+
+        if not grupos:
+            self.stdout.write("No hay consultas lentas registradas.")
+        ordenados = sorted(grupos.items(), key=lambda par: -sum(par[1]['tiempos']))
+        for clave, grupo in ordenados[:opciones['top']]:
+            tiempos = grupo['tiempos']
+            aviso = self.style.WARNING(" ⚠️ ESCANEO COMPLETO") if grupo['escaneo'] else ''
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"[{clave}] {len(tiempos)}× total {sum(tiempos):.0f} ms · mediana {median(tiempos):.0f} ms · "
+                f"máx {max(tiempos):.0f} ms{aviso}"
+            ))
+            self.stdout.write(f"  SQL: {grupo['sql'][:400]}")
+            origenes = ', '.join(f"{o} ({n})" for o, n in sorted(grupo['origenes'].items(), key=lambda p: -p[1]))
+            self.stdout.write(f"  Origen: {origenes}")
+            if grupo['parametros']:
+                self.stdout.write(f"  Parámetros (ejemplo): {', '.join(grupo['parametros'][:10])}")
+            for paso in grupo['plan'] or []:
+                marca = '  ← sin índice' if paso in consultas_lentas.escaneos_completos([paso]) else ''
+                self.stdout.write(f"  Plan: {paso}{marca}")
+            for cuadro in grupo['pila'][-3:]:
+                self.stdout.write(f"  Pila: {cuadro}")
+
+        if opciones['limpiar'] and os.path.exists(settings.CONSULTAS_LENTAS_ARCHIVO):
+            os.remove(settings.CONSULTAS_LENTAS_ARCHIVO)
+            self.stdout.write(self.style.SUCCESS("🧹 Bitácora vaciada."))
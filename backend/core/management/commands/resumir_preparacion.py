@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.core.analitica import resumir
+from backend.core.models import Sucursal
+from backend.core.routers import usar_sucursal
+
+
+class Command(BaseCommand):
+    help = "Actualiza los resúmenes de tiempos de preparación de cocina (incremental desde la última marca)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sucursal', help="Clave de la sucursal (por defecto, todas las activas).")
+        parser.add_argument('--completo', action='store_true', help="Recalcula todo el historial, no solo lo nuevo.")
+
+    def handle(self, *args, **opciones):
+        sucursales = Sucursal.objects.filter(activa=True)
+        if opciones['sucursal']:
+            sucursales = sucursales.filter(clave=opciones['sucursal'])
+            if not sucursales.exists():
+                raise CommandError(f"No existe la sucursal '{opciones['sucursal']}'.")
+
+        for sucursal in sucursales:
+            with usar_sucursal(sucursal):
+                resultado = resumir(sucursal, completo=opciones['completo'])
+            self.stdout.write(self.style.SUCCESS(
+                f"⏱️ {sucursal}: {resultado['dias']} días, {resultado['renglones']} renglones de resumen."
+            ))
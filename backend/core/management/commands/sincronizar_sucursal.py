@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.core.models import Sucursal
+from backend.core.routers import bd_de
+
+
+class Command(BaseCommand):
+    help = "Prepara la base SQLite de una sucursal: migra el esquema y replica usuarios y sucursales."
+
+    def add_arguments(self, parser):
+        parser.add_argument('clave', help="Clave de la sucursal.")
+
+    def handle(self, *args, **opciones):
+        try:
+            sucursal = Sucursal.objects.using('default').get(clave=opciones['clave'])
+        except Sucursal.DoesNotExist:
+            raise CommandError(f"No existe la sucursal '{opciones['clave']}'.")
+
+        alias = bd_de(sucursal)
+        if alias is None:
+            raise CommandError(
+                f"La sucursal '{sucursal.clave}' no tiene una base propia configurada (CC_SUCURSALES_BD)."
+            )
+
+        call_command('migrate', database=alias, verbosity=0)
+
+        # Réplica de las tablas compartidas a las que apuntan las llaves foráneas
+        for modelo in (Sucursal, User):
+            campos = [f.name for f in modelo._meta.concrete_fields if not f.primary_key]
+            filas = list(modelo.objects.using('default').all())
+            modelo.objects.using(alias).bulk_create(
+                filas, update_conflicts=True, unique_fields=['id'], update_fields=campos
+            )
+            self.stdout.write(f"  {modelo._meta.verbose_name_plural}: {len(filas)}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Base '{alias}' lista para {sucursal}."))
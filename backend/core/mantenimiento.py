@@ -0,0 +1,174 @@
+# 🧰 Mantenimiento en caliente de las bases SQLite
+#
+# Todo se puede correr con el restaurante abierto:
+#   - respaldo con la API de respaldo en línea de SQLite, de PAGINAS_POR_PASO en
+#     PAGINAS_POR_PASO páginas con una pausa entre pasos; cada paso es una lectura
+#     corta y en modo WAL no detiene a quien escribe. La copia se verifica con
+#     integrity_check antes de tomar su nombre final.
+#   - PRAGMA optimize (ANALYZE acotado solo donde hace falta; completo con `analizar`)
+#   - checkpoint PASSIVE del WAL (no espera a lectores ni escritores)
+#   - vacío incremental por pasos, si la base tiene auto_vacuum=INCREMENTAL
+#   - quick_check de la base en uso
+# Cada paso se mide; mantener() devuelve los tiempos y resultados.
+#
+# Se usa una conexión sqlite3 propia en modo autocommit, no la de Django: así
+# ningún paso queda dentro de una transacción de la petición o de la tarea.
+import sqlite3
+import time
+from datetime import datetime, time as hora_del_dia, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+PAGINAS_POR_PASO = 256
+
+PAUSA = 0.01
+
+# Si la base cambia a media copia, SQLite reinicia el respaldo; tras tantos
+# reinicios se copia de un solo paso (una sola lectura, en WAL sin bloquear)
+REINICIOS_MAXIMOS = 5
+
+# Renglones que ANALYZE revisa por índice (PRAGMA analysis_limit)
+LIMITE_ANALISIS = 1000
+
+# Páginas libres por transacción de incremental_vacuum
+PAGINAS_VACIO = 500
+
+
+def alias_sqlite():
+    return [alias for alias, bd in settings.DATABASES.items() if bd['ENGINE'].endswith('sqlite3')]
+
+
+def _conectar(ruta, alias):
+    espera = settings.DATABASES[alias].get('OPTIONS', {}).get('timeout', 20)
+    return sqlite3.connect(ruta, timeout=espera, isolation_level=None)
+
+
+def _medir(resultado, paso, funcion):
+    inicio = time.perf_counter()
+    resultado[paso] = funcion()
+    resultado[paso]['segundos'] = round(time.perf_counter() - inicio, 3)
+
+
+def respaldar(alias, paginas=PAGINAS_POR_PASO, pausa=PAUSA):
+    """Copia en caliente a RESPALDOS_DIR y conserva los RESPALDOS_CONSERVAR más recientes."""
+    carpeta = Path(settings.RESPALDOS_DIR)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    destino = carpeta / f"{alias}-{timezone.localtime():%Y%m%d-%H%M%S}.sqlite3"
+    parcial = destino.with_suffix('.parcial')
+
+    estado = {'pasos': 0, 'reinicios': 0, 'restantes': None}
+
+    def progreso(_, restantes, total):
+        estado['pasos'] += 1
+        if estado['restantes'] is not None and restantes > estado['restantes']:
+            estado['reinicios'] += 1
+            if estado['reinicios'] >= REINICIOS_MAXIMOS:
+                raise InterruptedError
+        estado['restantes'] = restantes
+        # sqlite3 solo duerme entre pasos si la base está ocupada: el respiro se da aquí
+        time.sleep(pausa)
+
+    origen = _conectar(settings.DATABASES[alias]['NAME'], alias)
+    copia = sqlite3.connect(parcial)
+    try:
+        try:
+            origen.backup(copia, pages=paginas, progress=progreso)
+        except InterruptedError:
+            origen.backup(copia, pages=-1)
+        verificacion = copia.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        copia.close()
+        origen.close()
+    if verificacion != 'ok':
+        parcial.unlink()
+        raise sqlite3.DatabaseError(f"El respaldo de '{alias}' no pasó integrity_check: {verificacion}")
+    parcial.rename(destino)
+
+    anteriores = sorted(carpeta.glob(f"{alias}-*.sqlite3"), reverse=True)
+    for viejo in anteriores[settings.RESPALDOS_CONSERVAR:]:
+        viejo.unlink()
+    return {'archivo': str(destino), 'bytes': destino.stat().st_size,
+            'pasos': estado['pasos'], 'reinicios': estado['reinicios']}
+
+
+def optimizar(con, analizar=False):
+    """PRAGMA optimize; ANALYZE si la base nunca se analizó (completo solo si se pide)."""
+    if analizar:
+        # Sin límite: recorre todos los índices con el candado de escritura, fuera de servicio
+        con.execute("ANALYZE")
+        return {'analyze': True, 'limite': None}
+    # Límite por índice para que el análisis sea corto en tablas grandes
+    con.execute(f"PRAGMA analysis_limit={LIMITE_ANALISIS}")
+    sin_estadisticas = not con.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+    ).fetchone()
+    if sin_estadisticas:
+        con.execute("ANALYZE")
+        return {'analyze': True, 'limite': LIMITE_ANALISIS}
+    con.execute("PRAGMA optimize")
+    return {'analyze': False, 'limite': LIMITE_ANALISIS}
+
+
+def vaciar(con, paginas=PAGINAS_VACIO, pausa=PAUSA):
+    """Devuelve al sistema las páginas libres por pasos cortos (auto_vacuum=INCREMENTAL)."""
+    modo = con.execute("PRAGMA auto_vacuum").fetchone()[0]
+    libres = con.execute("PRAGMA freelist_count").fetchone()[0]
+    if modo != 2:
+        return {'incremental': False, 'paginas_libres': libres}
+    liberadas = 0
+    while libres:
+        # fetchall: el PRAGMA libera una página por cada paso del cursor
+        con.execute(f"PRAGMA incremental_vacuum({int(paginas)})").fetchall()
+        restantes = con.execute("PRAGMA freelist_count").fetchone()[0]
+        if restantes >= libres:
+            break
+        liberadas += libres - restantes
+        libres = restantes
+        time.sleep(pausa)
+    return {'incremental': True, 'paginas_liberadas': liberadas, 'paginas_libres': libres}
+
+
+def activar_vacio_incremental(alias):
+    """Cambia la base a auto_vacuum=INCREMENTAL. Requiere un VACUUM completo: bloquea la escritura
+    mientras dura, así que va fuera del horario de servicio."""
+    con = _conectar(settings.DATABASES[alias]['NAME'], alias)
+    try:
+        con.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        con.execute("VACUUM")
+        return con.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        con.close()
+
+
+def mantener(alias, respaldo=True, analizar=False):
+    """Respaldo, estadísticas, checkpoint, vacío incremental y revisión de una base."""
+    resultado = {}
+    if respaldo:
+        _medir(resultado, 'respaldo', lambda: respaldar(alias))
+    con = _conectar(settings.DATABASES[alias]['NAME'], alias)
+    try:
+        _medir(resultado, 'optimizar', lambda: optimizar(con, analizar))
+
+        def checkpoint():
+            ocupada, paginas_wal, copiadas = con.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            return {'ocupada': bool(ocupada), 'paginas_wal': paginas_wal, 'copiadas': copiadas}
+        _medir(resultado, 'checkpoint', checkpoint)
+
+        _medir(resultado, 'vacio', lambda: vaciar(con))
+
+        def revisar():
+            errores = [fila[0] for fila in con.execute("PRAGMA quick_check").fetchall()]
+            return {'ok': errores == ['ok'], 'errores': [] if errores == ['ok'] else errores[:20]}
+        _medir(resultado, 'revision', revisar)
+    finally:
+        con.close()
+    return resultado
+
+
+def proxima_ejecucion(ahora=None):
+    """Siguiente MANTENIMIENTO_HORA local (mañana si ya pasó la de hoy)."""
+    ahora = timezone.localtime(ahora)
+    hoy = timezone.make_aware(datetime.combine(ahora.date(), hora_del_dia(settings.MANTENIMIENTO_HORA)))
+    return hoy if hoy > ahora else hoy + timedelta(days=1)
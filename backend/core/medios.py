@@ -0,0 +1,200 @@
+# 🖼️ Fotos direccionadas por contenido
+#
+# Las fotos de platillos y perfiles se guardan como fotos/<aa>/<sha256>.<ext>:
+# subir dos veces la misma imagen no ocupa más espacio y un nombre nunca cambia
+# de contenido, así que se sirven con caché inmutable. Un archivo puede quedar
+# referenciado por varias filas; los huérfanos los borra `limpiar_medios`
+# contando referencias en todas las bases.
+import hashlib
+import mimetypes
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import connections
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+
+CARPETA = 'fotos'
+
+# Carpetas de MEDIA_ROOT que se sirven públicamente (tareas/ y tickets/ tienen sus propias vistas)
+CARPETAS_PUBLICAS = (f'{CARPETA}/', 'platillos/', 'usuarios/')
+
+# Un archivo recién subido puede existir antes que la fila que lo referencia
+GRACIA_HUERFANOS = 3600
+
+MAX_AGE_INMUTABLE = 31536000
+
+_NOMBRE_DIRECCIONADO = re.compile(rf'^{CARPETA}/[0-9a-f]{{2}}/(?P<huella>[0-9a-f]{{64}})\.\w+$')
+_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class AlmacenPorContenido(FileSystemStorage):
+    """Guarda cada archivo bajo su sha256; si ya existe, no vuelve a escribirlo."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    def _save(self, name, content):
+        huella = hashlib.sha256()
+        for bloque in content.chunks():
+            huella.update(bloque)
+        content.seek(0)
+        huella = huella.hexdigest()
+        extension = os.path.splitext(name)[1].lower() or '.bin'
+        nombre = f"{CARPETA}/{huella[:2]}/{huella}{extension}"
+        if self.exists(nombre):
+            return nombre
+        return super()._save(nombre, content)
+
+    def delete(self, name):
+        # Otro registro puede compartir el archivo: solo limpiar_medios borra
+        if not _NOMBRE_DIRECCIONADO.match(name or ''):
+            super().delete(name)
+
+
+almacen_fotos = AlmacenPorContenido()
+
+
+def referencias():
+    """Conteo de referencias por nombre de archivo, sumando todas las bases."""
+    from .models import PerfilUsuario, Platillo
+
+    conteo = {}
+    for alias in connections:
+        for modelo in (Platillo, PerfilUsuario):
+            if alias != 'default' and modelo is PerfilUsuario:
+                continue  # los perfiles solo viven en la base principal
+            filas = modelo._base_manager.using(alias).exclude(foto='').exclude(foto__isnull=True)
+            for nombre in filas.values_list('foto', flat=True).iterator():
+                conteo[nombre] = conteo.get(nombre, 0) + 1
+    return conteo
+
+
+def huerfanos(gracia=GRACIA_HUERFANOS):
+    """Archivos direccionados sin referencias y más viejos que el periodo de gracia."""
+    conteo = referencias()
+    raiz = almacen_fotos.path(CARPETA)
+    limite = time.time() - gracia
+    for directorio, _, archivos in os.walk(raiz):
+        for archivo in archivos:
+            ruta = os.path.join(directorio, archivo)
+            nombre = os.path.relpath(ruta, almacen_fotos.location).replace(os.sep, '/')
+            if nombre not in conteo and os.path.getmtime(ruta) < limite:
+                yield nombre, os.path.getsize(ruta)
+
+
+def borrar_huerfano(nombre):
+    os.remove(almacen_fotos.path(nombre))
+
+
+def migrar_existentes(aplicar=True):
+    """Pasa las fotos con nombre antiguo (platillos/, usuarios/fotos/) al almacén por
+    contenido. Devuelve [(nombre_anterior, nombre_nuevo)]; sin `aplicar` solo calcula."""
+    from django.core.files import File
+
+    from . import cache
+    from .models import PerfilUsuario, Platillo
+
+    cambios = []
+    for alias in connections:
+        for modelo in (Platillo, PerfilUsuario):
+            if alias != 'default' and modelo is PerfilUsuario:
+                continue
+            filas = (
+                modelo._base_manager.using(alias).exclude(foto='').exclude(foto__isnull=True)
+                .exclude(foto__startswith=f'{CARPETA}/').values_list('id', 'foto')
+            )
+            for pk, anterior in filas:
+                if not almacen_fotos.exists(anterior):
+                    continue
+                if not aplicar:
+                    cambios.append((anterior, None))
+                    continue
+                with almacen_fotos.open(anterior, 'rb') as archivo:
+                    nuevo = almacen_fotos.save(anterior, File(archivo))
+                modelo._base_manager.using(alias).filter(id=pk).update(foto=nuevo)
+                cambios.append((anterior, nuevo))
+
+    if aplicar and cambios:
+        # update() no dispara señales
+        cache.invalidar('menu')
+        restantes = referencias()
+        for anterior in {a for a, _ in cambios}:
+            if anterior not in restantes and almacen_fotos.exists(anterior):
+                os.remove(almacen_fotos.path(anterior))
+    return cambios
+
+
+# -------------------------
+# Servir fotos
+# -------------------------
+def _rango(encabezado, tamano):
+    """(inicio, fin) inclusivo de un Range de un solo tramo; None si se ignora, ValueError si es inválido."""
+    coincidencia = _RANGO.match(encabezado.strip())
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        return None
+    inicio, fin = coincidencia.groups()
+    if inicio == '':
+        # Sufijo: los últimos N bytes
+        largo = int(fin)
+        if not largo:
+            raise ValueError(encabezado)
+        return max(tamano - largo, 0), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        raise ValueError(encabezado)
+    return inicio, fin
+
+
+def servir_medio(request, ruta):
+    if not ruta.startswith(CARPETAS_PUBLICAS):
+        raise Http404
+    try:
+        archivo = safe_join(settings.MEDIA_ROOT, ruta)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(archivo):
+        raise Http404
+
+    estado = os.stat(archivo)
+    direccionado = _NOMBRE_DIRECCIONADO.match(ruta)
+    if direccionado:
+        etag = f'"{direccionado["huella"]}"'
+        cache_control = f"public, max-age={MAX_AGE_INMUTABLE}, immutable"
+    else:
+        etag = f'"{int(estado.st_mtime):x}-{estado.st_size:x}"'
+        cache_control = 'public, max-age=3600'
+    encabezados = {'ETag': etag, 'Cache-Control': cache_control, 'Accept-Ranges': 'bytes'}
+    content_type = mimetypes.guess_type(archivo)[0] or 'application/octet-stream'
+
+    if etag in [e.strip() for e in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        respuesta = HttpResponseNotModified()
+        for encabezado, valor in encabezados.items():
+            respuesta[encabezado] = valor
+        return respuesta
+
+    rango = None
+    if 'HTTP_RANGE' in request.META and request.META.get('HTTP_IF_RANGE', etag) == etag:
+        try:
+            rango = _rango(request.META['HTTP_RANGE'], estado.st_size)
+        except ValueError:
+            respuesta = HttpResponse(status=416)
+            respuesta['Content-Range'] = f"bytes */{estado.st_size}"
+            return respuesta
+
+    if rango is None:
+        respuesta = FileResponse(open(archivo, 'rb'), content_type=content_type)
+    else:
+        inicio, fin = rango
+        with open(archivo, 'rb') as entrada:
+            entrada.seek(inicio)
+            respuesta = HttpResponse(entrada.read(fin - inicio + 1), status=206, content_type=content_type)
+        respuesta['Content-Range'] = f"bytes {inicio}-{fin}/{estado.st_size}"
+    for encabezado, valor in encabezados.items():
+        respuesta[encabezado] = valor
+    return respuesta
@@ -0,0 +1,246 @@
+# 📥 Importación y exportación masiva del menú (CSV / XLSX)
+#
+# El archivo tiene las columnas de COLUMNAS; `id` es opcional: con id se
+# actualiza ese platillo, sin id se busca por nombre y, si no existe, se crea.
+# Todas las filas se validan en una pasada y los errores se reportan juntos; si
+# no hay ninguno, los cambios se aplican con bulk_create/bulk_update en una sola
+# transacción. En modo simulación solo se devuelve el diff.
+#
+# bulk_create/bulk_update no disparan señales: la caché del menú y la bitácora de
+# sincronización se actualizan aquí.
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.db import router, transaction
+from django.db.models import F
+
+from . import cache, sincronizacion
+from .medios import CARPETAS_PUBLICAS, almacen_fotos
+from .models import Platillo
+
+COLUMNAS = ('id', 'nombre', 'precio', 'ingredientes', 'activo', 'foto')
+
+VERDADERO = {'1', 'si', 'sí', 'true', 'verdadero', 'x', 'activo'}
+FALSO = {'0', 'no', 'false', 'falso', '', 'inactivo'}
+
+MAXIMO_FILAS = 5000
+
+_campo_precio = Platillo._meta.get_field('precio')
+PRECIO_MAXIMO = Decimal(10) ** (_campo_precio.max_digits - _campo_precio.decimal_places)
+LARGO_NOMBRE = Platillo._meta.get_field('nombre').max_length
+
+
+class ArchivoInvalido(ValueError):
+    pass
+
+
+# -------------------------
+# Exportación
+# -------------------------
+def _filas_exportacion(sucursal):
+    yield COLUMNAS
+    for platillo in Platillo.objects.de(sucursal).order_by('nombre').iterator():
+        yield (platillo.id, platillo.nombre, str(platillo.precio), platillo.ingredientes,
+               'si' if platillo.activo else 'no', platillo.foto.name if platillo.foto else '')
+
+
+def exportar_csv(sucursal):
+    salida = io.StringIO()
+    csv.writer(salida).writerows(_filas_exportacion(sucursal))
+    # BOM: Excel abre el CSV como UTF-8 sin pedir codificación
+    return ('﻿' + salida.getvalue()).encode('utf-8')
+
+
+def exportar_xlsx(sucursal):
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(title="Menú")
+    for fila in _filas_exportacion(sucursal):
+        ws.append(list(fila))
+    salida = io.BytesIO()
+    wb.save(salida)
+    return salida.getvalue()
+
+
+# -------------------------
+# Lectura
+# -------------------------
+def leer(archivo, nombre):
+    """Filas del archivo como diccionarios con las llaves de COLUMNAS, numeradas como en la hoja."""
+    if nombre.lower().endswith('.xlsx'):
+        import openpyxl
+
+        try:
+            wb = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+        except Exception as error:  # zip o XML corrupto: openpyxl no tiene una excepción común
+            raise ArchivoInvalido(f"No se pudo leer el Excel: {error}")
+        renglones = ([('' if c is None else str(c)) for c in fila] for fila in wb.worksheets[0].iter_rows(values_only=True))
+    elif nombre.lower().endswith('.csv'):
+        try:
+            texto = archivo.read().decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ArchivoInvalido("El CSV debe estar en UTF-8.")
+        renglones = csv.reader(io.StringIO(texto))
+    else:
+        raise ArchivoInvalido("Formato no soportado: usa .csv o .xlsx.")
+
+    encabezado = [c.strip().lower() for c in next(renglones, [])]
+    if 'nombre' not in encabezado or 'precio' not in encabezado:
+        raise ArchivoInvalido("El encabezado debe incluir al menos las columnas nombre y precio.")
+    desconocidas = set(encabezado) - set(COLUMNAS) - {''}
+    if desconocidas:
+        raise ArchivoInvalido(f"Columnas desconocidas: {', '.join(sorted(desconocidas))}.")
+
+    filas = []
+    for numero, valores in enumerate(renglones, start=2):
+        if not any(v.strip() for v in valores):
+            continue
+        fila = {c: v.strip() for c, v in zip(encabezado, valores) if c}
+        fila['renglon'] = numero
+        filas.append(fila)
+        if len(filas) > MAXIMO_FILAS:
+            raise ArchivoInvalido(f"El archivo pasa de {MAXIMO_FILAS} filas.")
+    return filas
+
+
+# -------------------------
+# Validación y aplicación
+# -------------------------
+def _limpiar(fila):
+    """Valores ya convertidos de una fila, o lanza ValueError con todos sus problemas."""
+    problemas, limpio = [], {}
+
+    limpio['nombre'] = fila.get('nombre', '')
+    if not limpio['nombre']:
+        problemas.append("nombre vacío")
+    elif len(limpio['nombre']) > LARGO_NOMBRE:
+        problemas.append(f"nombre de más de {LARGO_NOMBRE} caracteres")
+
+    try:
+        limpio['precio'] = Decimal(fila.get('precio', '').replace('$', '').replace(',', '')).quantize(Decimal('0.01'))
+        if not 0 <= limpio['precio'] < PRECIO_MAXIMO:
+            problemas.append(f"precio fuera de rango (0 a {PRECIO_MAXIMO - Decimal('0.01')})")
+    except InvalidOperation:
+        problemas.append(f"precio inválido: {fila.get('precio')!r}")
+
+    if 'ingredientes' in fila:
+        limpio['ingredientes'] = ', '.join(i.strip() for i in fila['ingredientes'].split(',') if i.strip())
+
+    if 'activo' in fila:
+        valor = fila['activo'].lower()
+        if valor in VERDADERO or valor in FALSO:
+            limpio['activo'] = valor in VERDADERO
+        else:
+            problemas.append(f"activo debe ser sí/no: {fila['activo']!r}")
+
+    if fila.get('foto'):
+        ruta = fila['foto'].lstrip('/')
+        if ruta.startswith('media/'):
+            ruta = ruta[len('media/'):]
+        if '..' in ruta.split('/') or not ruta.startswith(CARPETAS_PUBLICAS) or not almacen_fotos.exists(ruta):
+            problemas.append(f"foto no encontrada: {fila['foto']!r}")
+        else:
+            limpio['foto'] = ruta
+    elif 'foto' in fila:
+        limpio['foto'] = ''
+
+    if problemas:
+        raise ValueError('; '.join(problemas))
+    return limpio
+
+
+def _valor(platillo, campo):
+    valor = getattr(platillo, campo)
+    return (valor.name or '') if campo == 'foto' else valor
+
+
+def planear(sucursal, filas):
+    """Compara las filas con el menú actual. Devuelve el plan y la lista de errores."""
+    existentes = {p.id: p for p in Platillo.objects.de(sucursal)}
+    por_nombre = {p.nombre.casefold(): p for p in existentes.values()}
+    plan = {'crear': [], 'actualizar': [], 'sin_cambios': 0}
+    errores, vistos = [], {}
+
+    for fila in filas:
+        renglon = fila['renglon']
+        try:
+            limpio = _limpiar(fila)
+        except ValueError as error:
+            errores.append({'renglon': renglon, 'error': str(error)})
+            continue
+
+        platillo = None
+        if fila.get('id'):
+            platillo = existentes.get(int(fila['id'])) if fila['id'].isdigit() else None
+            if platillo is None:
+                errores.append({'renglon': renglon, 'error': f"no existe el platillo con id {fila['id']}"})
+                continue
+        else:
+            platillo = por_nombre.get(limpio['nombre'].casefold())
+
+        llave = platillo.id if platillo else limpio['nombre'].casefold()
+        if llave in vistos:
+            errores.append({'renglon': renglon, 'error': f"repite el platillo del renglón {vistos[llave]}"})
+            continue
+        vistos[llave] = renglon
+
+        if platillo is None:
+            plan['crear'].append({'renglon': renglon, **limpio})
+            continue
+        cambios = {
+            campo: (_valor(platillo, campo), valor)
+            for campo, valor in limpio.items() if _valor(platillo, campo) != valor
+        }
+        if cambios:
+            plan['actualizar'].append({'renglon': renglon, 'platillo': platillo, 'cambios': cambios})
+        else:
+            plan['sin_cambios'] += 1
+    return plan, errores
+
+
+def aplicar(sucursal, usuario, plan):
+    """Escribe el plan en una sola transacción."""
+    nuevos = []
+    for datos in plan['crear']:
+        valores = {'ingredientes': '', **datos}
+        del valores['renglon']
+        nuevos.append(Platillo(sucursal=sucursal, user=usuario, **valores))
+    modificados, campos = [], set()
+    for cambio in plan['actualizar']:
+        platillo = cambio['platillo']
+        for campo, (_, valor) in cambio['cambios'].items():
+            setattr(platillo, campo, valor)
+            campos.add(campo)
+        # bulk_update no pasa por Versionado: la versión se sube aquí
+        platillo.version = F('version') + 1
+        modificados.append(platillo)
+
+    with transaction.atomic(using=router.db_for_write(Platillo)):
+        Platillo.objects.bulk_create(nuevos, batch_size=500)
+        if modificados:
+            Platillo.objects.bulk_update(modificados, [*sorted(campos), 'version'], batch_size=500)
+        sincronizacion.registrar('platillo', [(sucursal.id, p.id) for p in nuevos + modificados])
+    if nuevos or modificados:
+        cache.invalidar('menu')
+    return {'creados': len(nuevos), 'actualizados': len(modificados)}
+
+
+def importar(sucursal, usuario, archivo, nombre, simular=True):
+    """Lee, valida y (si no hay errores y no es simulación) aplica. Devuelve el resumen."""
+    plan, errores = planear(sucursal, leer(archivo, nombre))
+    resultado = {
+        'crear': [{k: str(v) for k, v in datos.items()} for datos in plan['crear']],
+        'actualizar': [
+            {'renglon': c['renglon'], 'id': c['platillo'].id, 'nombre': c['platillo'].nombre,
+             'cambios': {campo: [str(antes), str(despues)] for campo, (antes, despues) in c['cambios'].items()}}
+            for c in plan['actualizar']
+        ],
+        'sin_cambios': plan['sin_cambios'],
+        'errores': errores,
+        'aplicado': False,
+    }
+    if not errores and not simular:
+        resultado.update(aplicar(sucursal, usuario, plan), aplicado=True)
+    return resultado
@@ -0,0 +1,183 @@
+# 📈 Métricas estilo Prometheus, sumadas entre procesos
+#
+# Cada proceso acumula en memoria y vuelca cada INTERVALO_VOLCADO segundos a
+# METRICAS_DIR/<pid>.json (escritura atómica). /metrics lee todos los archivos,
+# los suma y agrega lo que se calcula al momento (cuentas abiertas, caché).
+# Los archivos de procesos que ya murieron se conservan: sus contadores siguen
+# contando, igual que en el modo multiproceso de prometheus_client.
+import atexit
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+# Cubetas de latencia en segundos
+CUBETAS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+INTERVALO_VOLCADO = 2
+
+AYUDA = {
+    'cc_peticiones_total': ('counter', "Peticiones atendidas por vista, método y estado."),
+    'cc_peticion_segundos': ('histogram', "Latencia de las peticiones por vista."),
+    'cc_bd_consultas_total': ('counter', "Consultas SQL ejecutadas por vista."),
+    'cc_bd_segundos_total': ('counter', "Tiempo total en consultas SQL por vista."),
+    'cc_ordenes_creadas_total': ('counter', "Órdenes creadas."),
+    'cc_cuentas_cerradas_total': ('counter', "Cuentas cerradas (individuales y cierres de turno)."),
+    'cc_cuentas_abiertas': ('gauge', "Cuentas activas en este momento."),
+    'cc_cache_aciertos_total': ('counter', "Aciertos de la caché compartida por espacio."),
+    'cc_cache_fallos_total': ('counter', "Fallos de la caché compartida por espacio."),
+}
+
+_lock = threading.Lock()
+_estado = {'pid': os.getpid(), 'ultimo_volcado': time.monotonic()}
+_contadores = defaultdict(float)
+_histogramas = {}
+
+
+def _llave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+def _reiniciar_si_fork():
+    # Un hijo recién creado no debe volcar lo que acumuló su padre
+    if _estado['pid'] != os.getpid():
+        _estado['pid'] = os.getpid()
+        _contadores.clear()
+        _histogramas.clear()
+
+
+def incrementar(nombre, valor=1, **etiquetas):
+    with _lock:
+        _reiniciar_si_fork()
+        _contadores[_llave(nombre, etiquetas)] += valor
+    _volcar_si_toca()
+
+
+def observar(nombre, valor, **etiquetas):
+    with _lock:
+        _reiniciar_si_fork()
+        llave = _llave(nombre, etiquetas)
+        if llave not in _histogramas:
+            _histogramas[llave] = [0] * len(CUBETAS) + [0.0, 0]
+        histograma = _histogramas[llave]
+        for i, limite in enumerate(CUBETAS):
+            if valor <= limite:
+                histograma[i] += 1
+        histograma[-2] += valor
+        histograma[-1] += 1
+    _volcar_si_toca()
+
+
+def _volcar_si_toca():
+    if time.monotonic() - _estado['ultimo_volcado'] >= INTERVALO_VOLCADO:
+        volcar()
+
+
+def volcar():
+    """Escribe los acumulados de este proceso en su archivo."""
+    with _lock:
+        _reiniciar_si_fork()
+        _estado['ultimo_volcado'] = time.monotonic()
+        if not _contadores and not _histogramas:
+            return
+        datos = {
+            'contadores': [[n, dict(e), v] for (n, e), v in _contadores.items()],
+            'histogramas': [[n, dict(e), h] for (n, e), h in _histogramas.items()],
+        }
+    directorio = settings.METRICAS_DIR
+    os.makedirs(directorio, exist_ok=True)
+    archivo = os.path.join(directorio, f"{os.getpid()}.json")
+    with open(archivo + '.tmp', 'w') as salida:
+        json.dump(datos, salida)
+    os.replace(archivo + '.tmp', archivo)
+
+
+atexit.register(volcar)
+
+
+def _leer_todo():
+    """Suma los archivos de todos los procesos."""
+    contadores = defaultdict(float)
+    histogramas = {}
+    directorio = settings.METRICAS_DIR
+    if not os.path.isdir(directorio):
+        return contadores, histogramas
+    for archivo in os.listdir(directorio):
+        if not archivo.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directorio, archivo)) as entrada:
+                datos = json.load(entrada)
+        except (OSError, ValueError):
+            continue
+        for nombre, etiquetas, valor in datos.get('contadores', []):
+            contadores[_llave(nombre, etiquetas)] += valor
+        for nombre, etiquetas, valores in datos.get('histogramas', []):
+            llave = _llave(nombre, etiquetas)
+            acumulado = histogramas.setdefault(llave, [0] * len(valores))
+            for i, valor in enumerate(valores):
+                acumulado[i] += valor
+    return contadores, histogramas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in pares) + '}'
+
+
+def _numero(valor):
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+def _al_momento():
+    """Métricas que se calculan al consultar en lugar de acumularse."""
+    from . import cache
+    from .models import Cuenta, Sucursal
+    from .routers import usar_sucursal
+
+    medidas = {}
+    for sucursal in Sucursal.objects.filter(activa=True):
+        with usar_sucursal(sucursal):
+            abiertas = Cuenta.objects.de(sucursal).filter(activa=True).count()
+        medidas[_llave('cc_cuentas_abiertas', {'sucursal': sucursal.clave})] = abiertas
+    for espacio, datos in cache.estadisticas().items():
+        medidas[_llave('cc_cache_aciertos_total', {'espacio': espacio})] = datos['aciertos']
+        medidas[_llave('cc_cache_fallos_total', {'espacio': espacio})] = datos['fallos']
+    return medidas
+
+
+def exponer():
+    """Texto en formato de exposición de Prometheus (0.0.4)."""
+    volcar()
+    contadores, histogramas = _leer_todo()
+    contadores.update(_al_momento())
+
+    por_nombre = defaultdict(list)
+    for (nombre, etiquetas), valor in contadores.items():
+        por_nombre[nombre].append((etiquetas, valor))
+    for (nombre, etiquetas), valores in histogramas.items():
+        por_nombre[nombre].append((etiquetas, valores))
+
+    lineas = []
+    for nombre in sorted(por_nombre):
+        tipo, ayuda = AYUDA.get(nombre, ('untyped', ''))
+        lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+        for etiquetas, valor in sorted(por_nombre[nombre], key=lambda par: par[0]):
+            if tipo != 'histogram':
+                lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}")
+                continue
+            for limite, cuenta in zip(CUBETAS, valor):
+                lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, [('le', limite)])} {_numero(cuenta)}")
+            lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, [('le', '+Inf')])} {_numero(valor[-1])}")
+            lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(valor[-2])}")
+            lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {_numero(valor[-1])}")
+    return '\n'.join(lineas) + '\n'
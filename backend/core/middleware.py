@@ -0,0 +1,133 @@
+# 🧩 Middleware de la aplicación
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+
+from . import consultas_lentas, metricas, paginas, perfilador
+from .models import Sucursal
+from .routers import usar_sucursal
+
+
+def obtener_sucursal(request):
+    """Sucursal de la petición: la elegida en sesión, la del perfil o la principal."""
+    sucursal_id = request.session.get('sucursal_id')
+    if sucursal_id:
+        sucursal = Sucursal.objects.filter(id=sucursal_id, activa=True).first()
+        if sucursal:
+            return sucursal
+    perfil = getattr(request.user, 'perfilusuario', None) if request.user.is_authenticated else None
+    if perfil and perfil.sucursal_id:
+        return perfil.sucursal
+    return Sucursal.principal()
+
+
+class SucursalMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.sucursal = obtener_sucursal(request)
+        with usar_sucursal(request.sucursal):
+            return self.get_response(request)
+
+
+class PaginasEstaticasMiddleware:
+    """Sirve las páginas públicas pre-renderizadas a visitantes sin sesión.
+
+    Va antes de sesiones y autenticación: un bot en la portada no toca la base
+    de datos. Con cookie de sesión o de mensajes se usa la vista normal, que
+    puede mostrar avisos (p. ej. tras cerrar sesión).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cookies = {settings.SESSION_COOKIE_NAME, 'messages'}
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and not self.cookies.intersection(request.COOKIES):
+            respuesta = paginas.respuesta_estatica(request)
+            if respuesta is not None:
+                return respuesta
+        return self.get_response(request)
+
+
+# Tipos que sí vale la pena comprimir al vuelo
+TIPOS_COMPRIMIBLES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+class GZipTextoMiddleware(GZipMiddleware):
+    """GZip solo para texto: no recomprime imágenes ni archivos, ni toca respuestas parciales."""
+    def process_response(self, request, response):
+        if response.status_code == 206 or not response.get('Content-Type', '').startswith(TIPOS_COMPRIMIBLES):
+            return response
+        return super().process_response(request, response)
+
+
+class MetricasMiddleware:
+    """Cuenta peticiones, latencia y consultas SQL por nombre de vista."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        consultas = {'total': 0, 'segundos': 0.0}
+
+        def medir(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                consultas['total'] += 1
+                consultas['segundos'] += time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(medir))
+            respuesta = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = coincidencia.view_name if coincidencia else 'sin_ruta'
+        metricas.incrementar('cc_peticiones_total', vista=vista, metodo=request.method, estado=respuesta.status_code)
+        metricas.observar('cc_peticion_segundos', duracion, vista=vista)
+        if consultas['total']:
+            metricas.incrementar('cc_bd_consultas_total', consultas['total'], vista=vista)
+            metricas.incrementar('cc_bd_segundos_total', consultas['segundos'], vista=vista)
+        return respuesta
+
+
+class OrigenConsultasMiddleware:
+    """Anota la vista en curso para atribuirle sus consultas lentas."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        marca = consultas_lentas.origen_actual.set(request.path_info)
+        try:
+            return self.get_response(request)
+        finally:
+            consultas_lentas.origen_actual.reset(marca)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        consultas_lentas.origen_actual.set(request.resolver_match.view_name)
+
+
+class PerfiladorMiddleware:
+    """Perfila la petición si un admin lo pide con ?_perfilar= o X-Perfilar."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        modos = perfilador.modo_solicitado(request)
+        if modos is None:
+            return self.get_response(request)
+
+        from .views import rol_de
+
+        if not (request.user.is_authenticated and rol_de(request.user) == 'admin'):
+            return self.get_response(request)
+        respuesta, identificador = perfilador.perfilar(request, self.get_response, modos)
+        respuesta['X-Perfil'] = identificador
+        return respuesta
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_tarea'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ticket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('recibo', 'Recibo'), ('comanda', 'Comanda de cocina')], max_length=10)),
+                ('huella', models.CharField(max_length=64)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='core.cuenta')),
+                ('orden', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tickets', to='core.orden')),
+            ],
+            options={
+                'verbose_name': 'Ticket',
+                'verbose_name_plural': 'Tickets',
+                'ordering': ['-creado'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('tipo', 'recibo')), fields=('cuenta',), name='ticket_recibo_unico'), models.UniqueConstraint(condition=models.Q(('tipo', 'comanda')), fields=('orden',), name='ticket_comanda_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_ticket'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pago',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metodo', models.CharField(choices=[('efectivo', 'Efectivo'), ('tarjeta', 'Tarjeta'), ('transferencia', 'Transferencia')], default='efectivo', max_length=20)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('propina', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pagos', to='core.cuenta')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Pago',
+                'verbose_name_plural': 'Pagos',
+                'ordering': ['-creado'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoCaja',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('metodo', models.CharField(choices=[('efectivo', 'Efectivo'), ('tarjeta', 'Tarjeta'), ('transferencia', 'Transferencia')], max_length=20)),
+                ('saldo', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('fondo', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('ventas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('propinas', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('gastos', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('extra', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('movimientos', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Saldo de Caja',
+                'verbose_name_plural': 'Saldos de Caja',
+                'ordering': ['-fecha', 'metodo'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'metodo'), name='saldo_turno_metodo_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimientoCaja',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('metodo', models.CharField(choices=[('efectivo', 'Efectivo'), ('tarjeta', 'Tarjeta'), ('transferencia', 'Transferencia')], default='efectivo', max_length=20)),
+                ('tipo', models.CharField(choices=[('fondo', 'Fondo inicial'), ('venta', 'Venta'), ('propina', 'Propina'), ('gasto', 'Gasto'), ('extra', 'Monto extra')], max_length=10)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('saldo', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('descripcion', models.CharField(blank=True, max_length=255)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('gasto', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movimientos', to='core.gastoextra')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('pago', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='movimientos', to='core.pago')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Caja',
+                'verbose_name_plural': 'Movimientos de Caja',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['fecha', 'metodo'], name='movimiento_turno_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,173 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:28
+
+import backend.core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+MODELOS_CON_SUCURSAL = ['CorteCaja', 'Cuenta', 'GastoExtra', 'Mesa', 'MovimientoCaja', 'Platillo', 'SaldoCaja']
+
+
+def asignar_sucursal_principal(apps, schema_editor):
+    """Los datos existentes pertenecen a la sucursal principal."""
+    Sucursal = apps.get_model('core', 'Sucursal')
+    principal, _ = Sucursal.objects.get_or_create(clave='principal', defaults={'nombre': 'Principal'})
+    for nombre in MODELOS_CON_SUCURSAL:
+        apps.get_model('core', nombre).objects.filter(sucursal__isnull=True).update(sucursal=principal)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_pago_saldocaja_movimientocaja'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sucursal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('clave', models.SlugField(max_length=30, unique=True)),
+                ('base_datos', models.CharField(blank=True, max_length=50)),
+                ('activa', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Sucursal',
+                'verbose_name_plural': 'Sucursales',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='saldocaja',
+            name='saldo_turno_metodo_unico',
+        ),
+        migrations.RemoveIndex(
+            model_name='movimientocaja',
+            name='movimiento_turno_idx',
+        ),
+        migrations.AlterField(
+            model_name='cortecaja',
+            name='fecha',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='mesa',
+            name='numero',
+            field=models.PositiveIntegerField(),
+        ),
+        migrations.AddField(
+            model_name='cortecaja',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='cuenta',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='gastoextra',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='movimientocaja',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='sucursal',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='platillo',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='saldocaja',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.RunPython(asignar_sucursal_principal, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='cortecaja',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='cuenta',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='gastoextra',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='mesa',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='movimientocaja',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='platillo',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='saldocaja',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddIndex(
+            model_name='cuenta',
+            index=models.Index(fields=['sucursal', 'activa'], name='cuenta_sucursal_activa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cuenta',
+            index=models.Index(fields=['sucursal', 'cerrada'], name='cuenta_sucursal_cerrada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cuenta',
+            index=models.Index(fields=['sucursal', 'creada'], name='cuenta_sucursal_creada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gastoextra',
+            index=models.Index(fields=['sucursal', 'fecha'], name='gasto_sucursal_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientocaja',
+            index=models.Index(fields=['sucursal', 'fecha', 'metodo'], name='movimiento_turno_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='platillo',
+            index=models.Index(fields=['sucursal', 'activo', 'nombre'], name='platillo_sucursal_activo_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cortecaja',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'fecha'), name='corte_fecha_por_sucursal'),
+        ),
+        migrations.AddConstraint(
+            model_name='mesa',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'numero'), name='mesa_numero_por_sucursal'),
+        ),
+        migrations.AddConstraint(
+            model_name='saldocaja',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'fecha', 'metodo'), name='saldo_turno_metodo_unico'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:36
+
+import backend.core.medios
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_sucursal'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='perfilusuario',
+            name='foto',
+            field=models.ImageField(blank=True, null=True, storage=backend.core.medios.AlmacenPorContenido(), upload_to='usuarios/fotos/'),
+        ),
+        migrations.AlterField(
+            model_name='platillo',
+            name='foto',
+            field=models.ImageField(blank=True, null=True, storage=backend.core.medios.AlmacenPorContenido(), upload_to='platillos/'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:44
+
+import backend.core.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_fotos_por_contenido'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaAgua',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50)),
+                ('valor', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Marca de Agua',
+                'verbose_name_plural': 'Marcas de Agua',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenPreparacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('dimension', models.CharField(choices=[('platillo', 'Por platillo'), ('hora', 'Por hora'), ('cocinero', 'Por cocinero')], max_length=10)),
+                ('clave', models.IntegerField()),
+                ('ordenes', models.PositiveIntegerField(default=0)),
+                ('segundos_total', models.FloatField(default=0)),
+                ('p50', models.FloatField(blank=True, null=True)),
+                ('p90', models.FloatField(blank=True, null=True)),
+                ('p99', models.FloatField(blank=True, null=True)),
+                ('histograma', models.JSONField(default=list)),
+                ('cola_promedio', models.FloatField(blank=True, null=True)),
+                ('cola_maxima', models.PositiveIntegerField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Preparación',
+                'verbose_name_plural': 'Resúmenes de Preparación',
+                'ordering': ['-fecha', 'dimension', 'clave'],
+            },
+        ),
+        migrations.AddField(
+            model_name='orden',
+            name='iniciada_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='orden',
+            name='preparada_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ordenes_preparadas', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='orden',
+            name='servida_en',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='orden',
+            index=models.Index(fields=['actualizada'], name='orden_actualizada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orden',
+            index=models.Index(fields=['creada'], name='orden_creada_idx'),
+        ),
+        migrations.AddField(
+            model_name='marcaagua',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddField(
+            model_name='resumenpreparacion',
+            name='sucursal',
+            field=models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal'),
+        ),
+        migrations.AddConstraint(
+            model_name='marcaagua',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'nombre'), name='marca_agua_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='resumenpreparacion',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'fecha', 'dimension', 'clave'), name='resumen_preparacion_unico'),
+        ),
+    ]
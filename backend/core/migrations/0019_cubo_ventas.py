@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:45
+
+import backend.core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_analitica_preparacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CuboVentas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('hora', models.PositiveSmallIntegerField()),
+                ('dia_semana', models.PositiveSmallIntegerField()),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('importe', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('platillo', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.platillo')),
+                ('sucursal', models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal')),
+            ],
+            options={
+                'verbose_name': 'Celda del Cubo de Ventas',
+                'verbose_name_plural': 'Cubo de Ventas',
+                'ordering': ['-fecha', 'hora', 'platillo'],
+                'constraints': [models.UniqueConstraint(fields=('sucursal', 'fecha', 'hora', 'platillo'), name='cubo_ventas_celda_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_cubo_ventas'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='mesa',
+            options={'ordering': ['posicion', 'numero'], 'verbose_name': 'Mesa', 'verbose_name_plural': 'Mesas'},
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='activa',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='posicion',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='x',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='y',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='zona',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='mesa',
+            index=models.Index(fields=['sucursal', 'activa', 'posicion'], name='mesa_plano_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_baja_logica'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='perfilusuario',
+            index=models.Index(fields=['role', 'user'], name='perfil_rol_idx'),
+        ),
+        # auth_user es de django.contrib.auth: sus índices de búsqueda van en SQL.
+        # NOCASE permite que SQLite resuelva istartswith (LIKE 'abc%') con el índice.
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS usuario_username_nocase_idx ON auth_user (username COLLATE NOCASE)",
+            "DROP INDEX IF EXISTS usuario_username_nocase_idx",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS usuario_email_nocase_idx ON auth_user (email COLLATE NOCASE)",
+            "DROP INDEX IF EXISTS usuario_email_nocase_idx",
+        ),
+    ]
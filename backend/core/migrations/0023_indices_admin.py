@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_busqueda_usuarios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cuenta',
+            index=models.Index(fields=['creada'], name='cuenta_creada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gastoextra',
+            index=models.Index(fields=['fecha'], name='gasto_fecha_idx'),
+        ),
+    ]
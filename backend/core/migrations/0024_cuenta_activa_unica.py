@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:57
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fusionar_cuentas_duplicadas(apps, schema_editor):
+    """Antes de la restricción: junta en la cuenta más antigua las cuentas activas repetidas."""
+    bd = schema_editor.connection.alias
+    Cuenta = apps.get_model('core', 'Cuenta')
+    Intermedia = Cuenta.platillos.through
+    activas = Cuenta.objects.using(bd).filter(activa=True)
+    grupos = [
+        *activas.filter(mesa__isnull=False).values('mesa').annotate(n=Count('id')).filter(n__gt=1).values('mesa'),
+        *activas.filter(mesa__isnull=True).values('sucursal', 'usuario').annotate(n=Count('id')).filter(n__gt=1)
+        .values('sucursal', 'usuario'),
+    ]
+    for grupo in grupos:
+        filtro = {**grupo, 'mesa__isnull': True} if 'usuario' in grupo else grupo
+        ids = list(activas.filter(**filtro).order_by('creada', 'id').values_list('id', flat=True))
+        conservada, sobrantes = ids[0], ids[1:]
+        for nombre in ('Orden', 'Pago', 'Ticket'):
+            apps.get_model('core', nombre).objects.using(bd).filter(cuenta_id__in=sobrantes).update(cuenta_id=conservada)
+        ya = set(Intermedia.objects.using(bd).filter(cuenta_id=conservada).values_list('platillo_id', flat=True))
+        Intermedia.objects.using(bd).bulk_create(
+            [Intermedia(cuenta_id=conservada, platillo_id=p)
+             for p in set(Intermedia.objects.using(bd).filter(cuenta_id__in=sobrantes).values_list('platillo_id', flat=True)) - ya]
+        )
+        Cuenta.objects.using(bd).filter(id__in=sobrantes).delete()
+        total = Intermedia.objects.using(bd).filter(cuenta_id=conservada).aggregate(t=Sum('platillo__precio'))['t'] or 0
+        Cuenta.objects.using(bd).filter(id=conservada).update(total=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_indices_admin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fusionar_cuentas_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cuenta',
+            constraint=models.UniqueConstraint(condition=models.Q(('activa', True), ('mesa__isnull', False)), fields=('mesa',), name='cuenta_activa_por_mesa'),
+        ),
+        migrations.AddConstraint(
+            model_name='cuenta',
+            constraint=models.UniqueConstraint(condition=models.Q(('activa', True), ('mesa__isnull', True)), fields=('sucursal', 'usuario'), name='cuenta_para_llevar_por_usuario'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 15:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_cuenta_activa_unica'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cuenta',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='orden',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='platillo',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:01
+
+import backend.core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_version_optimista'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('mesa', 'Mesa'), ('platillo', 'Platillo'), ('cuenta', 'Cuenta'), ('orden', 'Orden')], max_length=10)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('borrado', models.BooleanField(default=False)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('sucursal', models.ForeignKey(default=backend.core.models.sucursal_predeterminada, on_delete=django.db.models.deletion.PROTECT, to='core.sucursal')),
+            ],
+            options={
+                'verbose_name': 'Cambio',
+                'verbose_name_plural': 'Cambios',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['sucursal', 'id'], name='cambio_cursor_idx')],
+            },
+        ),
+    ]
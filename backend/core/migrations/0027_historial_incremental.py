@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_bitacora_cambios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gastoextra',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='gastoextra',
+            index=models.Index(fields=['sucursal', 'actualizado'], name='gasto_sucursal_actualizado_idx'),
+        ),
+    ]
@@ -1,21 +1,142 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import F, Sum, Case, When, Value
+
+from .medios import almacen_fotos
+
+# 🏢 Sucursal del restaurante
+class Sucursal(models.Model):
+    CLAVE_PRINCIPAL = 'principal'
+
+    nombre = models.CharField(max_length=100)
+    clave = models.SlugField(max_length=30, unique=True)
+    # Alias en settings.DATABASES si la sucursal vive en su propio archivo SQLite
+    base_datos = models.CharField(max_length=50, blank=True)
+    activa = models.BooleanField(default=True)
+
+    def __str__(self):
+        return self.nombre
+
+    @classmethod
+    def principal(cls):
+        sucursal, _ = cls.objects.get_or_create(clave=cls.CLAVE_PRINCIPAL, defaults={'nombre': 'Principal'})
+        return sucursal
+
+    class Meta:
+        verbose_name = "Sucursal"
+        verbose_name_plural = "Sucursales"
+        ordering = ['nombre']
+
+
+def sucursal_predeterminada():
+    return Sucursal.principal().pk
+
+
+class SucursalQuerySet(models.QuerySet):
+    def de(self, sucursal):
+        """Restringe el queryset a una sucursal (instancia o id)."""
+        return self.filter(sucursal=sucursal)
+
+
+def _campo_sucursal():
+    return models.ForeignKey(Sucursal, on_delete=models.PROTECT, default=sucursal_predeterminada)
+
+
+class SinEliminadosManager(models.Manager.from_queryset(SucursalQuerySet)):
+    """Oculta los registros con baja lógica (``eliminado_en``)."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(eliminado_en__isnull=True)
+
+
+class BajaLogica(models.Model):
+    """Baja lógica: eliminar() marca la fila en lugar de borrarla con todo su historial.
+
+    ``todos`` va primero: es el administrador por omisión de Django, el que usan
+    las relaciones (cuenta.platillos, orden.platillos) y el admin, así que el
+    historial sigue viendo los registros dados de baja. ``objects`` los oculta.
+    La purga física es aparte y por lotes (`python manage.py purgar_eliminados`).
+    """
+    eliminado_en = models.DateTimeField(null=True, blank=True, editable=False)
+
+    todos = SucursalQuerySet.as_manager()
+    objects = SinEliminadosManager()
+
+    # Booleano del modelo que también se apaga al dar de baja (activo / activa)
+    campo_activo = None
+
+    class Meta:
+        abstract = True
+
+    def eliminar(self):
+        self.eliminado_en = timezone.now()
+        campos = ['eliminado_en']
+        if self.campo_activo:
+            setattr(self, self.campo_activo, False)
+            campos.append(self.campo_activo)
+        self.save(update_fields=campos)
+
+    def restaurar(self):
+        self.eliminado_en = None
+        self.save(update_fields=['eliminado_en'])
+
+
+class ConflictoVersion(Exception):
+    """Otro dispositivo guardó el registro después de que este lo leyó.
+
+    ``actual`` trae los valores vigentes en la base para que el cliente combine.
+    """
+
+    def __init__(self, instancia, version, actual):
+        self.instancia = instancia
+        self.version = version
+        self.actual = actual
+        super().__init__(f"{instancia._meta.verbose_name} #{instancia.pk} cambió (versión {actual['version']}, se esperaba {version}).")
+
+
+class Versionado(models.Model):
+    """Concurrencia optimista: cada save() es ``UPDATE ... WHERE version = n`` y suma 1.
+
+    Si la versión ya no coincide (otra tableta o la cocina guardó primero) lanza
+    ConflictoVersion en lugar de pisar la fila. Para validar contra la versión que
+    vio el cliente, asígnala a ``version`` antes de guardar. Los UPDATE en bloque
+    deben sumar F('version') + 1 por su cuenta.
+    """
+    version = models.PositiveIntegerField(default=1, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        esperada = int(self.version)
+        campo = self._meta.get_field('version')
+        values = [v for v in values if v[0] is not campo] + [(campo, None, esperada + 1)]
+        if super()._do_update(base_qs.filter(version=esperada), using, pk_val, values, update_fields, forced_update):
+            self.version = esperada + 1
+            return True
+        actual = base_qs.filter(pk=pk_val).values().first()
+        if actual is None:
+            return False  # la fila no existe: Django sigue con su camino normal
+        raise ConflictoVersion(self, esperada, actual)
+
 
 # 🍽️ Platillo del menú
-class Platillo(models.Model):
+class Platillo(BajaLogica, Versionado):
+    sucursal = _campo_sucursal()
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
+        on_delete=models.PROTECT,
         related_name='platillos'
     )
     nombre = models.CharField(max_length=100)
     ingredientes = models.TextField()
     precio = models.DecimalField(max_digits=6, decimal_places=2)
     activo = models.BooleanField(default=True)
-    foto = models.ImageField(upload_to='platillos/', blank=True, null=True)
+    foto = models.ImageField(upload_to='platillos/', blank=True, null=True, storage=almacen_fotos)
+
+    campo_activo = 'activo'
 
     def __str__(self):
         return f"{self.nombre} — ${self.precio:.2f} ({self.user.username})"
@@ -28,6 +149,9 @@ class Platillo(models.Model):
         verbose_name = "Platillo"
         verbose_name_plural = "Platillos"
         ordering = ['nombre']
+        indexes = [
+            models.Index(fields=['sucursal', 'activo', 'nombre'], name='platillo_sucursal_activo_idx'),
+        ]
 
 
 # 👤 Perfil extendido del usuario
@@ -39,7 +163,8 @@ class PerfilUsuario(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.CharField(max_length=10, choices=ROLES, default='employee')
-    foto = models.ImageField(upload_to='usuarios/fotos/', blank=True, null=True)
+    foto = models.ImageField(upload_to='usuarios/fotos/', blank=True, null=True, storage=almacen_fotos)
+    sucursal = models.ForeignKey(Sucursal, on_delete=models.SET_NULL, null=True, blank=True)
 
     def __str__(self):
         return f"{self.user.username} — {self.get_role_display()}"
@@ -47,12 +172,26 @@ class PerfilUsuario(models.Model):
     class Meta:
         verbose_name = "Perfil de Usuario"
         verbose_name_plural = "Perfiles de Usuario"
+        indexes = [
+            # Filtro por rol del centro de usuarios
+            models.Index(fields=['role', 'user'], name='perfil_rol_idx'),
+        ]
 
 
 # 🪑 Mesa del restaurante
-class Mesa(models.Model):
-    numero = models.PositiveIntegerField(unique=True)
+class Mesa(BajaLogica):
+    sucursal = _campo_sucursal()
+    numero = models.PositiveIntegerField()
     color = models.CharField(max_length=20, blank=True, null=True)
+    # Una mesa desactivada sale del plano pero conserva sus cuentas
+    activa = models.BooleanField(default=True)
+    # Plano del piso: orden de presentación, zona y celda (columna x, fila y) dentro de la zona
+    posicion = models.PositiveIntegerField(default=0)
+    zona = models.CharField(max_length=50, blank=True)
+    x = models.PositiveSmallIntegerField(null=True, blank=True)
+    y = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    campo_activo = 'activa'
 
     def __str__(self):
         return f"Mesa {self.numero}"
@@ -60,19 +199,105 @@ class Mesa(models.Model):
     class Meta:
         verbose_name = "Mesa"
         verbose_name_plural = "Mesas"
-        ordering = ['numero']
+        ordering = ['posicion', 'numero']
+        indexes = [
+            models.Index(fields=['sucursal', 'activa', 'posicion'], name='mesa_plano_idx'),
+        ]
+        constraints = [
+            # Un número dado de baja se puede volver a usar
+            models.UniqueConstraint(
+                fields=['sucursal', 'numero'],
+                condition=models.Q(eliminado_en__isnull=True),
+                name='mesa_numero_por_sucursal',
+            ),
+        ]
+
+
+def _acumular_en_cubo(cuenta_ids):
+    # Importación diferida: cubo.py importa estos modelos
+    from .cubo import acumular
+
+    acumular(cuenta_ids)
+
+
+def _anotar_cambios(modelo, pares):
+    # Importación diferida, igual que _acumular_en_cubo
+    from .sincronizacion import registrar
+
+    registrar(modelo, pares)
+
+
+class CuentaQuerySet(SucursalQuerySet):
+    # Cuentas por UPDATE; mantiene el número de parámetros bajo el límite de SQLite
+    LOTE_CIERRE = 400
+
+    def cerrar(self):
+        """Cierra en bloque las cuentas activas del queryset.
+
+        Calcula todos los totales con un solo agregado agrupado y los escribe,
+        junto con ``activa`` y ``cerrada``, en un UPDATE por lote dentro de una
+        sola transacción. Devuelve los ids cerrados.
+        """
+        ahora = timezone.now()
+        with transaction.atomic(using=self.db):
+            pares = list(self.filter(activa=True).values_list('sucursal_id', 'id'))
+            ids = [i for _, i in pares]
+            totales = dict(
+                Cuenta.platillos.through.objects.filter(cuenta_id__in=ids)
+                .values('cuenta_id')
+                .annotate(total=Sum('platillo__precio'))
+                .values_list('cuenta_id', 'total')
+            )
+            for inicio in range(0, len(ids), self.LOTE_CIERRE):
+                lote = ids[inicio:inicio + self.LOTE_CIERRE]
+                casos = [When(id=cuenta_id, then=Value(totales[cuenta_id])) for cuenta_id in lote if cuenta_id in totales]
+                total = Case(*casos, default=Value(0), output_field=models.DecimalField(max_digits=8, decimal_places=2)) if casos else 0
+                self.model.objects.filter(id__in=lote).update(activa=False, cerrada=ahora, total=total, version=F('version') + 1)
+            _acumular_en_cubo(ids)
+            _anotar_cambios('cuenta', pares)
+        return ids
+
+    # Intentos de abrir la cuenta antes de rendirse; cada choque significa que otra
+    # petición la acaba de abrir, así que el siguiente intento la encuentra
+    INTENTOS_APERTURA = 3
+
+    def abierta(self, sucursal, mesa, usuario):
+        """Cuenta activa de la mesa (o la cuenta para llevar del usuario), creándola si no hay.
+
+        Las restricciones únicas parciales garantizan una sola cuenta activa; si dos
+        peticiones la crean a la vez, la que pierde recibe IntegrityError y lee la otra.
+        Devuelve (cuenta, creada).
+        """
+        filtro = {'sucursal': sucursal, 'mesa': mesa, 'activa': True}
+        if mesa is None:
+            filtro['usuario'] = usuario
+        for intento in range(self.INTENTOS_APERTURA):
+            cuenta = self.filter(**filtro).first()
+            if cuenta:
+                return cuenta, False
+            try:
+                # Punto de guardado: el choque no invalida la transacción de quien llama
+                with transaction.atomic(using=self.db):
+                    return self.create(sucursal=sucursal, mesa=mesa, usuario=usuario), True
+            except IntegrityError:
+                if intento == self.INTENTOS_APERTURA - 1:
+                    raise
 
 
 # 💳 Cuenta activa (puede o no tener mesa)
-class Cuenta(models.Model):
-    mesa = models.ForeignKey(Mesa, on_delete=models.CASCADE, null=True, blank=True)
-    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+class Cuenta(Versionado):
+    sucursal = _campo_sucursal()
+    # PROTECT: las mesas y los usuarios se dan de baja, no se borran con su historial
+    mesa = models.ForeignKey(Mesa, on_delete=models.PROTECT, null=True, blank=True)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT)
     platillos = models.ManyToManyField(Platillo, blank=True)
     total = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     activa = models.BooleanField(default=True)
     creada = models.DateTimeField(auto_now_add=True)
     cerrada = models.DateTimeField(null=True, blank=True)
 
+    objects = CuentaQuerySet.as_manager()
+
     def __str__(self):
         mesa_info = f"Mesa {self.mesa.numero}" if self.mesa else "Para llevar"
         return f"Cuenta #{self.id} — {mesa_info} — ${self.total:.2f}"
@@ -81,20 +306,50 @@ class Cuenta(models.Model):
         self.total = self.platillos.aggregate(total=Sum('precio'))['total'] or 0
         self.save(update_fields=['total'])
 
-    def cerrar(self):
+    def agregar_orden(self, usuario, platillos):
+        """Crea la orden con sus platillos y actualiza el total de la cuenta."""
+        orden = Orden.objects.create(cuenta=self, usuario=usuario)
+        orden.platillos.set(platillos)
+        self.platillos.add(*platillos)
         self.calcular_total()
+        return orden
+
+    def cerrar(self):
+        self.total = self.platillos.aggregate(total=Sum('precio'))['total'] or 0
         self.activa = False
         self.cerrada = timezone.now()
-        self.save(update_fields=['activa', 'total', 'cerrada'])
+        with transaction.atomic(using=self._state.db):
+            self.save(update_fields=['activa', 'total', 'cerrada'])
+            _acumular_en_cubo([self.id])
 
     class Meta:
         verbose_name = "Cuenta"
         verbose_name_plural = "Cuentas"
         ordering = ['-creada']
+        indexes = [
+            models.Index(fields=['sucursal', 'activa'], name='cuenta_sucursal_activa_idx'),
+            models.Index(fields=['sucursal', 'cerrada'], name='cuenta_sucursal_cerrada_idx'),
+            models.Index(fields=['sucursal', 'creada'], name='cuenta_sucursal_creada_idx'),
+            # Jerarquía de fechas del admin (sin filtrar por sucursal)
+            models.Index(fields=['creada'], name='cuenta_creada_idx'),
+        ]
+        constraints = [
+            # Una sola cuenta abierta por mesa, y una para llevar por usuario
+            models.UniqueConstraint(
+                fields=['mesa'],
+                condition=models.Q(activa=True, mesa__isnull=False),
+                name='cuenta_activa_por_mesa',
+            ),
+            models.UniqueConstraint(
+                fields=['sucursal', 'usuario'],
+                condition=models.Q(activa=True, mesa__isnull=True),
+                name='cuenta_para_llevar_por_usuario',
+            ),
+        ]
 
 
 # 🧾 Orden dentro de una cuenta
-class Orden(models.Model):
+class Orden(Versionado):
     ESTADOS = [
         ('pendiente', 'Pendiente'),
         ('en_proceso', 'En proceso'),
@@ -109,6 +364,12 @@ class Orden(models.Model):
     nota = models.TextField(blank=True, null=True)
     creada = models.DateTimeField(auto_now_add=True)
     actualizada = models.DateTimeField(auto_now=True)
+    # Marcas de cocina para medir tiempos de preparación
+    iniciada_en = models.DateTimeField(null=True, blank=True)
+    servida_en = models.DateTimeField(null=True, blank=True)
+    preparada_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='ordenes_preparadas'
+    )
 
     def __str__(self):
         return f"Orden #{self.id} — Cuenta #{self.cuenta.id} — {self.get_estado_display()}"
@@ -117,18 +378,44 @@ class Orden(models.Model):
     def total(self):
         return self.platillos.aggregate(total=Sum('precio'))['total'] or 0
 
+    def cambiar_estado(self, estado, usuario=None):
+        """Mueve la orden de estado registrando cuándo empezó y terminó la cocina."""
+        ahora = timezone.now()
+        self.estado = estado
+        campos = ['estado', 'actualizada']
+        if estado == 'en_proceso' and not self.iniciada_en:
+            self.iniciada_en = ahora
+            self.preparada_por = usuario
+            campos += ['iniciada_en', 'preparada_por']
+        elif estado == 'servida' and not self.servida_en:
+            self.servida_en = ahora
+            campos.append('servida_en')
+            if not self.preparada_por_id:
+                self.preparada_por = usuario
+                campos.append('preparada_por')
+        self.save(update_fields=campos)
+
     class Meta:
         verbose_name = "Orden"
         verbose_name_plural = "Órdenes"
         ordering = ['-creada']
+        indexes = [
+            models.Index(fields=['actualizada'], name='orden_actualizada_idx'),
+            models.Index(fields=['creada'], name='orden_creada_idx'),
+        ]
 
 
 # 💸 Gasto extra del día
 class GastoExtra(models.Model):
+    sucursal = _campo_sucursal()
     fecha = models.DateField()
     monto = models.DecimalField(max_digits=10, decimal_places=2)
     descripcion = models.CharField(max_length=255)
     creado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    # Para la exportación incremental del historial
+    actualizado = models.DateTimeField(auto_now=True)
+
+    objects = SucursalQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.fecha} — ${self.monto:.2f} — {self.descripcion}"
@@ -137,11 +424,17 @@ class GastoExtra(models.Model):
         verbose_name = "Gasto Extra"
         verbose_name_plural = "Gastos Extras"
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['sucursal', 'fecha'], name='gasto_sucursal_fecha_idx'),
+            models.Index(fields=['fecha'], name='gasto_fecha_idx'),
+            models.Index(fields=['sucursal', 'actualizado'], name='gasto_sucursal_actualizado_idx'),
+        ]
 
 
 # 📊 Corte de caja diario
 class CorteCaja(models.Model):
-    fecha = models.DateField(unique=True)
+    sucursal = _campo_sucursal()
+    fecha = models.DateField()
     efectivo_inicial = models.DecimalField(max_digits=10, decimal_places=2)
     ventas_totales = models.DecimalField(max_digits=10, decimal_places=2)
     gastos_totales = models.DecimalField(max_digits=10, decimal_places=2)
@@ -149,10 +442,303 @@ class CorteCaja(models.Model):
     dinero_en_caja = models.DecimalField(max_digits=10, decimal_places=2)
     creado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
 
+    objects = SucursalQuerySet.as_manager()
+
     def __str__(self):
         return f"Corte {self.fecha} — ${self.dinero_en_caja:.2f}"
 
     class Meta:
         verbose_name = "Corte de Caja"
         verbose_name_plural = "Cortes de Caja"
-        ordering = ['-fecha']
\ No newline at end of file
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['sucursal', 'fecha'], name='corte_fecha_por_sucursal'),
+        ]
+
+# ⏳ Tarea en segundo plano (cola respaldada por la base de datos)
+class Tarea(models.Model):
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    ]
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    prioridad = models.SmallIntegerField(default=0)
+    clave = models.CharField(max_length=200, blank=True, null=True)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=3)
+    disponible_en = models.DateTimeField(default=timezone.now)
+    archivo = models.FileField(upload_to='tareas/', blank=True, null=True)
+    resultado = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    trabajador = models.CharField(max_length=100, blank=True)
+    solicitada_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    creada = models.DateTimeField(auto_now_add=True)
+    iniciada = models.DateTimeField(null=True, blank=True)
+    terminada = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Tarea #{self.id} — {self.tipo} — {self.get_estado_display()}"
+
+    @property
+    def terminal(self):
+        return self.estado in ('completada', 'fallida')
+
+    class Meta:
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        ordering = ['-creada']
+        indexes = [
+            models.Index(fields=['estado', '-prioridad', 'disponible_en'], name='tarea_cola_idx'),
+        ]
+        constraints = [
+            # Solo una tarea viva por clave: deduplica encolados repetidos
+            models.UniqueConstraint(
+                fields=['clave'],
+                condition=models.Q(estado__in=['pendiente', 'en_proceso']),
+                name='tarea_clave_viva_unica',
+            ),
+        ]
+
+
+# 🧾 Recibo o comanda pre-renderizada (archivo direccionado por contenido)
+class Ticket(models.Model):
+    TIPOS = [
+        ('recibo', 'Recibo'),
+        ('comanda', 'Comanda de cocina'),
+    ]
+
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    cuenta = models.ForeignKey(Cuenta, on_delete=models.CASCADE, related_name='tickets')
+    orden = models.ForeignKey(Orden, on_delete=models.CASCADE, null=True, blank=True, related_name='tickets')
+    huella = models.CharField(max_length=64)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} — Cuenta #{self.cuenta_id} — {self.huella[:12]}"
+
+    def ruta(self, extension='txt'):
+        return f"tickets/{self.huella[:2]}/{self.huella}.{extension}"
+
+    class Meta:
+        verbose_name = "Ticket"
+        verbose_name_plural = "Tickets"
+        ordering = ['-creado']
+        constraints = [
+            models.UniqueConstraint(fields=['cuenta'], condition=models.Q(tipo='recibo'), name='ticket_recibo_unico'),
+            models.UniqueConstraint(fields=['orden'], condition=models.Q(tipo='comanda'), name='ticket_comanda_unica'),
+        ]
+
+
+METODOS_PAGO = [
+    ('efectivo', 'Efectivo'),
+    ('tarjeta', 'Tarjeta'),
+    ('transferencia', 'Transferencia'),
+]
+
+
+# 💵 Pago de una cuenta (una cuenta dividida tiene varios pagos)
+class Pago(models.Model):
+    cuenta = models.ForeignKey(Cuenta, on_delete=models.PROTECT, related_name='pagos')
+    metodo = models.CharField(max_length=20, choices=METODOS_PAGO, default='efectivo')
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    propina = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pago #{self.id} — Cuenta #{self.cuenta_id} — {self.get_metodo_display()} ${self.monto:.2f}"
+
+    class Meta:
+        verbose_name = "Pago"
+        verbose_name_plural = "Pagos"
+        ordering = ['-creado']
+
+
+class BitacoraInmutableError(Exception):
+    pass
+
+
+# 📒 Movimiento de caja: bitácora de solo inserción con saldo acumulado
+class MovimientoCaja(models.Model):
+    TIPOS = [
+        ('fondo', 'Fondo inicial'),
+        ('venta', 'Venta'),
+        ('propina', 'Propina'),
+        ('gasto', 'Gasto'),
+        ('extra', 'Monto extra'),
+    ]
+
+    sucursal = _campo_sucursal()
+    fecha = models.DateField()
+    metodo = models.CharField(max_length=20, choices=METODOS_PAGO, default='efectivo')
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    monto = models.DecimalField(max_digits=10, decimal_places=2)
+    saldo = models.DecimalField(max_digits=12, decimal_places=2)
+    descripcion = models.CharField(max_length=255, blank=True)
+    pago = models.ForeignKey(Pago, on_delete=models.PROTECT, null=True, blank=True, related_name='movimientos')
+    gasto = models.ForeignKey(GastoExtra, on_delete=models.PROTECT, null=True, blank=True, related_name='movimientos')
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.fecha} — {self.get_tipo_display()} {self.monto:+.2f} ({self.metodo}) → ${self.saldo:.2f}"
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise BitacoraInmutableError("Los movimientos de caja no se modifican; registra un ajuste.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise BitacoraInmutableError("Los movimientos de caja no se eliminan; registra un ajuste.")
+
+    class Meta:
+        verbose_name = "Movimiento de Caja"
+        verbose_name_plural = "Movimientos de Caja"
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['sucursal', 'fecha', 'metodo'], name='movimiento_turno_idx'),
+        ]
+
+
+# 💰 Saldo acumulado por turno y método de pago (se actualiza en cada movimiento)
+class SaldoCaja(models.Model):
+    sucursal = _campo_sucursal()
+    fecha = models.DateField()
+    metodo = models.CharField(max_length=20, choices=METODOS_PAGO)
+    saldo = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    fondo = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    ventas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    propinas = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    gastos = models.DecimalField(max_digits=12, decimal_places=2, default=0)  # negativo
+    extra = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    movimientos = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.fecha} — {self.get_metodo_display()} — ${self.saldo:.2f}"
+
+    class Meta:
+        verbose_name = "Saldo de Caja"
+        verbose_name_plural = "Saldos de Caja"
+        ordering = ['-fecha', 'metodo']
+        constraints = [
+            models.UniqueConstraint(fields=['sucursal', 'fecha', 'metodo'], name='saldo_turno_metodo_unico'),
+        ]
+
+
+# ⏱️ Resumen diario de tiempos de preparación (lo llena analitica.py)
+class ResumenPreparacion(models.Model):
+    DIMENSIONES = [
+        ('platillo', 'Por platillo'),
+        ('hora', 'Por hora'),
+        ('cocinero', 'Por cocinero'),
+    ]
+
+    sucursal = _campo_sucursal()
+    fecha = models.DateField()
+    dimension = models.CharField(max_length=10, choices=DIMENSIONES)
+    # Id del platillo, hora del día (0-23) o id del cocinero
+    clave = models.IntegerField()
+    ordenes = models.PositiveIntegerField(default=0)
+    segundos_total = models.FloatField(default=0)
+    p50 = models.FloatField(null=True, blank=True)
+    p90 = models.FloatField(null=True, blank=True)
+    p99 = models.FloatField(null=True, blank=True)
+    # Conteos por cubeta de analitica.CUBETAS: permite percentiles de rangos de días
+    histograma = models.JSONField(default=list)
+    # Solo en la dimensión 'hora': órdenes en espera (muestreo por minuto)
+    cola_promedio = models.FloatField(null=True, blank=True)
+    cola_maxima = models.PositiveIntegerField(null=True, blank=True)
+
+    objects = SucursalQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.fecha} — {self.get_dimension_display()} {self.clave} — {self.ordenes} órdenes"
+
+    class Meta:
+        verbose_name = "Resumen de Preparación"
+        verbose_name_plural = "Resúmenes de Preparación"
+        ordering = ['-fecha', 'dimension', 'clave']
+        constraints = [
+            models.UniqueConstraint(fields=['sucursal', 'fecha', 'dimension', 'clave'], name='resumen_preparacion_unico'),
+        ]
+
+
+# 🔖 Hasta dónde se procesó un resumen incremental
+class MarcaAgua(models.Model):
+    sucursal = _campo_sucursal()
+    nombre = models.CharField(max_length=50)
+    valor = models.DateTimeField()
+
+    objects = SucursalQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.nombre} — {self.valor:%Y-%m-%d %H:%M:%S}"
+
+    class Meta:
+        verbose_name = "Marca de Agua"
+        verbose_name_plural = "Marcas de Agua"
+        constraints = [
+            models.UniqueConstraint(fields=['sucursal', 'nombre'], name='marca_agua_unica'),
+        ]
+
+
+# 🧊 Celda del cubo de ventas: unidades e importe por día, hora y platillo (lo llena cubo.py)
+class CuboVentas(models.Model):
+    sucursal = _campo_sucursal()
+    fecha = models.DateField()
+    hora = models.PositiveSmallIntegerField()
+    # 1 = lunes … 7 = domingo (isoweekday), guardado para agrupar sin calcularlo
+    dia_semana = models.PositiveSmallIntegerField()
+    # Sin llave foránea real: el historial sobrevive a que se borre el platillo
+    platillo = models.ForeignKey(Platillo, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    cantidad = models.PositiveIntegerField(default=0)
+    importe = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    objects = SucursalQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.fecha} {self.hora:02d}h — platillo {self.platillo_id} — {self.cantidad} (${self.importe:.2f})"
+
+    class Meta:
+        verbose_name = "Celda del Cubo de Ventas"
+        verbose_name_plural = "Cubo de Ventas"
+        ordering = ['-fecha', 'hora', 'platillo']
+        constraints = [
+            models.UniqueConstraint(fields=['sucursal', 'fecha', 'hora', 'platillo'], name='cubo_ventas_celda_unica'),
+        ]
+
+
+# 📡 Bitácora de cambios para la sincronización incremental de las tabletas (sincronizacion.py)
+class Cambio(models.Model):
+    MODELOS = [
+        ('mesa', 'Mesa'),
+        ('platillo', 'Platillo'),
+        ('cuenta', 'Cuenta'),
+        ('orden', 'Orden'),
+    ]
+
+    # El id (AUTOINCREMENT, nunca se reutiliza) es el cursor de los clientes
+    sucursal = _campo_sucursal()
+    modelo = models.CharField(max_length=10, choices=MODELOS)
+    objeto_id = models.PositiveIntegerField()
+    borrado = models.BooleanField(default=False)
+    creado = models.DateTimeField(auto_now_add=True)
+
+    objects = SucursalQuerySet.as_manager()
+
+    def __str__(self):
+        return f"#{self.id} {self.modelo} {self.objeto_id}{' (borrado)' if self.borrado else ''}"
+
+    class Meta:
+        verbose_name = "Cambio"
+        verbose_name_plural = "Cambios"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['sucursal', 'id'], name='cambio_cursor_idx'),
+        ]
@@ -0,0 +1,132 @@
+# 🌐 Páginas públicas pre-renderizadas
+#
+# `python manage.py generar_paginas` renderiza una vez las páginas públicas a
+# HTML estático (más sus variantes .gz y .br) en PAGINAS_ESTATICAS_ROOT junto
+# con un manifiesto de huellas. PaginasEstaticasMiddleware las sirve desde
+# memoria a visitantes sin sesión, antes de sesiones, autenticación y base de
+# datos. El directorio también puede servirse directo desde nginx (gzip_static).
+import gzip
+import hashlib
+import json
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+# Nombre de la ruta -> plantilla
+PAGINAS_PUBLICAS = {
+    'bienvenida': 'bienvenido.html',
+    'acerca_de_nosotros': 'paginas_bienvenido/acerca_de_nosotros.html',
+    'ayuda': 'paginas_bienvenido/ayuda.html',
+    'politicas': 'paginas_bienvenido/politicas.html',
+    'contacto': 'paginas_bienvenido/contactanos.html',
+}
+
+MANIFIESTO = 'manifiesto.json'
+
+# Codificación HTTP -> extensión del archivo precomprimido, en orden de preferencia
+CODIFICACIONES = (('br', '.br'), ('gzip', '.gz'))
+
+_cargado = {'mtime': None, 'paginas': {}}
+
+
+def directorio():
+    return settings.PAGINAS_ESTATICAS_ROOT
+
+
+def construir():
+    """Renderiza las páginas públicas a disco y escribe el manifiesto. Devuelve el manifiesto."""
+    os.makedirs(directorio(), exist_ok=True)
+    manifiesto = {}
+    for nombre, plantilla in PAGINAS_PUBLICAS.items():
+        contenido = render_to_string(plantilla).encode('utf-8')
+        archivo = f"{nombre}.html"
+        variantes = {'': contenido, '.gz': gzip.compress(contenido, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variantes['.br'] = brotli.compress(contenido, quality=11)
+        for extension, datos in variantes.items():
+            with open(os.path.join(directorio(), archivo + extension), 'wb') as salida:
+                salida.write(datos)
+        manifiesto[reverse(nombre)] = {
+            'archivo': archivo,
+            'huella': hashlib.sha256(contenido).hexdigest()[:32],
+            'variantes': sorted(v for v in variantes if v),
+        }
+
+    # Se escribe al final y de forma atómica: los procesos leen un manifiesto completo
+    temporal = os.path.join(directorio(), MANIFIESTO + '.tmp')
+    with open(temporal, 'w') as salida:
+        json.dump(manifiesto, salida, indent=2)
+    os.replace(temporal, os.path.join(directorio(), MANIFIESTO))
+    return manifiesto
+
+
+def _paginas():
+    """Páginas en memoria; se recargan si el manifiesto cambió en disco."""
+    ruta = os.path.join(directorio(), MANIFIESTO)
+    try:
+        mtime = os.stat(ruta).st_mtime
+    except OSError:
+        return {}
+    if mtime != _cargado['mtime']:
+        paginas = {}
+        with open(ruta) as entrada:
+            manifiesto = json.load(entrada)
+        for url, datos in manifiesto.items():
+            base = os.path.join(directorio(), datos['archivo'])
+            cuerpos = {}
+            for extension in [''] + datos['variantes']:
+                with open(base + extension, 'rb') as entrada:
+                    cuerpos[extension] = entrada.read()
+            paginas[url] = (datos['huella'], cuerpos)
+        _cargado.update(mtime=mtime, paginas=paginas)
+    return _cargado['paginas']
+
+
+def codificaciones_aceptadas(request):
+    """Codificaciones aceptadas por el cliente (ignora las de q=0)."""
+    aceptadas = set()
+    for parte in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        codificacion, _, parametros = parte.strip().partition(';')
+        if parametros.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        aceptadas.add(codificacion.strip().lower())
+    return aceptadas
+
+
+def respuesta_estatica(request):
+    """Respuesta pre-renderizada para la ruta pedida, o None si no la hay."""
+    pagina = _paginas().get(request.path_info)
+    if pagina is None:
+        return None
+    huella, cuerpos = pagina
+
+    aceptadas = codificaciones_aceptadas(request)
+    codificacion, extension = next(
+        ((c, e) for c, e in CODIFICACIONES if c in aceptadas and e in cuerpos), (None, '')
+    )
+    # ETag fuerte distinto por representación
+    etag = f'"{huella}{extension.replace(".", "-")}"'
+    encabezados = {
+        'ETag': etag,
+        'Cache-Control': f"public, max-age={settings.PAGINAS_ESTATICAS_MAX_AGE}, stale-while-revalidate=86400",
+        'Vary': 'Accept-Encoding, Cookie',
+    }
+
+    if etag in [e.strip() for e in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        respuesta = HttpResponse(status=304)
+    else:
+        respuesta = HttpResponse(cuerpos[extension], content_type='text/html; charset=utf-8')
+        respuesta['Content-Length'] = len(cuerpos[extension])
+        if codificacion:
+            respuesta['Content-Encoding'] = codificacion
+    for encabezado, valor in encabezados.items():
+        respuesta[encabezado] = valor
+    return respuesta
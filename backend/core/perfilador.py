@@ -0,0 +1,148 @@
+# 🔬 Perfilado bajo demanda de una sola petición
+#
+# Un admin agrega `?_perfilar=1` (o el encabezado `X-Perfilar: 1`) a cualquier
+# URL y esa petición se perfila: cProfile (.pstats, para pstats/snakeviz) y
+# muestreo de la pila cada INTERVALO_MUESTREO (.collapsed, para flamegraph.pl o
+# speedscope). Con `cprofile` o `muestreo` en lugar de `1` se captura solo uno.
+# Las capturas quedan en default_storage bajo perfiles/ y se listan y descargan
+# desde ajustes/perfiles/. Sin la marca, el middleware no hace nada más que
+# revisar el query string y un encabezado.
+import cProfile
+import json
+import marshal
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+CARPETA = 'perfiles'
+MODOS = {'1': ('cprofile', 'muestreo'), 'cprofile': ('cprofile',), 'muestreo': ('muestreo',)}
+FORMATOS = {'pstats': 'application/octet-stream', 'collapsed': 'text/plain; charset=utf-8'}
+
+INTERVALO_MUESTREO = 0.005
+
+# Capturas que se conservan; las más viejas se borran
+MAXIMO_CAPTURAS = 50
+
+ID_VALIDO = re.compile(r'^\d{8}T\d{6}-[0-9a-f]{6}$')
+
+
+class Muestreador(threading.Thread):
+    """Toma la pila de un hilo cada cierto intervalo y cuenta pilas idénticas."""
+
+    def __init__(self, hilo, intervalo=INTERVALO_MUESTREO):
+        super().__init__(daemon=True)
+        self.hilo = hilo
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._alto = threading.Event()
+
+    def run(self):
+        raiz = str(settings.BASE_DIR)
+        while not self._alto.wait(self.intervalo):
+            marco = sys._current_frames().get(self.hilo)
+            cuadros = []
+            while marco is not None:
+                codigo = marco.f_code
+                archivo = codigo.co_filename
+                archivo = os.path.relpath(archivo, raiz) if archivo.startswith(raiz) else os.path.basename(archivo)
+                cuadros.append(f"{archivo}:{codigo.co_qualname}".replace(' ', '_').replace(';', ','))
+                marco = marco.f_back
+            if cuadros:
+                self.pilas[';'.join(reversed(cuadros))] += 1
+
+    def detener(self):
+        self._alto.set()
+        self.join()
+
+    def colapsado(self):
+        return ''.join(f"{pila} {cuenta}\n" for pila, cuenta in self.pilas.most_common())
+
+
+def modo_solicitado(request):
+    """Modo pedido por query string o encabezado, o None (camino rápido)."""
+    valor = request.META.get('HTTP_X_PERFILAR')
+    if valor is None and '_perfilar=' in request.META.get('QUERY_STRING', ''):
+        valor = request.GET.get('_perfilar')
+    return MODOS.get(valor) if valor else None
+
+
+def perfilar(request, get_response, modos):
+    """Atiende la petición perfilándola y guarda la captura. Devuelve (respuesta, id)."""
+    perfil = cProfile.Profile() if 'cprofile' in modos else None
+    muestreador = Muestreador(threading.get_ident()) if 'muestreo' in modos else None
+
+    inicio = time.perf_counter()
+    if muestreador:
+        muestreador.start()
+    if perfil:
+        perfil.enable()
+    try:
+        respuesta = get_response(request)
+    finally:
+        if perfil:
+            perfil.disable()
+        if muestreador:
+            muestreador.detener()
+    duracion = time.perf_counter() - inicio
+
+    identificador = f"{timezone.now():%Y%m%dT%H%M%S}-{os.urandom(3).hex()}"
+    coincidencia = getattr(request, 'resolver_match', None)
+    metadatos = {
+        'id': identificador,
+        'vista': coincidencia.view_name if coincidencia else None,
+        'ruta': request.get_full_path(),
+        'metodo': request.method,
+        'estado': respuesta.status_code,
+        'segundos': round(duracion, 4),
+        'usuario': request.user.username,
+        'momento': timezone.now().isoformat(),
+        'formatos': [],
+    }
+    if perfil:
+        # Mismo formato que Profile.dump_stats(), que solo sabe escribir a una ruta local
+        perfil.create_stats()
+        default_storage.save(f"{CARPETA}/{identificador}.pstats", ContentFile(marshal.dumps(perfil.stats)))
+        metadatos['formatos'].append('pstats')
+    if muestreador:
+        default_storage.save(f"{CARPETA}/{identificador}.collapsed", ContentFile(muestreador.colapsado().encode()))
+        metadatos['formatos'].append('collapsed')
+        metadatos['muestras'] = sum(muestreador.pilas.values())
+    default_storage.save(f"{CARPETA}/{identificador}.json", ContentFile(json.dumps(metadatos).encode()))
+    _recortar()
+    return respuesta, identificador
+
+
+def capturas():
+    """Metadatos de las capturas guardadas, de la más reciente a la más vieja."""
+    if not default_storage.exists(CARPETA):
+        return []
+    _, archivos = default_storage.listdir(CARPETA)
+    resultado = []
+    for nombre in (a for a in archivos if a.endswith('.json')):
+        with default_storage.open(f"{CARPETA}/{nombre}") as entrada:
+            resultado.append(json.load(entrada))
+    return sorted(resultado, key=lambda captura: captura['momento'], reverse=True)
+
+
+def ruta_captura(identificador, formato):
+    if not ID_VALIDO.match(identificador) or formato not in FORMATOS:
+        return None
+    ruta = f"{CARPETA}/{identificador}.{formato}"
+    return ruta if default_storage.exists(ruta) else None
+
+
+def _recortar():
+    _, archivos = default_storage.listdir(CARPETA)
+    identificadores = sorted({a.rsplit('.', 1)[0] for a in archivos}, reverse=True)
+    for viejo in identificadores[MAXIMO_CAPTURAS:]:
+        for extension in ('json', *FORMATOS):
+            if default_storage.exists(f"{CARPETA}/{viejo}.{extension}"):
+                default_storage.delete(f"{CARPETA}/{viejo}.{extension}")
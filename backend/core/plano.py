@@ -0,0 +1,155 @@
+# 🪑 Mesas en bloque y plano del piso
+#
+# Crear un rango, reordenar y (des)activar mesas son una transacción cada uno,
+# con bulk_create / bulk_update / update en lugar de una petición por mesa.
+# Esas operaciones no disparan señales, así que invalidan la caché 'mesas' y
+# anotan la bitácora de sincronización aquí.
+#
+# plano_de() arma en un solo documento todas las mesas activas agrupadas por
+# zona (con su celda x/y si se acomodaron) y lo guarda en la caché 'mesas': la
+# pantalla de mesas y el endpoint JSON salen de ese mismo valor.
+import hashlib
+import json
+
+from django.db import router, transaction
+from django.db.models import Max
+
+from . import cache, sincronizacion
+from .models import Mesa
+
+# Mesas por operación en bloque
+MAXIMO_MESAS = 500
+
+LARGO_ZONA = Mesa._meta.get_field('zona').max_length
+LARGO_COLOR = Mesa._meta.get_field('color').max_length
+
+
+class PlanoInvalido(ValueError):
+    pass
+
+
+def _numeros(valores):
+    try:
+        numeros = [int(n) for n in valores]
+    except (TypeError, ValueError):
+        raise PlanoInvalido("Los números de mesa deben ser enteros.")
+    if any(n <= 0 for n in numeros) or len(set(numeros)) != len(numeros):
+        raise PlanoInvalido("Los números de mesa deben ser positivos y sin repetir.")
+    if len(numeros) > MAXIMO_MESAS:
+        raise PlanoInvalido(f"Máximo {MAXIMO_MESAS} mesas por operación.")
+    return numeros
+
+
+def _anotar(sucursal, ids):
+    sincronizacion.registrar('mesa', [(sucursal.id, i) for i in ids])
+
+
+def crear_rango(sucursal, desde, hasta, colores=(), zona=''):
+    """Crea las mesas desde..hasta (colores en ciclo); reactiva las que estaban desactivadas.
+
+    Devuelve {'creadas': [...], 'reactivadas': [...], 'existentes': [...]}.
+    """
+    try:
+        desde, hasta = int(desde), int(hasta)
+    except (TypeError, ValueError):
+        raise PlanoInvalido("El rango de mesas debe ser de números enteros.")
+    if not 0 <= hasta - desde < MAXIMO_MESAS:
+        raise PlanoInvalido(f"El rango debe tener entre 1 y {MAXIMO_MESAS} mesas.")
+    numeros = _numeros(range(desde, hasta + 1))
+    colores = [c for c in colores if c] or [None]
+    if any(c and len(c) > LARGO_COLOR for c in colores) or len(zona) > LARGO_ZONA:
+        raise PlanoInvalido("Color o zona demasiado largos.")
+
+    with transaction.atomic(using=router.db_for_write(Mesa)):
+        existentes = dict(Mesa.objects.de(sucursal).filter(numero__in=numeros).values_list('numero', 'activa'))
+        reactivar = [n for n, activa in existentes.items() if not activa]
+        siguiente = (Mesa.objects.de(sucursal).aggregate(ultima=Max('posicion'))['ultima'] or 0) + 1
+        nuevas = [
+            Mesa(sucursal=sucursal, numero=numero, color=colores[i % len(colores)], zona=zona, posicion=siguiente + i)
+            for i, numero in enumerate(n for n in numeros if n not in existentes)
+        ]
+        Mesa.objects.bulk_create(nuevas)
+        if reactivar:
+            Mesa.objects.de(sucursal).filter(numero__in=reactivar).update(activa=True)
+        _anotar(sucursal, [m.id for m in nuevas] + list(
+            Mesa.objects.de(sucursal).filter(numero__in=reactivar).values_list('id', flat=True)
+        ))
+    cache.invalidar('mesas')
+    return {
+        'creadas': [m.numero for m in nuevas],
+        'reactivadas': sorted(reactivar),
+        'existentes': sorted(n for n, activa in existentes.items() if activa),
+    }
+
+
+def reordenar(sucursal, numeros):
+    """Asigna `posicion` según el orden de la lista; las que no vienen quedan al final."""
+    numeros = _numeros(numeros)
+    with transaction.atomic(using=router.db_for_write(Mesa)):
+        mesas = {m.numero: m for m in Mesa.objects.de(sucursal).filter(activa=True)}
+        faltantes = [n for n in numeros if n not in mesas]
+        if faltantes:
+            raise PlanoInvalido(f"No existen las mesas {', '.join(map(str, faltantes))}.")
+        pedidas = set(numeros)
+        resto = sorted((m for n, m in mesas.items() if n not in pedidas), key=lambda m: (m.posicion, m.numero))
+        ordenadas = [mesas[n] for n in numeros] + resto
+        for posicion, mesa in enumerate(ordenadas, start=1):
+            mesa.posicion = posicion
+        Mesa.objects.bulk_update(ordenadas, ['posicion'], batch_size=500)
+        _anotar(sucursal, [m.id for m in ordenadas])
+    cache.invalidar('mesas')
+    return len(ordenadas)
+
+
+def cambiar_activas(sucursal, numeros, activa):
+    """(Des)activa mesas sin tocar sus cuentas. Devuelve cuántas cambiaron."""
+    numeros = _numeros(numeros)
+    with transaction.atomic(using=router.db_for_write(Mesa)):
+        afectadas = Mesa.objects.de(sucursal).filter(numero__in=numeros).exclude(activa=activa)
+        ids = list(afectadas.values_list('id', flat=True))
+        cambiadas = afectadas.update(activa=activa)
+        _anotar(sucursal, ids)
+    cache.invalidar('mesas')
+    return cambiadas
+
+
+def guardar_plano(sucursal, acomodo):
+    """Guarda zona y celda de cada mesa: [{'numero', 'zona', 'x', 'y'}, ...]."""
+    numeros = _numeros([m.get('numero') for m in acomodo])
+    with transaction.atomic(using=router.db_for_write(Mesa)):
+        mesas = {m.numero: m for m in Mesa.objects.de(sucursal).filter(numero__in=numeros)}
+        faltantes = [n for n in numeros if n not in mesas]
+        if faltantes:
+            raise PlanoInvalido(f"No existen las mesas {', '.join(map(str, faltantes))}.")
+        for numero, datos in zip(numeros, acomodo):
+            mesa = mesas[numero]
+            mesa.zona = str(datos.get('zona') or '')[:LARGO_ZONA]
+            try:
+                mesa.x = int(datos['x']) if datos.get('x') is not None else None
+                mesa.y = int(datos['y']) if datos.get('y') is not None else None
+            except (TypeError, ValueError):
+                raise PlanoInvalido(f"Celda inválida para la mesa {numero}.")
+            if (mesa.x is not None and not 1 <= mesa.x <= 100) or (mesa.y is not None and not 1 <= mesa.y <= 100):
+                raise PlanoInvalido(f"Celda fuera del plano para la mesa {numero}.")
+        Mesa.objects.bulk_update(mesas.values(), ['zona', 'x', 'y'], batch_size=500)
+        _anotar(sucursal, [m.id for m in mesas.values()])
+    cache.invalidar('mesas')
+    return len(mesas)
+
+
+def _armar(sucursal):
+    zonas = {}
+    for mesa in Mesa.objects.de(sucursal).filter(activa=True).order_by('posicion', 'numero'):
+        zonas.setdefault(mesa.zona, []).append({
+            'id': mesa.id, 'numero': mesa.numero, 'color': mesa.color or '', 'x': mesa.x, 'y': mesa.y,
+        })
+    plano = {'zonas': [{'nombre': nombre, 'mesas': mesas} for nombre, mesas in zonas.items()]}
+    # Documento serializado una sola vez: la vista JSON lo envía tal cual
+    plano['json'] = json.dumps(plano, separators=(',', ':'), ensure_ascii=False)
+    plano['etag'] = hashlib.sha256(plano['json'].encode()).hexdigest()[:16]
+    return plano
+
+
+def plano_de(sucursal):
+    """Plano del piso (mesas activas por zona) desde la caché 'mesas'."""
+    return cache.obtener('mesas', ['plano', sucursal.id], lambda: _armar(sucursal))
@@ -0,0 +1,98 @@
+# 🧹 Purga física de registros dados de baja
+#
+# Las bajas normales son lógicas (BajaLogica.eliminar(), User.is_active). Cuando
+# de verdad hay que borrar (espacio, limpieza de datos), esta purga lo hace
+# fuera de las peticiones y por lotes pequeños, cada uno en su propia
+# transacción corta para no retener el candado de escritura de SQLite:
+#   - platillos y mesas dados de baja hace más de `dias` días; las cuentas de
+#     una mesa purgada quedan sin mesa (conservan total, pagos y órdenes)
+#   - usuarios inactivos sin cuentas ni platillos en ninguna base (PROTECT)
+#   - la bitácora de sincronización (Cambio) de más de DIAS_CAMBIOS días
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import sincronizacion
+from .models import Cambio, Cuenta, Mesa, Platillo
+
+LOTE = 200
+
+# La bitácora de sincronización solo sirve a tabletas que sondean cada pocos
+# segundos; la que se quede atrás más que esto pide la foto completa otra vez
+DIAS_CAMBIOS = 7
+
+# Respiro entre lotes para que las escrituras de la operación no esperen
+PAUSA = 0.05
+
+
+def _por_lotes(consulta, accion, lote, simular):
+    """Aplica `accion(ids)` a lotes de ids de la consulta hasta agotarla. Devuelve cuántos procesó."""
+    if simular:
+        return consulta.count()
+    total = 0
+    while True:
+        ids = list(consulta.values_list('id', flat=True)[:lote])
+        if not ids:
+            return total
+        with transaction.atomic(using=router.db_for_write(consulta.model)):
+            accion(ids)
+        total += len(ids)
+        time.sleep(PAUSA)
+
+
+def _sin_mesa(sucursal, ids):
+    Cuenta.objects.filter(id__in=ids).update(mesa=None, version=F('version') + 1)
+    sincronizacion.registrar('cuenta', [(sucursal.id, i) for i in ids])
+
+
+def purgar_sucursal(sucursal, dias, lote=LOTE, simular=False):
+    """Purga platillos y mesas de una sucursal dados de baja antes del límite."""
+    limite = timezone.now() - timedelta(days=dias)
+    resultado = {}
+
+    mesas = Mesa.todos.de(sucursal).filter(eliminado_en__lt=limite)
+    resultado['cuentas_sin_mesa'] = _por_lotes(
+        Cuenta.objects.filter(mesa__in=mesas.values('id')),
+        lambda ids: _sin_mesa(sucursal, ids),
+        lote, simular,
+    )
+    resultado['mesas'] = _por_lotes(mesas, lambda ids: Mesa.todos.filter(id__in=ids).delete(), lote, simular)
+
+    # Borra también sus renglones en orden↔platillo y cuenta↔platillo; los totales ya están guardados
+    resultado['platillos'] = _por_lotes(
+        Platillo.todos.de(sucursal).filter(eliminado_en__lt=limite),
+        lambda ids: Platillo.todos.filter(id__in=ids).delete(),
+        lote, simular,
+    )
+
+    resultado['cambios'] = _por_lotes(
+        Cambio.objects.de(sucursal).filter(creado__lt=timezone.now() - timedelta(days=DIAS_CAMBIOS)),
+        lambda ids: Cambio.objects.filter(id__in=ids).delete(),
+        lote, simular,
+    )
+    return resultado
+
+
+def purgar_usuarios(dias, lote=LOTE, simular=False):
+    """Borra usuarios inactivos (sin acceso en `dias` días) que nada referencia en ninguna base."""
+    limite = timezone.now() - timedelta(days=dias)
+    candidatos = set(
+        User.objects.filter(is_active=False, is_superuser=False)
+        .exclude(last_login__gte=limite).exclude(date_joined__gte=limite)
+        .values_list('id', flat=True)
+    )
+    for alias in connections:
+        if not candidatos:
+            break
+        for modelo, campo in ((Cuenta, 'usuario_id'), (Platillo, 'user_id')):
+            referidos = modelo._base_manager.using(alias).filter(**{f"{campo}__in": candidatos})
+            candidatos -= set(referidos.values_list(campo, flat=True).distinct())
+    return _por_lotes(
+        User.objects.filter(id__in=candidatos),
+        lambda ids: User.objects.filter(id__in=ids).delete(),
+        lote, simular,
+    )
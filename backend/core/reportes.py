@@ -0,0 +1,158 @@
+# 📊 Reportes de corte de caja
+from datetime import datetime, time as hora_del_dia, timedelta
+from io import BytesIO
+
+from django.db import router, transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from . import cache, metricas
+from .models import Cuenta, GastoExtra, CorteCaja, Orden
+
+
+def totales_del_dia(sucursal, fecha):
+    """Devuelve (ventas_totales, gastos_totales) de un día en una sucursal."""
+    def calcular():
+        ventas = Cuenta.objects.de(sucursal).filter(cerrada__date=fecha).aggregate(total=Sum('total'))['total'] or 0
+        gastos = GastoExtra.objects.de(sucursal).filter(fecha=fecha).aggregate(total=Sum('monto'))['total'] or 0
+        return ventas, gastos
+    return cache.obtener('corte', [getattr(sucursal, 'pk', sucursal), fecha.isoformat()], calcular)
+
+
+def recalcular_corte(sucursal, fecha):
+    """Actualiza un corte ya guardado: fotografía de la bitácora de caja o, en días
+    anteriores a ella, recálculo con las cuentas y gastos del día."""
+    from .caja import snapshot_corte
+
+    corte = CorteCaja.objects.de(sucursal).filter(fecha=fecha).first()
+    if not corte:
+        return None
+    fotografia = snapshot_corte(sucursal, fecha)
+    if fotografia is not None:
+        return fotografia
+
+    ventas, gastos = totales_del_dia(sucursal, fecha)
+    corte.ventas_totales = ventas
+    corte.gastos_totales = gastos
+    corte.dinero_en_caja = corte.efectivo_inicial + ventas - gastos + corte.monto_extra
+    corte.save(update_fields=['ventas_totales', 'gastos_totales', 'dinero_en_caja'])
+    return corte
+
+
+def cerrar_turno(sucursal):
+    """Cierre de fin de turno: cierra todas las cuentas activas de la sucursal y
+    actualiza el corte del día.
+
+    Los recibos se encolan para generarse fuera de la petición.
+    """
+    from . import tareas
+    from .caja import saldar_cuentas
+
+    with transaction.atomic(using=router.db_for_write(Cuenta)):
+        ids = Cuenta.objects.de(sucursal).filter(activa=True).cerrar()
+        if ids:
+            cache.invalidar('corte')
+            metricas.incrementar('cc_cuentas_cerradas_total', len(ids), sucursal=sucursal.clave)
+            saldar_cuentas(sucursal, ids)
+            recalcular_corte(sucursal, timezone.localdate())
+    for cuenta_id in ids:
+        tareas.encolar('generar_recibo', {'cuenta_id': cuenta_id}, prioridad=8, clave=f"recibo:{cuenta_id}")
+    return ids
+
+
+def actividad_de_usuarios(sucursal, usuario_ids):
+    """Cuentas abiertas, órdenes de hoy y ventas de la semana de cada usuario de la página.
+
+    Dos consultas agrupadas sin importar cuántos usuarios sean: {usuario_id: {...}}.
+    """
+    hoy = timezone.localdate()
+    inicio_dia = timezone.make_aware(datetime.combine(hoy, hora_del_dia.min))
+    inicio_semana = inicio_dia - timedelta(days=hoy.weekday())
+    actividad = {i: {'cuentas_abiertas': 0, 'ordenes_hoy': 0, 'ventas_semana': 0} for i in usuario_ids}
+
+    cuentas = (
+        Cuenta.objects.de(sucursal).filter(usuario_id__in=usuario_ids)
+        .filter(Q(activa=True) | Q(cerrada__gte=inicio_semana))
+        .values('usuario_id')
+        .annotate(abiertas=Count('id', filter=Q(activa=True)),
+                  ventas=Sum('total', filter=Q(activa=False, cerrada__gte=inicio_semana)))
+        .order_by()
+    )
+    for fila in cuentas:
+        actividad[fila['usuario_id']].update(cuentas_abiertas=fila['abiertas'], ventas_semana=fila['ventas'] or 0)
+
+    ordenes = (
+        Orden.objects.filter(cuenta__sucursal=sucursal, usuario_id__in=usuario_ids, creada__gte=inicio_dia)
+        .values('usuario_id').annotate(n=Count('id')).order_by()
+    )
+    for fila in ordenes:
+        actividad[fila['usuario_id']]['ordenes_hoy'] = fila['n']
+    return actividad
+
+
+def construir_corte_excel(sucursal, fecha_inicio, fecha_fin=None):
+    """Arma el libro de Excel del corte para un día o un rango y devuelve sus bytes."""
+    # Importación diferida: openpyxl es pesado y solo lo usan las exportaciones
+    import openpyxl
+
+    fecha_fin = fecha_fin or fecha_inicio
+
+    cortes = {c.fecha: c for c in CorteCaja.objects.de(sucursal).filter(fecha__range=(fecha_inicio, fecha_fin))}
+    gastos = GastoExtra.objects.de(sucursal).filter(fecha__range=(fecha_inicio, fecha_fin)).order_by('fecha')
+    cuentas = (
+        Cuenta.objects.de(sucursal).filter(cerrada__date__range=(fecha_inicio, fecha_fin))
+        .select_related('mesa')
+        .order_by('cerrada')
+    )
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Corte de Caja"
+
+    # Encabezados
+    ws.append(["Fecha", "Efectivo Inicial", "Ventas Totales", "Gastos Totales", "Monto Extra", "Dinero en Caja"])
+    fechas = sorted(cortes) if fecha_inicio != fecha_fin else [fecha_inicio]
+    for fecha in fechas:
+        corte = cortes.get(fecha)
+        if corte:
+            ws.append([
+                corte.fecha.strftime("%d/%m/%Y"),
+                float(corte.efectivo_inicial),
+                float(corte.ventas_totales),
+                float(corte.gastos_totales),
+                float(corte.monto_extra),
+                float(corte.dinero_en_caja)
+            ])
+        else:
+            ws.append([fecha.strftime("%d/%m/%Y"), "", "", "", "", ""])
+
+    # Detalle de gastos
+    ws_gastos = wb.create_sheet(title="Gastos")
+    ws_gastos.append(["Fecha", "Descripción", "Monto"])
+    for gasto in gastos.iterator():
+        ws_gastos.append([
+            gasto.fecha.strftime("%d/%m/%Y"),
+            gasto.descripcion,
+            float(gasto.monto)
+        ])
+
+    # Detalle de cuentas
+    ws_cuentas = wb.create_sheet(title="Cuentas Cerradas")
+    ws_cuentas.append(["Mesa", "Total", "Fecha de cierre"])
+    for cuenta in cuentas.iterator(chunk_size=500):
+        mesa = cuenta.mesa.numero if cuenta.mesa else "Para llevar"
+        ws_cuentas.append([
+            mesa,
+            float(cuenta.total),
+            cuenta.cerrada.strftime("%d/%m/%Y %H:%M")
+        ])
+
+    salida = BytesIO()
+    wb.save(salida)
+    return salida.getvalue()
+
+
+def nombre_archivo_corte(fecha_inicio, fecha_fin=None):
+    if fecha_fin and fecha_fin != fecha_inicio:
+        return f"Corte_{fecha_inicio.strftime('%Y%m%d')}_{fecha_fin.strftime('%Y%m%d')}.xlsx"
+    return f"Corte_{fecha_inicio.strftime('%Y%m%d')}.xlsx"
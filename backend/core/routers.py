@@ -0,0 +1,62 @@
+# 🏢 Enrutamiento por sucursal
+#
+# Opcional: si settings.SUCURSALES_BD define archivos por sucursal, los datos de
+# operación (mesas, cuentas, órdenes, menú, caja) de cada sucursal viven en su
+# propio SQLite y los reportes de una no bloquean las escrituras de otra.
+# Usuarios, sucursales y la cola de tareas quedan en 'default'; las bases de
+# sucursal guardan una réplica de usuarios y sucursales para sus llaves foráneas
+# (`python manage.py sincronizar_sucursal`).
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_bd_sucursal = ContextVar('bd_sucursal', default=None)
+
+# Modelos de core que siempre viven en 'default'
+MODELOS_COMPARTIDOS = {'sucursal', 'perfilusuario', 'tarea'}
+
+
+def bd_de(sucursal):
+    """Alias de base de datos de una sucursal, o None si usa 'default'."""
+    alias = getattr(sucursal, 'base_datos', '') or None
+    return alias if alias in settings.DATABASES else None
+
+
+def bd_actual():
+    return _bd_sucursal.get()
+
+
+@contextmanager
+def usar_bd(alias):
+    token = _bd_sucursal.set(alias)
+    try:
+        yield
+    finally:
+        _bd_sucursal.reset(token)
+
+
+def usar_sucursal(sucursal):
+    return usar_bd(bd_de(sucursal))
+
+
+class SucursalRouter:
+    def _enrutable(self, model):
+        return model._meta.app_label == 'core' and model._meta.model_name not in MODELOS_COMPARTIDOS
+
+    def db_for_read(self, model, **hints):
+        if not self._enrutable(model):
+            return None
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db:
+            return instancia._state.db
+        return _bd_sucursal.get()
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Todas las bases reciben el esquema completo (réplicas para las llaves foráneas)
+        return True
@@ -0,0 +1,86 @@
+# 📡 Señales de modelos
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import cache, metricas, sincronizacion
+from .models import Cuenta, CorteCaja, GastoExtra, Mesa, Orden, PerfilUsuario, Platillo
+
+
+@receiver(post_save, sender=GastoExtra)
+def registrar_gasto_en_caja(sender, instance, created, **kwargs):
+    """Todo gasto nuevo sale del efectivo de su turno."""
+    if created:
+        from .caja import registrar_movimiento
+
+        registrar_movimiento(instance.sucursal, 'gasto', -instance.monto, 'efectivo', instance.fecha, instance.creado_por,
+                             descripcion=instance.descripcion[:255], gasto=instance)
+
+
+# -------------------------
+# Invalidación de caché
+# -------------------------
+@receiver([post_save, post_delete], sender=Platillo)
+def invalidar_menu(sender, **kwargs):
+    cache.invalidar('menu')
+
+
+@receiver([post_save, post_delete], sender=Mesa)
+def invalidar_mesas(sender, **kwargs):
+    cache.invalidar('mesas')
+
+
+@receiver([post_save, post_delete], sender=PerfilUsuario)
+def invalidar_roles(sender, **kwargs):
+    cache.invalidar('roles')
+
+
+@receiver([post_save, post_delete], sender=Cuenta)
+def invalidar_corte_por_cuenta(sender, instance, **kwargs):
+    # Solo las cuentas cerradas cuentan para el corte
+    if instance.cerrada:
+        cache.invalidar('corte')
+
+
+@receiver([post_save, post_delete], sender=GastoExtra)
+@receiver([post_save, post_delete], sender=CorteCaja)
+def invalidar_corte(sender, **kwargs):
+    cache.invalidar('corte')
+
+
+# -------------------------
+# Métricas de negocio
+# -------------------------
+@receiver(post_save, sender=Orden)
+def contar_orden(sender, instance, created, **kwargs):
+    if created:
+        metricas.incrementar('cc_ordenes_creadas_total', sucursal=instance.cuenta.sucursal.clave)
+
+
+@receiver(post_save, sender=Cuenta)
+def contar_cuenta_cerrada(sender, instance, update_fields=None, **kwargs):
+    # Cuenta.cerrar() guarda solo estos campos; el cierre en bloque se cuenta en cerrar_turno
+    if update_fields and 'activa' in update_fields and not instance.activa:
+        metricas.incrementar('cc_cuentas_cerradas_total', sucursal=instance.sucursal.clave)
+
+
+# -------------------------
+# Bitácora de sincronización
+# -------------------------
+@receiver(post_save, sender=Mesa)
+@receiver(post_save, sender=Platillo)
+@receiver(post_save, sender=Cuenta)
+def anotar_cambio(sender, instance, **kwargs):
+    sincronizacion.registrar(sender._meta.model_name, [(instance.sucursal_id, instance.pk)])
+
+
+@receiver(post_delete, sender=Mesa)
+@receiver(post_delete, sender=Platillo)
+@receiver(post_delete, sender=Cuenta)
+def anotar_borrado(sender, instance, **kwargs):
+    sincronizacion.registrar(sender._meta.model_name, [(instance.sucursal_id, instance.pk)], borrado=True)
+
+
+# Las órdenes se borran con su cuenta: el borrado de la cuenta basta para el cliente
+@receiver(post_save, sender=Orden)
+def anotar_cambio_orden(sender, instance, **kwargs):
+    sincronizacion.registrar('orden', [(instance.cuenta.sucursal_id, instance.pk)])
@@ -0,0 +1,119 @@
+# 📡 Sincronización incremental para las tabletas ("cambios desde el cursor")
+#
+# Cada alta, cambio o borrado de Mesa, Platillo, Cuenta u Orden deja un renglón
+# en Cambio dentro de la misma transacción: por señales (signals.py) o, en las
+# operaciones en bloque que no las disparan, con registrar() explícito. El id de
+# Cambio es el cursor. Las escrituras de SQLite son de una en una (transacciones
+# IMMEDIATE), así que un id mayor nunca se confirma antes que uno menor y el
+# cliente no se salta cambios.
+#
+# La bitácora solo guarda qué cambió; los valores se leen al responder, así que
+# varios cambios de la misma fila viajan una sola vez y siempre con su estado final.
+#
+# Protocolo:
+#   GET sync/            → foto completa + cursor
+#   GET sync/?cursor=N   → solo lo cambiado después de N (con piso quieto: vacío)
+# La consulta pide id >= N: si el renglón N ya no existe (se purgó la bitácora)
+# la respuesta trae "reiniciar" y el cliente vuelve a pedir la foto completa.
+from django.db.models import Max
+
+from .models import Cambio, Cuenta, Mesa, Orden, Platillo
+
+# Campos que viajan, en orden: cada fila es una lista con estos valores
+CAMPOS = {
+    'mesa': ('id', 'numero', 'color', 'zona', 'x', 'y', 'posicion', 'activa'),
+    'platillo': ('id', 'nombre', 'precio', 'ingredientes', 'activo', 'foto', 'version'),
+    'cuenta': ('id', 'mesa_id', 'usuario_id', 'total', 'activa', 'creada', 'cerrada', 'version'),
+    'orden': ('id', 'cuenta_id', 'estado', 'nota', 'creada', 'version'),
+}
+
+# Las de baja lógica se leen con `todos` para poder avisar que se eliminaron
+CONSULTAS = {
+    'mesa': lambda: Mesa.todos.all(),
+    'platillo': lambda: Platillo.todos.all(),
+    'cuenta': lambda: Cuenta.objects.all(),
+    'orden': lambda: Orden.objects.all(),
+}
+
+# Cambios por respuesta; si hay más, el cliente vuelve a pedir con el nuevo cursor
+LIMITE = 500
+
+
+def registrar(modelo, pares, borrado=False):
+    """Anota en la bitácora los objetos cambiados: pares (sucursal_id, objeto_id)."""
+    cambios = [Cambio(sucursal_id=s, modelo=modelo, objeto_id=i, borrado=borrado) for s, i in pares]
+    if cambios:
+        Cambio.objects.bulk_create(cambios, batch_size=500)
+
+
+def _tabla(modelo, consulta):
+    campos = CAMPOS[modelo]
+    filas, borrados = [], []
+    columnas = campos + (('eliminado_en',) if modelo in ('mesa', 'platillo') else ())
+    for valores in consulta.values_list(*columnas):
+        if len(valores) > len(campos) and valores[-1] is not None:
+            borrados.append(valores[0])
+        else:
+            filas.append(list(valores[:len(campos)]))
+    tabla = {'campos': list(campos), 'filas': filas}
+    if modelo == 'orden':
+        # Platillos de cada orden en una sola consulta a la tabla intermedia
+        platillos = {}
+        for orden_id, platillo_id in Orden.platillos.through.objects.filter(
+            orden_id__in=[f[0] for f in filas]
+        ).values_list('orden_id', 'platillo_id'):
+            platillos.setdefault(orden_id, []).append(platillo_id)
+        tabla['campos'].append('platillos')
+        for fila in filas:
+            fila.append(platillos.get(fila[0], []))
+    return tabla, borrados
+
+
+def instantanea(sucursal):
+    """Estado completo del piso: mesas, menú, cuentas abiertas y sus órdenes, con el cursor actual."""
+    # El cursor se toma antes de leer: lo que cambie mientras tanto se vuelve a mandar
+    cursor = Cambio.objects.de(sucursal).aggregate(ultimo=Max('id'))['ultimo'] or 0
+    consultas = {
+        'mesa': Mesa.objects.de(sucursal),
+        'platillo': Platillo.objects.de(sucursal),
+        'cuenta': Cuenta.objects.de(sucursal).filter(activa=True),
+        'orden': Orden.objects.filter(cuenta__sucursal=sucursal, cuenta__activa=True),
+    }
+    return {'cursor': cursor, 'completo': True,
+            'cambios': {modelo: _tabla(modelo, consulta)[0] for modelo, consulta in consultas.items()}}
+
+
+def cambios_desde(sucursal, cursor, limite=LIMITE):
+    """Lo que cambió después del cursor. Con el piso quieto es una sola consulta por índice."""
+    renglones = list(
+        Cambio.objects.de(sucursal).filter(id__gte=cursor).order_by('id')
+        .values_list('id', 'modelo', 'objeto_id', 'borrado')[:limite + 1]
+    )
+    if cursor:
+        if not renglones or renglones[0][0] != cursor:
+            return {'cursor': cursor, 'reiniciar': True}
+        renglones = renglones[1:]
+    if not renglones:
+        return {'cursor': cursor}
+
+    mas = len(renglones) > limite
+    renglones = renglones[:limite]
+    # Último estado de cada objeto: un borrado posterior gana a los guardados previos
+    ultimos = {}
+    for _, modelo, objeto_id, borrado in renglones:
+        ultimos[(modelo, objeto_id)] = borrado
+
+    respuesta = {'cursor': renglones[-1][0], 'mas': mas, 'cambios': {}, 'borrados': {}}
+    for modelo in CAMPOS:
+        ids = [i for (m, i), borrado in ultimos.items() if m == modelo and not borrado]
+        borrados = [i for (m, i), borrado in ultimos.items() if m == modelo and borrado]
+        if ids:
+            tabla, dados_de_baja = _tabla(modelo, CONSULTAS[modelo]().filter(id__in=ids))
+            # Los que ya no existen (borrados después en otra transacción) se reportan como borrados
+            presentes = {f[0] for f in tabla['filas']} | set(dados_de_baja)
+            borrados += dados_de_baja + [i for i in ids if i not in presentes]
+            if tabla['filas']:
+                respuesta['cambios'][modelo] = tabla
+        if borrados:
+            respuesta['borrados'][modelo] = sorted(set(borrados))
+    return respuesta
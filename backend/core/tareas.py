@@ -0,0 +1,333 @@
+# ⏳ Cola de tareas en segundo plano respaldada por la base de datos
+#
+# No requiere broker: las tareas viven en la tabla Tarea y un trabajador
+# (`python manage.py procesar_tareas`) las reclama con un UPDATE condicional.
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile, File
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .consultas_lentas import origen_actual
+from .models import Tarea
+from .routers import bd_actual, usar_bd
+
+logger = logging.getLogger(__name__)
+
+# Registro tipo -> función
+_REGISTRO = {}
+
+# Tiempo tras el cual una tarea 'en_proceso' se considera abandonada
+TIEMPO_MAXIMO_EJECUCION = timedelta(minutes=15)
+
+
+def tarea(tipo):
+    """Registra una función como manejador de un tipo de tarea.
+
+    El manejador recibe el diccionario de parámetros y puede devolver
+    ``None``, un diccionario (se guarda en ``resultado``) o un ``File``
+    (``ContentFile`` o un archivo temporal) con nombre (se guarda en ``archivo``
+    para su descarga).
+    """
+    def decorador(func):
+        _REGISTRO[tipo] = func
+        return func
+    return decorador
+
+
+def tipos_registrados():
+    return sorted(_REGISTRO)
+
+
+def encolar(tipo, parametros=None, prioridad=0, clave=None, usuario=None, max_intentos=3, disponible_en=None):
+    """Crea una tarea pendiente; si ya hay una viva con la misma clave, la reutiliza."""
+    if tipo not in _REGISTRO:
+        raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+
+    # Con una base por sucursal, la tarea se ejecuta contra la base de quien la encoló
+    parametros = dict(parametros or {})
+    bd = bd_actual()
+    if bd:
+        parametros['_bd'] = bd
+        clave = f"{bd}:{clave}" if clave else None
+
+    if clave:
+        existente = Tarea.objects.filter(clave=clave, estado__in=['pendiente', 'en_proceso']).first()
+        if existente:
+            return existente
+
+    try:
+        with transaction.atomic():
+            return Tarea.objects.create(
+                tipo=tipo,
+                parametros=parametros,
+                prioridad=prioridad,
+                clave=clave,
+                max_intentos=max_intentos,
+                disponible_en=disponible_en or timezone.now(),
+                solicitada_por=usuario,
+            )
+    except IntegrityError:
+        # Otro proceso encoló la misma clave entre la consulta y el INSERT
+        return Tarea.objects.get(clave=clave, estado__in=['pendiente', 'en_proceso'])
+
+
+def nombre_trabajador():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def reclamar(trabajador=None, intentos=5):
+    """Toma la siguiente tarea disponible de forma atómica (compare-and-swap)."""
+    trabajador = trabajador or nombre_trabajador()
+    for _ in range(intentos):
+        ahora = timezone.now()
+        candidato = (
+            Tarea.objects.filter(estado='pendiente', disponible_en__lte=ahora)
+            .order_by('-prioridad', 'disponible_en', 'id')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if candidato is None:
+            return None
+        tomada = Tarea.objects.filter(id=candidato, estado='pendiente').update(
+            estado='en_proceso',
+            trabajador=trabajador,
+            iniciada=ahora,
+            intentos=F('intentos') + 1,
+        )
+        if tomada:
+            return Tarea.objects.get(id=candidato)
+    return None
+
+
+def liberar_abandonadas():
+    """Regresa a la cola las tareas cuyo trabajador murió a medio proceso.
+
+    Las que ya agotaron sus intentos se marcan como fallidas: una tarea que tumba
+    al trabajador (p. ej. por memoria) no debe reintentarse para siempre.
+    """
+    ahora = timezone.now()
+    abandonadas = Tarea.objects.filter(estado='en_proceso', iniciada__lt=ahora - TIEMPO_MAXIMO_EJECUCION)
+    fallidas = abandonadas.filter(intentos__gte=F('max_intentos')).update(
+        estado='fallida', trabajador='', terminada=ahora,
+        error="El trabajador murió a medio proceso en el último intento.",
+    )
+    if fallidas:
+        logger.error(f"{fallidas} tareas abandonadas agotaron sus intentos y quedaron como fallidas.")
+    return abandonadas.update(estado='pendiente', trabajador='')
+
+
+def ejecutar(tarea_obj):
+    """Ejecuta una tarea ya reclamada y registra su resultado o su error."""
+    manejador = _REGISTRO.get(tarea_obj.tipo)
+    marca = origen_actual.set(f"tarea:{tarea_obj.tipo}")
+    try:
+        if manejador is None:
+            raise ValueError(f"Tipo de tarea desconocido: {tarea_obj.tipo}")
+        with usar_bd(tarea_obj.parametros.get('_bd')):
+            salida = manejador(tarea_obj.parametros)
+    except Exception:
+        error = traceback.format_exc()
+        logger.error(f"Tarea #{tarea_obj.id} ({tarea_obj.tipo}) falló: {error}")
+        tarea_obj.error = error
+        if tarea_obj.intentos < tarea_obj.max_intentos:
+            # Reintento con espera exponencial
+            tarea_obj.estado = 'pendiente'
+            tarea_obj.disponible_en = timezone.now() + timedelta(seconds=10 * 2 ** tarea_obj.intentos)
+        else:
+            tarea_obj.estado = 'fallida'
+            tarea_obj.terminada = timezone.now()
+        tarea_obj.save(update_fields=['estado', 'error', 'disponible_en', 'terminada'])
+        return tarea_obj
+    finally:
+        origen_actual.reset(marca)
+
+    campos = ['estado', 'terminada', 'error']
+    if isinstance(salida, File):
+        tarea_obj.archivo.save(salida.name, salida, save=False)
+        campos.append('archivo')
+    elif isinstance(salida, dict):
+        tarea_obj.resultado = salida
+        campos.append('resultado')
+
+    tarea_obj.estado = 'completada'
+    tarea_obj.terminada = timezone.now()
+    tarea_obj.error = ''
+    tarea_obj.save(update_fields=campos)
+    return tarea_obj
+
+
+def procesar_siguiente(trabajador=None):
+    """Reclama y ejecuta una tarea. Devuelve la tarea o None si la cola está vacía."""
+    tarea_obj = reclamar(trabajador)
+    if tarea_obj is None:
+        return None
+    return ejecutar(tarea_obj)
+
+
+# -------------------------
+# Manejadores
+# -------------------------
+def _fecha(valor):
+    fecha = parse_date(valor) if isinstance(valor, str) else valor
+    if fecha is None:
+        raise ValueError(f"Fecha inválida: {valor}")
+    return fecha
+
+
+@tarea('exportar_corte')
+def exportar_corte(parametros):
+    from .reportes import construir_corte_excel, nombre_archivo_corte
+
+    inicio = _fecha(parametros['fecha_inicio'])
+    fin = _fecha(parametros.get('fecha_fin') or parametros['fecha_inicio'])
+    contenido = construir_corte_excel(parametros['sucursal'], inicio, fin)
+    return ContentFile(contenido, name=nombre_archivo_corte(inicio, fin))
+
+
+@tarea('exportar_historial')
+def exportar_historial(parametros):
+    """Historial de ventas en un .zip con un archivo por tabla; se arma en disco, no en memoria."""
+    import tempfile
+    import zipfile
+
+    from .historial import exportar
+    from .models import Sucursal
+
+    sucursal = Sucursal.objects.get(id=parametros['sucursal'])
+    formato = parametros.get('formato', 'csv')
+    inicio = _fecha(parametros['inicio']) if parametros.get('inicio') else None
+    fin = _fecha(parametros['fin']) if parametros.get('fin') else None
+    paquete = tempfile.NamedTemporaryFile(suffix='.zip')
+    with tempfile.TemporaryDirectory() as carpeta:
+        resultado = exportar(sucursal, carpeta, formato, inicio, fin, incremental=parametros.get('incremental', False))
+        # Los archivos ya vienen comprimidos: se guardan tal cual
+        with zipfile.ZipFile(paquete, 'w', zipfile.ZIP_STORED) as zip_:
+            for ruta in resultado['archivos']:
+                zip_.write(ruta, os.path.basename(ruta))
+    paquete.seek(0)
+    sufijo = 'incremental' if parametros.get('incremental') else f"{inicio or 'inicio'}_{fin or timezone.localdate()}"
+    return File(paquete, name=f"Historial_{sucursal.clave}_{formato}_{sufijo}.zip")
+
+
+@tarea('recalcular_corte')
+def recalcular_corte(parametros):
+    from .reportes import recalcular_corte as recalcular
+
+    corte = recalcular(parametros['sucursal'], _fecha(parametros['fecha']))
+    if corte is None:
+        return {'recalculado': False}
+    return {'recalculado': True, 'dinero_en_caja': str(corte.dinero_en_caja)}
+
+
+@tarea('generar_recibo')
+def generar_recibo(parametros):
+    from .tickets import generar_recibo_por_id
+
+    ticket = generar_recibo_por_id(parametros['cuenta_id'])
+    return {'ticket': ticket.id, 'huella': ticket.huella}
+
+
+@tarea('generar_comanda')
+def generar_comanda(parametros):
+    from .tickets import generar_comanda_por_id
+
+    ticket = generar_comanda_por_id(parametros['orden_id'])
+    return {'ticket': ticket.id, 'huella': ticket.huella}
+
+
+# Tamaño máximo (px) del lado mayor de las fotos subidas
+LADO_MAXIMO_FOTO = 1024
+
+
+@tarea('optimizar_foto')
+def optimizar_foto(parametros):
+    from PIL import Image
+
+    from .models import Platillo, PerfilUsuario
+
+    modelos = {'platillo': Platillo, 'perfil': PerfilUsuario}
+    instancia = modelos[parametros['modelo']].objects.filter(id=parametros['id']).first()
+    if not instancia or not instancia.foto:
+        return {'optimizada': False}
+
+    anterior = instancia.foto.name
+    with instancia.foto.open('rb') as archivo:
+        imagen = Image.open(archivo)
+        formato = imagen.format or 'WEBP'
+        if max(imagen.size) <= LADO_MAXIMO_FOTO:
+            return {'optimizada': False}
+        imagen.thumbnail((LADO_MAXIMO_FOTO, LADO_MAXIMO_FOTO))
+        salida = BytesIO()
+        imagen.save(salida, format=formato, optimize=True)
+
+    instancia.foto.save(os.path.basename(anterior), ContentFile(salida.getvalue()), save=False)
+    instancia.save(update_fields=['foto'])
+    # Las fotos por contenido pueden estar compartidas: esas las recoge limpiar_medios
+    instancia.foto.storage.delete(anterior)
+    return {'optimizada': True, 'foto': instancia.foto.name}
+
+
+@tarea('resumir_preparacion')
+def resumir_preparacion(parametros):
+    from .analitica import resumir
+    from .models import Sucursal
+
+    return resumir(Sucursal.objects.get(id=parametros['sucursal']), completo=parametros.get('completo', False))
+
+
+# Espera antes de resumir: las órdenes servidas en ráfaga comparten una sola corrida
+ESPERA_RESUMEN = timedelta(minutes=1)
+
+
+def encolar_resumen_preparacion(sucursal):
+    return encolar('resumir_preparacion', {'sucursal': sucursal.id}, prioridad=-2,
+                   clave=f"resumir_preparacion:{sucursal.id}", disponible_en=timezone.now() + ESPERA_RESUMEN)
+
+
+@tarea('purgar_eliminados')
+def purgar_eliminados(parametros):
+    from .models import Sucursal
+    from .purga import purgar_sucursal, purgar_usuarios
+
+    dias = parametros.get('dias', 90)
+    if parametros.get('sucursal'):
+        return purgar_sucursal(Sucursal.objects.get(id=parametros['sucursal']), dias)
+    return {'usuarios': purgar_usuarios(dias)}
+
+
+@tarea('mantenimiento_bd')
+def mantenimiento_bd(parametros):
+    """Mantenimiento nocturno de todas las bases; al terminar se vuelve a programar."""
+    from .mantenimiento import alias_sqlite, mantener
+
+    try:
+        return {alias: mantener(alias, analizar=parametros.get('analizar', False)) for alias in alias_sqlite()}
+    finally:
+        # Aunque falle (respaldo corrupto, base ocupada, disco lleno) la de mañana queda en la cola;
+        # el error sigue su curso y la tarea de hoy queda como fallida
+        if parametros.get('repetir', True):
+            programar_mantenimiento()
+
+
+def programar_mantenimiento():
+    """Encola el próximo mantenimiento; la fecha va en la clave para no chocar con el que está corriendo."""
+    from .mantenimiento import proxima_ejecucion
+
+    cuando = proxima_ejecucion()
+    return encolar('mantenimiento_bd', {}, prioridad=-5, clave=f"mantenimiento_bd:{cuando:%Y%m%d}",
+                   disponible_en=cuando, max_intentos=1)
+
+
+def encolar_optimizar_foto(instancia, modelo):
+    """Atajo para optimizar la foto recién subida sin bloquear la petición."""
+    if instancia.foto:
+        encolar('optimizar_foto', {'modelo': modelo, 'id': instancia.id}, prioridad=-1,
+                clave=f"optimizar_foto:{modelo}:{instancia.id}")
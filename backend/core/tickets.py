@@ -0,0 +1,159 @@
+# 🧾 Recibos y comandas de cocina pre-renderizados
+#
+# Se generan una sola vez (al cerrar la cuenta o crear la orden) y se guardan
+# direccionados por contenido: tickets/<aa>/<sha256>.txt y .pdf. Reimprimir es
+# solo leer el archivo.
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .models import Cuenta, Orden, Ticket
+
+# Ancho en caracteres de una impresora térmica de 80 mm
+ANCHO = 42
+
+# Comandos ESC/POS básicos
+ESC_INICIAR = b'\x1b@'
+ESC_CORTAR = b'\n\n\n\x1dV\x01'
+
+
+def _linea(izquierda, derecha=''):
+    espacio = ANCHO - len(derecha)
+    return f"{izquierda[:espacio - 1]:<{espacio}}{derecha}"
+
+
+def _centrado(texto):
+    return texto[:ANCHO].center(ANCHO).rstrip()
+
+
+def _separador():
+    return '-' * ANCHO
+
+
+def _mesa(cuenta):
+    return f"Mesa {cuenta.mesa.numero}" if cuenta.mesa else "Para llevar"
+
+
+def _hora_local(valor):
+    return timezone.localtime(valor).strftime('%d/%m/%Y %H:%M') if valor else ''
+
+
+def render_recibo(cuenta):
+    lineas = [
+        _centrado('CUENTA CLARA'),
+        '',
+        _linea(f"Cuenta #{cuenta.id}", _mesa(cuenta)),
+        f"Abierta: {_hora_local(cuenta.creada)}",
+        f"Cerrada: {_hora_local(cuenta.cerrada)}",
+        f"Atendio: {cuenta.usuario.username}",
+        _separador(),
+    ]
+    for orden in cuenta.ordenes.order_by('creada').prefetch_related('platillos'):
+        lineas.append(f"Orden #{orden.id}")
+        for platillo in orden.platillos.all():
+            lineas.append(_linea(f"  {platillo.nombre}", f"${platillo.precio:.2f}"))
+    lineas += [
+        _separador(),
+        _linea('TOTAL', f"${cuenta.total:.2f}"),
+        '',
+        _centrado('Gracias por su visita'),
+    ]
+    return '\n'.join(lineas) + '\n'
+
+
+def render_comanda(orden):
+    cuenta = orden.cuenta
+    mesero = orden.usuario.username if orden.usuario else ''
+    lineas = [
+        _centrado(f"COMANDA - ORDEN #{orden.id}"),
+        _linea(_mesa(cuenta), _hora_local(orden.creada)),
+        f"Mesero: {mesero}",
+        _separador(),
+    ]
+    for platillo in orden.platillos.all():
+        lineas.append(f"[ ] {platillo.nombre}"[:ANCHO])
+    if orden.nota:
+        lineas += [_separador(), f"Nota: {orden.nota}"]
+    return '\n'.join(lineas) + '\n'
+
+
+def a_escpos(texto):
+    """Envuelve el texto plano en comandos ESC/POS listos para la impresora."""
+    return ESC_INICIAR + texto.encode('cp437', errors='replace') + ESC_CORTAR
+
+
+def _pdf_texto(valor):
+    return valor.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def a_pdf(texto):
+    """PDF mínimo de una página, en Courier, del ancho de un ticket de 80 mm."""
+    lineas = texto.rstrip('\n').split('\n')
+    tamano, interlineado, margen = 8, 10, 12
+    ancho = 226
+    alto = margen * 2 + interlineado * len(lineas)
+
+    contenido = [f"BT /F1 {tamano} Tf {interlineado} TL {margen} {alto - margen - tamano} Td"]
+    for linea in lineas:
+        contenido.append(f"({_pdf_texto(linea)}) '")
+    contenido.append("ET")
+    flujo = '\n'.join(contenido).encode('cp1252', errors='replace')
+
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {ancho} {alto}] "
+         f"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>").encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>",
+        f"<< /Length {len(flujo)} >>\nstream\n".encode() + flujo + b"\nendstream",
+    ]
+
+    salida = bytearray(b"%PDF-1.4\n")
+    posiciones = []
+    for numero, objeto in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += f"{numero} 0 obj\n".encode() + objeto + b"\nendobj\n"
+    inicio_xref = len(salida)
+    salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    for posicion in posiciones:
+        salida += f"{posicion:010d} 00000 n \n".encode()
+    salida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode()
+    return bytes(salida)
+
+
+def _guardar(texto):
+    """Guarda texto y PDF por su huella; contenido idéntico no se reescribe."""
+    huella = hashlib.sha256(texto.encode('utf-8')).hexdigest()
+    for extension, generar in (('txt', lambda: texto.encode('utf-8')), ('pdf', lambda: a_pdf(texto))):
+        nombre = Ticket(huella=huella).ruta(extension)
+        if not default_storage.exists(nombre):
+            default_storage.save(nombre, ContentFile(generar()))
+    return huella
+
+
+def generar_recibo(cuenta):
+    huella = _guardar(render_recibo(cuenta))
+    ticket, _ = Ticket.objects.update_or_create(
+        tipo='recibo', cuenta=cuenta, orden=None, defaults={'huella': huella}
+    )
+    return ticket
+
+
+def generar_comanda(orden):
+    huella = _guardar(render_comanda(orden))
+    ticket, _ = Ticket.objects.update_or_create(
+        tipo='comanda', cuenta=orden.cuenta, orden=orden, defaults={'huella': huella}
+    )
+    return ticket
+
+
+def generar_recibo_por_id(cuenta_id):
+    cuenta = Cuenta.objects.select_related('mesa', 'usuario').get(id=cuenta_id)
+    return generar_recibo(cuenta)
+
+
+def generar_comanda_por_id(orden_id):
+    orden = Orden.objects.select_related('cuenta__mesa', 'usuario').prefetch_related('platillos').get(id=orden_id)
+    return generar_comanda(orden)
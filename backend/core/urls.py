@@ -9,10 +9,14 @@ from .views import (
 
     # 📊 Dashboard
     ajustes,
+    cambiar_sucursal,
     cuentas_view,
     cerrar_cuenta,
+    cerrar_todas_cuentas,
+    registrar_pago,
     vista_corte as corte,  # ✅ alias corregido
     exportar_corte_excel,
+    encolar_exportacion_corte,
     mesas,
     menu,
     menu_comida,
@@ -20,6 +24,7 @@ from .views import (
     # 🧾 Pedidos
     actualizar_pedido,
     crear_orden,
+    cambiar_estado_orden,
     procesar_pedido,
     eliminar_cuenta,
 
@@ -38,10 +43,44 @@ from .views import (
     editar_platillo,
     eliminar_platillo,
     actualizar_activo,
+    exportar_menu,
+    importar_menu,
 
     # 🪑 Gestión de mesas
     agregar_mesa,
     eliminar_mesa,
+    mesas_en_bloque,
+    plano_mesas,
+    sincronizar,
+
+    # ⏳ Tareas en segundo plano
+    estado_tarea,
+    descargar_tarea,
+
+    # 🧾 Recibos y comandas
+    ticket_recibo,
+    ticket_comanda,
+
+    # ⏱️ Analítica de cocina
+    tablero_cocina,
+
+    # 🧊 Cubo de ventas
+    cubo_ventas,
+    exportar_cubo_excel,
+
+    # 📦 Historial de ventas
+    exportar_historial,
+    encolar_exportacion_historial,
+
+    # 🗄️ Caché
+    estadisticas_cache,
+
+    # 📈 Métricas
+    metricas_prometheus,
+
+    # 🔬 Perfiles
+    lista_perfiles,
+    descargar_perfil,
 )
 
 urlpatterns = [
@@ -59,11 +98,26 @@ urlpatterns = [
 
     # 📊 Dashboard
     path('ajustes/', ajustes, name='ajustes'),
+    path('ajustes/sucursal/', cambiar_sucursal, name='cambiar_sucursal'),
     path('corte/', corte, name='corte'),
     path('corte/exportar/', exportar_corte_excel, name='exportar_corte_excel'),
+    path('corte/exportar/encolar/', encolar_exportacion_corte, name='encolar_exportacion_corte'),
     path('cuentas/', cuentas_view, name='cuentas'),
     path('cuentas/cerrar/<int:cuenta_id>/', cerrar_cuenta, name='cerrar_cuenta'),
+    path('cuentas/cerrar_todas/', cerrar_todas_cuentas, name='cerrar_todas_cuentas'),
+    path('cuentas/<int:cuenta_id>/pagos/', registrar_pago, name='registrar_pago'),
     path('cuentas/eliminar/<int:cuenta_id>/', eliminar_cuenta, name='eliminar_cuenta'),
+    path('cuentas/<int:cuenta_id>/recibo/', ticket_recibo, name='ticket_recibo'),
+    path('ordenes/<int:orden_id>/comanda/', ticket_comanda, name='ticket_comanda'),
+    path('ajustes/cocina/', tablero_cocina, name='tablero_cocina'),
+    path('ajustes/ventas_por_hora/', cubo_ventas, name='cubo_ventas'),
+    path('ajustes/ventas_por_hora/exportar/', exportar_cubo_excel, name='exportar_cubo_excel'),
+    path('ajustes/historial/exportar/', exportar_historial, name='exportar_historial'),
+    path('ajustes/historial/exportar/encolar/', encolar_exportacion_historial, name='encolar_exportacion_historial'),
+    path('ajustes/cache/', estadisticas_cache, name='estadisticas_cache'),
+    path('metrics', metricas_prometheus, name='metricas'),
+    path('ajustes/perfiles/', lista_perfiles, name='lista_perfiles'),
+    path('ajustes/perfiles/<str:perfil_id>/<str:formato>/', descargar_perfil, name='descargar_perfil'),
     path('mesas/', mesas, name='mesas'),
     path('menu/', menu, name='menu'),
     path('menu_comida/', menu_comida, name='menu_comida'),
@@ -71,6 +125,7 @@ urlpatterns = [
     # 🧾 Pedidos
     path('ajax/actualizar_pedido/', actualizar_pedido, name='actualizar_pedido'),
     path('crear_orden/', crear_orden, name='crear_orden'),
+    path('ordenes/<int:orden_id>/estado/', cambiar_estado_orden, name='cambiar_estado_orden'),
     path('procesar_pedido/', procesar_pedido, name='procesar_pedido'),
 
     # ⚙️ Ajustes generales
@@ -88,8 +143,19 @@ urlpatterns = [
     path('ajustes/editar_platillo/<int:platillo_id>/', editar_platillo, name='editar_platillo'),
     path('ajustes/eliminar_platillo/<int:platillo_id>/', eliminar_platillo, name='eliminar_platillo'),
     path('ajustes/actualizar_activo/<int:id>/', actualizar_activo, name='actualizar_activo'),
+    path('ajustes/menu/exportar/', exportar_menu, name='exportar_menu'),
+    path('ajustes/menu/importar/', importar_menu, name='importar_menu'),
 
     # 🪑 Gestión de mesas
     path('ajustes/agregar_mesa/', agregar_mesa, name='agregar_mesa'),
     path('ajustes/eliminar_mesa/<int:numero>/', eliminar_mesa, name='eliminar_mesa'),
+    path('ajustes/mesas/bloque/', mesas_en_bloque, name='mesas_en_bloque'),
+    path('mesas/plano/', plano_mesas, name='plano_mesas'),
+
+    # 📡 Sincronización incremental de las tabletas
+    path('sync/', sincronizar, name='sincronizar'),
+
+    # ⏳ Tareas en segundo plano
+    path('tareas/<int:tarea_id>/', estado_tarea, name='estado_tarea'),
+    path('tareas/<int:tarea_id>/descargar/', descargar_tarea, name='descargar_tarea'),
 ]
\ No newline at end of file
@@ -1,16 +1,15 @@
 # 🔧 Utilidades estándar
+import hmac
 import json
 import logging
 from decimal import Decimal, InvalidOperation
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
 
-# 📦 Librerías externas
-import openpyxl
-
 # 🌐 Django - HTTP y vistas
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponse
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponse, FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 
@@ -21,9 +20,14 @@ from django.contrib.auth.models import User
 from django.contrib.auth.views import LogoutView
 
 # 🧠 Django - Utilidades
+from django.conf import settings
 from django.utils import timezone
-from django.db.models import Sum
+from django.utils.dateparse import parse_datetime
+from django.db.models import Q, ProtectedError
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
 from django.contrib import messages
+from django.db import router, transaction
 
 # 🗂️ Modelos y formularios locales
 from .models import (
@@ -32,23 +36,53 @@ from .models import (
     Mesa,
     Cuenta,
     Orden,
-    GastoExtra,
-    CorteCaja
+    CorteCaja,
+    Tarea,
+    Ticket,
+    Sucursal,
+    ConflictoVersion,
+    METODOS_PAGO
 )
 from .forms import RegistroUsuarioForm, EditarUsuarioForm
+from . import analitica, cache, caja, cubo, historial, menu_masivo, metricas, perfilador, plano, sincronizacion, tareas, tickets
+from .routers import usar_sucursal
+from .reportes import totales_del_dia, construir_corte_excel, nombre_archivo_corte, cerrar_turno, actividad_de_usuarios
 
 # 📝 Logger
 logger = logging.getLogger(__name__)
 
+USUARIOS_POR_PAGINA = 25
+
+
+def _version_del_cliente(request, instancia):
+    """Usa la versión que vio el cliente (campo `version`) para el UPDATE condicionado."""
+    version = request.POST.get('version', '')
+    if version.isdigit():
+        instancia.version = int(version)
+
+
+def _conflicto(error):
+    """409 con los valores vigentes para que el cliente combine y reintente."""
+    return JsonResponse(
+        {'error': 'conflicto', 'mensaje': str(error), 'version': error.actual['version'], 'actual': error.actual},
+        status=409,
+    )
+
 # -------------------------
 # Decoradores
 # -------------------------
+def rol_de(user):
+    """Rol del usuario, leído de la caché compartida."""
+    def calcular():
+        perfil = PerfilUsuario.objects.filter(user=user).values_list('role', flat=True).first()
+        return perfil or 'employee'
+    return cache.obtener('roles', [user.id], calcular)
+
 def solo_admin(view_func):
     """Restringe el acceso solo a usuarios con role='admin'."""
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        perfil = getattr(request.user, 'perfilusuario', None)
-        if request.user.is_authenticated and perfil and perfil.role == 'admin':
+        if request.user.is_authenticated and rol_de(request.user) == 'admin':
             return view_func(request, *args, **kwargs)
         messages.error(request, '⛔ No tienes permisos para realizar esta acción.')
         return redirect('menu')
@@ -107,29 +141,38 @@ def menu(request):
 
 @login_required
 def ajustes(request):
-    return render(request, 'ajustes.html')
+    return render(request, 'ajustes.html', {'sucursales': Sucursal.objects.filter(activa=True)})
+
+@require_POST
+@login_required
+@solo_admin
+def cambiar_sucursal(request):
+    sucursal = get_object_or_404(Sucursal, id=request.POST.get('sucursal'), activa=True)
+    request.session['sucursal_id'] = sucursal.id
+    messages.success(request, f'🏢 Trabajando en la sucursal {sucursal.nombre}.')
+    return redirect('ajustes')
 
 @login_required
 def menu_comida(request):
-    platillos = Platillo.objects.filter(activo=True)
+    platillos = cache.menu_de(request.sucursal)
     return render(request, 'menu_comida.html', {'platillos': platillos})
 
 @login_required
 def mesas(request):
-    mesas = Mesa.objects.order_by('numero')
+    plano_piso = plano.plano_de(request.sucursal)
     # Datos temporales para ejemplo
     ordenes = [
         {'id': 1, 'nombre_mesa': 'Mesa 3', 'items': ['2x Hamburguesa Clásica'], 'para_llevar': False},
         {'id': 2, 'nombre_mesa': 'Para Llevar', 'items': ['3x Tacos al Pastor'], 'para_llevar': True}
     ]
-    return render(request, 'mesas.html', {'mesas': mesas, 'ordenes': ordenes})
+    return render(request, 'mesas.html', {'plano': plano_piso, 'ordenes': ordenes})
 
 @login_required
 def cuentas_view(request):
     mesa_filtro = request.GET.get('mesa')
     fecha_filtro = request.GET.get('fecha')
 
-    cuentas = Cuenta.objects.prefetch_related('ordenes__platillos').order_by('-creada')
+    cuentas = Cuenta.objects.de(request.sucursal).prefetch_related('ordenes__platillos').order_by('-creada')
     if mesa_filtro:
         cuentas = cuentas.filter(mesa__numero=mesa_filtro)
     if fecha_filtro:
@@ -140,14 +183,75 @@ def cuentas_view(request):
 
 @login_required
 def cerrar_cuenta(request, cuenta_id):
-    cuenta = get_object_or_404(Cuenta, id=cuenta_id, activa=True)
+    cuenta = get_object_or_404(Cuenta.objects.de(request.sucursal), id=cuenta_id, activa=True)
     if request.method == 'POST':
-        cuenta.activa = False
-        cuenta.calcular_total()
-        cuenta.save()
-        messages.success(request, f'Cuenta de mesa {cuenta.mesa.numero} cerrada correctamente.')
+        metodo = request.POST.get('metodo', 'efectivo')
+        if metodo not in dict(METODOS_PAGO):
+            messages.error(request, '❌ Método de pago inválido.')
+            return redirect('cuentas')
+        try:
+            propina = Decimal(request.POST.get('propina') or '0')
+            if not propina.is_finite() or propina < 0:
+                raise InvalidOperation("Propina negativa")
+        except InvalidOperation:
+            messages.error(request, '❌ Propina inválida.')
+            return redirect('cuentas')
+        _version_del_cliente(request, cuenta)
+        try:
+            with transaction.atomic(using=router.db_for_write(Cuenta)):
+                cuenta.cerrar()
+                caja.saldar_cuenta(cuenta, metodo, propina, request.user)
+        except ConflictoVersion:
+            messages.warning(request, '⚠️ La cuenta cambió en otro dispositivo (nuevas órdenes). Revisa el total y vuelve a cobrar.')
+            return redirect('cuentas')
+        tareas.encolar('generar_recibo', {'cuenta_id': cuenta.id}, prioridad=8, clave=f"recibo:{cuenta.id}")
+        mesa_info = f"mesa {cuenta.mesa.numero}" if cuenta.mesa else "para llevar"
+        messages.success(request, f'Cuenta de {mesa_info} cerrada correctamente.')
         return redirect('cuentas')
-    return render(request, 'cuentas.html', {'cuentas': Cuenta.objects.filter(activa=True)})
+    return render(request, 'cuentas.html', {'cuentas': Cuenta.objects.de(request.sucursal).filter(activa=True)})
+
+
+@require_POST
+@login_required
+def registrar_pago(request, cuenta_id):
+    """Pago parcial de una cuenta (cuentas divididas)."""
+    cuenta = get_object_or_404(Cuenta.objects.de(request.sucursal), id=cuenta_id)
+    try:
+        monto = Decimal(request.POST.get('monto', ''))
+        propina = Decimal(request.POST.get('propina') or '0')
+        if not (monto.is_finite() and propina.is_finite()) or monto <= 0 or propina < 0:
+            raise InvalidOperation("Monto no positivo")
+    except (InvalidOperation, TypeError):
+        return JsonResponse({'error': 'Monto inválido'}, status=400)
+
+    metodo = request.POST.get('metodo', 'efectivo')
+    if metodo not in dict(METODOS_PAGO):
+        return JsonResponse({'error': 'Método de pago inválido'}, status=400)
+
+    # Transacción IMMEDIATE: ningún otro pago de la cuenta entra entre la revisión y el alta
+    with transaction.atomic(using=router.db_for_write(Cuenta)):
+        cuenta.refresh_from_db(fields=['total'])
+        if monto > caja.pendiente_por_pagar(cuenta):
+            return JsonResponse({'error': 'El monto excede lo pendiente por pagar'}, status=400)
+        pago = caja.registrar_pago(cuenta, monto, metodo, propina, request.user)
+    return JsonResponse({
+        'pago': pago.id,
+        'pendiente': str(caja.pendiente_por_pagar(cuenta)),
+        'efectivo_en_caja': str(caja.efectivo_en_caja(request.sucursal)),
+    })
+
+
+@require_POST
+@login_required
+@solo_admin
+def cerrar_todas_cuentas(request):
+    """Cierre de fin de turno: todas las cuentas activas en una sola transacción."""
+    ids = cerrar_turno(request.sucursal)
+    if ids:
+        messages.success(request, f'🔒 {len(ids)} cuentas cerradas correctamente.')
+    else:
+        messages.info(request, 'No hay cuentas activas por cerrar.')
+    return redirect('cuentas')
 
 # -------------------------
 # Gestión de usuarios
@@ -156,10 +260,27 @@ def cerrar_cuenta(request, cuenta_id):
 @solo_admin
 def centro_de_usuarios(request):
     rol = request.GET.get('rol')
-    usuarios = User.objects.select_related('perfilusuario')
+    busqueda = request.GET.get('q', '').strip()
+    usuarios = User.objects.select_related('perfilusuario').order_by('username')
+    if not request.GET.get('inactivos'):
+        usuarios = usuarios.filter(is_active=True)
     if rol:
         usuarios = usuarios.filter(perfilusuario__role=rol)
-    return render(request, 'Ajustes/centro_de_usuarios.html', {'usuarios': usuarios, 'rol_seleccionado': rol})
+    if busqueda:
+        # Por prefijo: usa los índices NOCASE de username y email (LIKE 'abc%')
+        usuarios = usuarios.filter(Q(username__istartswith=busqueda) | Q(email__istartswith=busqueda))
+
+    pagina = Paginator(usuarios, USUARIOS_POR_PAGINA).get_page(request.GET.get('pagina'))
+    actividad = actividad_de_usuarios(request.sucursal, [u.id for u in pagina])
+    for usuario in pagina:
+        usuario.actividad = actividad[usuario.id]
+
+    filtros = request.GET.copy()
+    filtros.pop('pagina', None)
+    return render(request, 'Ajustes/centro_de_usuarios.html', {
+        'usuarios': pagina, 'pagina': pagina, 'rol_seleccionado': rol, 'busqueda': busqueda,
+        'inactivos': bool(request.GET.get('inactivos')), 'filtros': filtros.urlencode(),
+    })
 
 @login_required
 @solo_admin
@@ -167,7 +288,9 @@ def agregar_usuario(request):
     form = RegistroUsuarioForm(request.POST or None, request.FILES or None)
     if request.method == 'POST' and form.is_valid():
         user = form.save()
-        PerfilUsuario.objects.get_or_create(user=user, defaults={'role': 'employee'})
+        perfil, _ = PerfilUsuario.objects.get_or_create(user=user, defaults={'role': 'employee'})
+        if request.FILES.get('foto'):
+            tareas.encolar_optimizar_foto(perfil, 'perfil')
         messages.success(request, '✅ Usuario agregado correctamente')
         return redirect('centro_de_usuarios')
     return render(request, 'Ajustes/agregar_usuario.html', {'form': form})
@@ -183,6 +306,8 @@ def editar_usuario(request, usuario_id):
     form = EditarUsuarioForm(request.POST or None, request.FILES or None, instance=usuario)
     if request.method == 'POST' and form.is_valid():
         form.save()
+        if request.FILES.get('foto'):
+            tareas.encolar_optimizar_foto(usuario.perfilusuario, 'perfil')
         if request.user == usuario:
             update_session_auth_hash(request, usuario)
         messages.success(request, '✅ Datos actualizados correctamente.')
@@ -201,12 +326,14 @@ def eliminar_usuario(request, usuario_id):
         return redirect('centro_de_usuarios')
 
     perfil = getattr(usuario_a_eliminar, 'perfilusuario', None)
-    if perfil and perfil.role == 'admin' and User.objects.filter(perfilusuario__role='admin').count() <= 1:
+    if perfil and perfil.role == 'admin' and User.objects.filter(perfilusuario__role='admin', is_active=True).count() <= 1:
         messages.error(request, '⛔ No puedes eliminar al único administrador.')
         return redirect('centro_de_usuarios')
 
-    usuario_a_eliminar.delete()
-    messages.success(request, '🗑️ Usuario eliminado correctamente.')
+    # Se desactiva en lugar de borrarse: sus cuentas y órdenes siguen en el historial
+    usuario_a_eliminar.is_active = False
+    usuario_a_eliminar.save(update_fields=['is_active'])
+    messages.success(request, '🗑️ Usuario dado de baja correctamente.')
     return redirect('centro_de_usuarios')
 
 # -------------------------
@@ -215,7 +342,7 @@ def eliminar_usuario(request, usuario_id):
 @login_required
 @solo_admin
 def editar_menu(request):
-    platillos = Platillo.objects.all()
+    platillos = Platillo.objects.de(request.sucursal)
     return render(request, 'Ajustes/editar_menu.html', {'platillos': platillos})
 
 @login_required
@@ -236,7 +363,8 @@ def agregar_platillo(request):
             return redirect('agregar_platillo')
 
         ingredientes_str = ', '.join([i.strip() for i in ingredientes if i.strip()])
-        Platillo.objects.create(user=request.user, nombre=nombre, precio=precio, ingredientes=ingredientes_str, foto=foto)
+        platillo = Platillo.objects.create(sucursal=request.sucursal, user=request.user, nombre=nombre, precio=precio, ingredientes=ingredientes_str, foto=foto)
+        tareas.encolar_optimizar_foto(platillo, 'platillo')
         messages.success(request, '✅ Platillo agregado correctamente.')
         return redirect('editar_menu')
 
@@ -245,7 +373,7 @@ def agregar_platillo(request):
 @login_required
 @solo_admin
 def editar_platillo(request, platillo_id):
-    platillo = get_object_or_404(Platillo, id=platillo_id)
+    platillo = get_object_or_404(Platillo.objects.de(request.sucursal), id=platillo_id)
 
     if request.method == 'POST':
         nombre = request.POST.get('nombre', '').strip()
@@ -265,9 +393,18 @@ def editar_platillo(request, platillo_id):
         platillo.nombre = nombre
         platillo.precio = precio
         platillo.ingredientes = ', '.join([i.strip() for i in ingredientes if i.strip()])
+        campos = ['nombre', 'precio', 'ingredientes']
         if request.FILES.get('foto'):
             platillo.foto = request.FILES['foto']
-        platillo.save()
+            campos.append('foto')
+        _version_del_cliente(request, platillo)
+        try:
+            platillo.save(update_fields=campos)
+        except ConflictoVersion:
+            messages.error(request, '⚠️ Otro dispositivo modificó el platillo mientras lo editabas. Estos son los valores actuales; vuelve a aplicar tus cambios.')
+            return redirect('editar_platillo', platillo_id=platillo.id)
+        if request.FILES.get('foto'):
+            tareas.encolar_optimizar_foto(platillo, 'platillo')
 
         messages.success(request, '✅ Platillo actualizado correctamente.')
         return redirect('editar_menu')
@@ -284,20 +421,60 @@ def editar_platillo(request, platillo_id):
 @login_required
 @solo_admin
 def eliminar_platillo(request, platillo_id):
-    platillo = get_object_or_404(Platillo, id=platillo_id)
-    platillo.delete()
+    platillo = get_object_or_404(Platillo.objects.de(request.sucursal), id=platillo_id)
+    platillo.eliminar()
     messages.success(request, '🗑️ Platillo eliminado correctamente.')
     return redirect('editar_menu')
 
 @login_required
 @solo_admin
 def actualizar_activo(request, id):
-    platillo = get_object_or_404(Platillo, id=id)
+    platillo = get_object_or_404(Platillo.objects.de(request.sucursal), id=id)
     platillo.activo = not platillo.activo
-    platillo.save()
+    try:
+        platillo.save(update_fields=['activo'])
+    except ConflictoVersion:
+        messages.error(request, f"⚠️ '{platillo.nombre}' cambió en otro dispositivo; revisa su estado.")
+        return redirect('editar_menu')
     messages.success(request, f"Estado de '{platillo.nombre}' actualizado.")
     return redirect('editar_menu')
 
+@login_required
+@solo_admin
+def exportar_menu(request):
+    formato = request.GET.get('formato', 'csv')
+    if formato == 'xlsx':
+        contenido, tipo = menu_masivo.exportar_xlsx(request.sucursal), "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        formato, contenido, tipo = 'csv', menu_masivo.exportar_csv(request.sucursal), 'text/csv; charset=utf-8'
+    response = HttpResponse(contenido, content_type=tipo)
+    response["Content-Disposition"] = f'attachment; filename="Menu_{request.sucursal.clave}.{formato}"'
+    return response
+
+@require_POST
+@login_required
+@solo_admin
+def importar_menu(request):
+    """Carga masiva del menú; con `simular` solo muestra lo que cambiaría."""
+    archivo = request.FILES.get('archivo')
+    if not archivo:
+        messages.error(request, '⚠️ Selecciona un archivo CSV o XLSX.')
+        return redirect('editar_menu')
+    try:
+        resultado = menu_masivo.importar(request.sucursal, request.user, archivo, archivo.name,
+                                         simular='simular' in request.POST)
+    except menu_masivo.ArchivoInvalido as error:
+        messages.error(request, f'❌ {error}')
+        return redirect('editar_menu')
+
+    if resultado['aplicado']:
+        messages.success(request, f"✅ Menú importado: {resultado['creados']} nuevos, {resultado['actualizados']} actualizados.")
+        return redirect('editar_menu')
+    return render(request, 'Ajustes/editar_menu.html', {
+        'platillos': Platillo.objects.de(request.sucursal),
+        'importacion': resultado,
+    }, status=400 if resultado['errores'] else 200)
+
 # -------------------------
 # Pedidos y órdenes
 # -------------------------
@@ -332,24 +509,20 @@ def crear_orden(request):
         if not platillo_ids:
             return HttpResponseBadRequest("Debes seleccionar al menos un platillo")
 
-        # Buscar o crear cuenta activa
-        cuenta = None
+        mesa = None
         if mesa_id:
             try:
-                mesa = Mesa.objects.get(id=mesa_id)
+                mesa = Mesa.objects.de(request.sucursal).get(id=mesa_id, activa=True)
             except Mesa.DoesNotExist:
                 return HttpResponseBadRequest("Mesa no encontrada")
-            cuenta, _ = Cuenta.objects.get_or_create(mesa=mesa, activa=True, defaults={"usuario": request.user})
-        else:
-            cuenta, _ = Cuenta.objects.get_or_create(mesa=None, activa=True, usuario=request.user)
-
-        # Crear orden
-        orden = Orden.objects.create(cuenta=cuenta, usuario=request.user)
-        orden.platillos.set(Platillo.objects.filter(id__in=platillo_ids))
-        orden.save()
-
-        cuenta.platillos.add(*orden.platillos.all())
-        cuenta.calcular_total()
+        platillos = list(Platillo.objects.de(request.sucursal).filter(id__in=platillo_ids))
+
+        # Transacción corta: abrir (o encontrar) la cuenta y agregar la orden.
+        # Dos meseros en la misma mesa terminan en la misma cuenta (Cuenta.objects.abierta)
+        with transaction.atomic(using=router.db_for_write(Cuenta)):
+            cuenta, _ = Cuenta.objects.abierta(request.sucursal, mesa, request.user)
+            orden = cuenta.agregar_orden(request.user, platillos)
+        tareas.encolar('generar_comanda', {'orden_id': orden.id}, prioridad=10, clave=f"comanda:{orden.id}")
         return redirect("cuentas")
 
     except json.JSONDecodeError:
@@ -358,6 +531,23 @@ def crear_orden(request):
         logger.error(f"Error al crear orden: {e}")
         return HttpResponseBadRequest(f"Error inesperado: {str(e)}")
 
+@require_POST
+@login_required
+def cambiar_estado_orden(request, orden_id):
+    """Avance de la orden en cocina; quien la toma queda como quien la preparó."""
+    orden = get_object_or_404(Orden.objects.filter(cuenta__sucursal=request.sucursal), id=orden_id)
+    estado = request.POST.get('estado')
+    if estado not in dict(Orden.ESTADOS):
+        return JsonResponse({'error': 'Estado inválido'}, status=400)
+    _version_del_cliente(request, orden)
+    try:
+        orden.cambiar_estado(estado, request.user)
+    except ConflictoVersion as error:
+        return _conflicto(error)
+    if estado in ('servida', 'cancelada'):
+        tareas.encolar_resumen_preparacion(request.sucursal)
+    return JsonResponse({'orden': orden.id, 'estado': orden.estado, 'version': orden.version})
+
 # -------------------------
 # AJAX
 # -------------------------
@@ -377,7 +567,7 @@ def actualizar_pedido(request):
 @login_required
 @solo_admin
 def editar_mesas(request):
-    mesas = Mesa.objects.order_by('numero')
+    mesas = Mesa.objects.de(request.sucursal).filter(activa=True).order_by('posicion', 'numero')
     return render(request, 'Ajustes/editar_mesas.html', {'mesas': mesas})
 
 @login_required
@@ -385,20 +575,93 @@ def editar_mesas(request):
 def agregar_mesa(request):
     if request.method == 'POST':
         numero = request.POST.get('numero')
-        color = request.POST.get('color')
-        if not numero or Mesa.objects.filter(numero=numero).exists():
+        hasta = request.POST.get('hasta') or numero
+        try:
+            resultado = plano.crear_rango(request.sucursal, numero, hasta,
+                                          request.POST.getlist('color'), request.POST.get('zona', '').strip())
+        except plano.PlanoInvalido as error:
+            messages.error(request, f'⚠️ {error}')
+            return redirect('agregar_mesa')
+        if not resultado['creadas'] and not resultado['reactivadas']:
             messages.error(request, '⚠️ Número inválido o ya existe.')
             return redirect('agregar_mesa')
-        Mesa.objects.create(numero=numero, color=color)
+        if resultado['existentes']:
+            messages.info(request, f"Ya existían las mesas {', '.join(map(str, resultado['existentes']))}.")
         return redirect('editar_mesas')
     return render(request, 'Ajustes/agregar_mesa.html')
 
+@require_POST
+@login_required
+@solo_admin
+def mesas_en_bloque(request):
+    """Operaciones sobre muchas mesas en una transacción (cuerpo JSON).
+
+    {"accion": "crear", "desde": 1, "hasta": 20, "colores": [...], "zona": "Terraza"}
+    {"accion": "reordenar", "numeros": [3, 1, 2]}
+    {"accion": "desactivar" | "activar", "numeros": [4, 5]}
+    """
+    try:
+        datos = json.loads(request.body)
+        accion = datos.get('accion')
+        if accion == 'crear':
+            resultado = plano.crear_rango(request.sucursal, datos.get('desde'), datos.get('hasta'),
+                                          datos.get('colores') or [], str(datos.get('zona') or ''))
+        elif accion == 'reordenar':
+            resultado = {'ordenadas': plano.reordenar(request.sucursal, datos.get('numeros') or [])}
+        elif accion in ('desactivar', 'activar'):
+            resultado = {'cambiadas': plano.cambiar_activas(request.sucursal, datos.get('numeros') or [], accion == 'activar')}
+        else:
+            return JsonResponse({'error': 'Acción inválida'}, status=400)
+    except (json.JSONDecodeError, AttributeError):
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+    except plano.PlanoInvalido as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    return JsonResponse(resultado)
+
+@login_required
+def plano_mesas(request):
+    """GET: plano del piso en un solo documento (con ETag). POST (admin): guarda zonas y celdas."""
+    if request.method == 'POST':
+        if rol_de(request.user) != 'admin':
+            return JsonResponse({'error': 'No autorizado'}, status=403)
+        try:
+            acomodo = json.loads(request.body).get('mesas') or []
+            guardadas = plano.guardar_plano(request.sucursal, acomodo)
+        except (json.JSONDecodeError, AttributeError):
+            return JsonResponse({'error': 'JSON inválido'}, status=400)
+        except plano.PlanoInvalido as error:
+            return JsonResponse({'error': str(error)}, status=400)
+        return JsonResponse({'guardadas': guardadas})
+
+    plano_piso = plano.plano_de(request.sucursal)
+    response = HttpResponse(plano_piso['json'], content_type='application/json')
+    # ConditionalGetMiddleware responde 304 si coincide
+    response['ETag'] = f'"{plano_piso["etag"]}"'
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+@login_required
+def sincronizar(request):
+    """Cambios de mesas, menú, cuentas y órdenes desde `cursor` (sin cursor: foto completa)."""
+    cursor = request.GET.get('cursor')
+    if cursor is None:
+        datos = sincronizacion.instantanea(request.sucursal)
+    elif cursor.isdigit():
+        datos = sincronizacion.cambios_desde(request.sucursal, int(cursor))
+    else:
+        return JsonResponse({'error': 'Cursor inválido'}, status=400)
+    response = JsonResponse(datos, json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
 @require_POST
 @login_required
 def eliminar_mesa(request, numero):
     try:
-        mesa = Mesa.objects.get(numero=numero)
-        mesa.delete()
+        mesa = Mesa.objects.de(request.sucursal).get(numero=numero)
+        if Cuenta.objects.filter(mesa=mesa, activa=True).exists():
+            return JsonResponse({'success': False, 'error': 'La mesa tiene una cuenta abierta'})
+        mesa.eliminar()
         return JsonResponse({'success': True})
     except Mesa.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Mesa no encontrada'})
@@ -406,24 +669,75 @@ def eliminar_mesa(request, numero):
 # -------------------------
 # Corte de caja
 # -------------------------
+@login_required
 def vista_corte(request):
     # Obtener fecha desde POST o usar la actual
     fecha_str = request.POST.get("fecha")
-    fecha = timezone.now().date()
+    fecha = timezone.localdate()
     if fecha_str:
         try:
             fecha = timezone.datetime.strptime(fecha_str, "%Y-%m-%d").date()
         except ValueError:
             pass  # Si la fecha es inválida, se mantiene la actual
 
-    # Datos base del corte
-    cuentas_cerradas = Cuenta.objects.filter(cerrada__date=fecha)
-    ventas_totales = cuentas_cerradas.aggregate(total=Sum('total'))['total'] or 0
+    mensaje = ""
+    sucursal = request.sucursal
+    resumen = caja.resumen_del_turno(sucursal, fecha)
+
+    # Días sin bitácora de caja (anteriores a ella): cálculo a partir de cuentas y gastos
+    if resumen is None and (
+        CorteCaja.objects.de(sucursal).filter(fecha=fecha).exists() or any(totales_del_dia(sucursal, fecha))
+    ):
+        return _vista_corte_historica(request, fecha)
+
+    # Agregar monto extra
+    if request.method == "POST" and "pagos_extra" in request.POST:
+        try:
+            monto_extra = Decimal(request.POST.get("monto_extra", "0"))
+            if not monto_extra.is_finite():
+                raise InvalidOperation("Monto no finito")
+            caja.registrar_movimiento(sucursal, 'extra', monto_extra, 'efectivo', fecha, request.user,
+                                      descripcion="Pago extra")
+            mensaje = "Monto extra agregado correctamente."
+        except (InvalidOperation, TypeError):
+            mensaje = "Monto extra inválido."
+
+    # Calcular corte: fotografía de la bitácora
+    if request.method == "POST" and "calcular_corte" in request.POST:
+        # La bitácora no se edita: un fondo mal escrito no se convierte en 0 (borraría el fondo actual)
+        try:
+            efectivo_inicial = Decimal(request.POST.get("efectivo_inicial", "0"))
+            if not efectivo_inicial.is_finite() or efectivo_inicial < 0:
+                raise InvalidOperation("Fondo inválido")
+        except (InvalidOperation, TypeError):
+            efectivo_inicial = None
+            mensaje = "Efectivo inicial inválido."
+        if efectivo_inicial is not None:
+            caja.registrar_fondo(sucursal, efectivo_inicial, fecha, request.user)
+            if caja.snapshot_corte(sucursal, fecha, request.user):
+                mensaje = "Corte de caja guardado correctamente."
+            else:
+                mensaje = "No hay movimientos de caja en el día: no se guardó ningún corte."
+
+    resumen = caja.resumen_del_turno(sucursal, fecha) or {}
+    context = {
+        "fecha": fecha,
+        "ventas_totales": resumen.get("ventas_totales", 0),
+        "gastos_totales": resumen.get("gastos_totales", 0),
+        "monto_extra": resumen.get("monto_extra", 0),
+        "propinas": resumen.get("propinas", 0),
+        "dinero_en_caja": resumen.get("dinero_en_caja", 0),
+        "saldos": resumen.get("saldos", {}).values(),
+        "mensaje": mensaje,
+    }
+    return render(request, "corte.html", context)
+
 
-    gastos = GastoExtra.objects.filter(fecha=fecha)
-    gastos_totales = gastos.aggregate(total=Sum('monto'))['total'] or 0
+def _vista_corte_historica(request, fecha):
+    # Datos base del corte
+    ventas_totales, gastos_totales = totales_del_dia(request.sucursal, fecha)
 
-    corte_existente = CorteCaja.objects.filter(fecha=fecha).first()
+    corte_existente = CorteCaja.objects.de(request.sucursal).filter(fecha=fecha).first()
     monto_extra = corte_existente.monto_extra if corte_existente else 0
     dinero_en_caja = (
         corte_existente.dinero_en_caja if corte_existente
@@ -451,6 +765,7 @@ def vista_corte(request):
         dinero_en_caja = efectivo_inicial + ventas_totales - gastos_totales + monto_extra
 
         CorteCaja.objects.update_or_create(
+            sucursal=request.sucursal,
             fecha=fecha,
             defaults={
                 "efectivo_inicial": efectivo_inicial,
@@ -475,8 +790,12 @@ def vista_corte(request):
 
 
 def eliminar_cuenta(request, cuenta_id):
-    cuenta = get_object_or_404(Cuenta, id=cuenta_id)
-    cuenta.delete()
+    cuenta = get_object_or_404(Cuenta.objects.de(request.sucursal), id=cuenta_id)
+    try:
+        cuenta.delete()
+    except ProtectedError:
+        messages.error(request, "⛔ La cuenta tiene pagos registrados y no se puede eliminar.")
+        return redirect('cuentas')
     messages.success(request, "Cuenta eliminada correctamente.")
     return redirect('cuentas')
 
@@ -487,52 +806,289 @@ def exportar_corte_excel(request):
     if fecha_str:
         fecha = timezone.datetime.strptime(fecha_str, "%Y-%m-%d").date()
 
-    corte = CorteCaja.objects.filter(fecha=fecha).first()
-    gastos = GastoExtra.objects.filter(fecha=fecha)
-    cuentas = Cuenta.objects.filter(cerrada__date=fecha)
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Corte de Caja"
-
-    # Encabezados
-    ws.append(["Fecha", "Efectivo Inicial", "Ventas Totales", "Gastos Totales", "Monto Extra", "Dinero en Caja"])
-    if corte:
-        ws.append([
-            corte.fecha.strftime("%d/%m/%Y"),
-            float(corte.efectivo_inicial),
-            float(corte.ventas_totales),
-            float(corte.gastos_totales),
-            float(corte.monto_extra),
-            float(corte.dinero_en_caja)
-        ])
-    else:
-        ws.append([fecha.strftime("%d/%m/%Y"), "", "", "", "", ""])
-
-    # Detalle de gastos
-    ws_gastos = wb.create_sheet(title="Gastos")
-    ws_gastos.append(["Fecha", "Descripción", "Monto"])
-    for gasto in gastos:
-        ws_gastos.append([
-            gasto.fecha.strftime("%d/%m/%Y"),
-            gasto.descripcion,
-            float(gasto.monto)
-        ])
-
-    # Detalle de cuentas
-    ws_cuentas = wb.create_sheet(title="Cuentas Cerradas")
-    ws_cuentas.append(["Mesa", "Total", "Fecha de cierre"])
-    for cuenta in cuentas:
-        mesa = cuenta.mesa.numero if cuenta.mesa else "Para llevar"
-        ws_cuentas.append([
-            mesa,
-            float(cuenta.total),
-            cuenta.cerrada.strftime("%d/%m/%Y %H:%M")
-        ])
-
     # Respuesta HTTP
-    response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    filename = f"Corte_{fecha.strftime('%Y%m%d')}.xlsx"
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    wb.save(response)
+    response = HttpResponse(
+        construir_corte_excel(request.sucursal, fecha),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{nombre_archivo_corte(fecha)}"'
+    return response
+
+# -------------------------
+# Tareas en segundo plano
+# -------------------------
+def _tarea_json(tarea):
+    datos = {
+        "id": tarea.id,
+        "tipo": tarea.tipo,
+        "estado": tarea.estado,
+        "url": reverse('estado_tarea', args=[tarea.id]),
+        "intentos": tarea.intentos,
+        "creada": tarea.creada.isoformat(),
+        "terminada": tarea.terminada.isoformat() if tarea.terminada else None,
+        "resultado": tarea.resultado,
+    }
+    if tarea.estado == 'completada' and tarea.archivo:
+        datos["descarga"] = reverse('descargar_tarea', args=[tarea.id])
+    if tarea.estado == 'fallida':
+        datos["error"] = tarea.error.strip().splitlines()[-1] if tarea.error else ""
+    return datos
+
+
+@require_POST
+@login_required
+@solo_admin
+def encolar_exportacion_corte(request):
+    """Encola la exportación a Excel de un rango (por defecto, el último mes)."""
+    hoy = timezone.now().date()
+    try:
+        fin = datetime.strptime(request.POST.get("fecha_fin") or hoy.isoformat(), "%Y-%m-%d").date()
+        inicio_str = request.POST.get("fecha_inicio")
+        inicio = datetime.strptime(inicio_str, "%Y-%m-%d").date() if inicio_str else fin - timedelta(days=30)
+    except ValueError:
+        return JsonResponse({"error": "Fecha inválida"}, status=400)
+    if inicio > fin:
+        return JsonResponse({"error": "Rango de fechas inválido"}, status=400)
+
+    tarea = tareas.encolar(
+        'exportar_corte',
+        {"sucursal": request.sucursal.id, "fecha_inicio": inicio.isoformat(), "fecha_fin": fin.isoformat()},
+        prioridad=5,
+        clave=f"exportar_corte:{request.sucursal.id}:{inicio}:{fin}",
+        usuario=request.user,
+    )
+    return JsonResponse(_tarea_json(tarea), status=202)
+
+
+def _tarea_visible(request, tarea_id, **filtros):
+    """La tarea solo la ve quien la pidió o un admin, y solo desde su sucursal; si no, 404."""
+    tarea = get_object_or_404(Tarea, id=tarea_id, **filtros)
+    sucursal = tarea.parametros.get('sucursal')
+    if sucursal is not None and sucursal != request.sucursal.id:
+        raise Http404("Tarea no encontrada")
+    if tarea.solicitada_por_id != request.user.id and rol_de(request.user) != 'admin':
+        raise Http404("Tarea no encontrada")
+    return tarea
+
+
+@login_required
+def estado_tarea(request, tarea_id):
+    tarea = _tarea_visible(request, tarea_id)
+    return JsonResponse(_tarea_json(tarea))
+
+
+@login_required
+def descargar_tarea(request, tarea_id):
+    tarea = _tarea_visible(request, tarea_id, estado='completada')
+    if not tarea.archivo:
+        raise Http404("La tarea no generó archivo")
+    return FileResponse(tarea.archivo.open('rb'), as_attachment=True, filename=tarea.archivo.name.rsplit('/', 1)[-1])
+
+# -------------------------
+# Recibos y comandas
+# -------------------------
+_FORMATOS_TICKET = {
+    'txt': 'text/plain; charset=utf-8',
+    'pdf': 'application/pdf',
+    'escpos': 'application/octet-stream',
+}
+
+
+def _respuesta_ticket(ticket, formato):
+    if formato not in _FORMATOS_TICKET:
+        return HttpResponseBadRequest("Formato no soportado")
+    extension = 'pdf' if formato == 'pdf' else 'txt'
+    with default_storage.open(ticket.ruta(extension), 'rb') as archivo:
+        contenido = archivo.read()
+    if formato == 'escpos':
+        contenido = tickets.a_escpos(contenido.decode('utf-8'))
+    response = HttpResponse(contenido, content_type=_FORMATOS_TICKET[formato])
+    response["Content-Disposition"] = f'inline; filename="{ticket.tipo}_{ticket.cuenta_id}.{formato}"'
     return response
+
+
+@login_required
+def ticket_recibo(request, cuenta_id):
+    """Reimpresión del recibo; si aún no se generó (cuentas antiguas), se genera aquí."""
+    cuenta = get_object_or_404(
+        Cuenta.objects.de(request.sucursal).select_related('mesa', 'usuario'), id=cuenta_id, activa=False
+    )
+    ticket = Ticket.objects.filter(tipo='recibo', cuenta=cuenta).first() or tickets.generar_recibo(cuenta)
+    return _respuesta_ticket(ticket, request.GET.get('formato', 'txt'))
+
+
+@login_required
+def ticket_comanda(request, orden_id):
+    orden = get_object_or_404(Orden, id=orden_id, cuenta__sucursal=request.sucursal)
+    ticket = Ticket.objects.filter(tipo='comanda', orden=orden).first() or tickets.generar_comanda_por_id(orden.id)
+    return _respuesta_ticket(ticket, request.GET.get('formato', 'txt'))
+
+# -------------------------
+# Analítica de cocina
+# -------------------------
+def _rango_fechas(datos, dias):
+    """(desde, hasta) de `desde`/`hasta` en GET; por omisión, los últimos `dias` días."""
+    hasta = datetime.strptime(datos.get('hasta') or timezone.localdate().isoformat(), '%Y-%m-%d').date()
+    desde_str = datos.get('desde')
+    desde = datetime.strptime(desde_str, '%Y-%m-%d').date() if desde_str else hasta - timedelta(days=dias)
+    if desde > hasta:
+        raise ValueError("Rango de fechas inválido")
+    return desde, hasta
+
+
+@login_required
+@solo_admin
+def tablero_cocina(request):
+    """Tiempos de preparación, cola y ritmo por cocinero (por defecto, los últimos 30 días)."""
+    try:
+        desde, hasta = _rango_fechas(request.GET, 30)
+    except ValueError:
+        return JsonResponse({'error': 'Rango de fechas inválido'}, status=400)
+    return JsonResponse(analitica.tablero(request.sucursal, desde, hasta))
+
+
+# -------------------------
+# Cubo de ventas
+# -------------------------
+@login_required
+@solo_admin
+def cubo_ventas(request):
+    """Ventas agrupadas por `agrupar` (fecha, hora, dia_semana, platillo); por defecto el mapa de calor del último año."""
+    try:
+        desde, hasta = _rango_fechas(request.GET, 365)
+    except ValueError:
+        return JsonResponse({'error': 'Rango de fechas inválido'}, status=400)
+    dimensiones = tuple(d for d in request.GET.get('agrupar', 'dia_semana,hora').split(',') if d)
+    if not dimensiones or any(d not in cubo.DIMENSIONES for d in dimensiones):
+        return JsonResponse({'error': f"Dimensiones válidas: {', '.join(cubo.DIMENSIONES)}"}, status=400)
+    return JsonResponse({
+        'desde': desde, 'hasta': hasta, 'agrupar': dimensiones,
+        'celdas': cubo.consultar(request.sucursal, desde, hasta, dimensiones),
+    })
+
+
+@login_required
+@solo_admin
+def exportar_cubo_excel(request):
+    try:
+        desde, hasta = _rango_fechas(request.GET, 365)
+    except ValueError:
+        return HttpResponseBadRequest("Rango de fechas inválido")
+    response = HttpResponse(
+        cubo.construir_cubo_excel(request.sucursal, desde, hasta),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{cubo.nombre_archivo_cubo(desde, hasta)}"'
+    return response
+
+
+
+# -------------------------
+# Historial de ventas (contabilidad / BI)
+# -------------------------
+def _en_sucursal(sucursal, trozos):
+    # El cuerpo se genera después de que el middleware soltó la sucursal
+    with usar_sucursal(sucursal):
+        yield from trozos
+
+
+@login_required
+@solo_admin
+def exportar_historial(request):
+    """Una tabla del historial en csv.gz, en flujo: se lee y se manda un lote a la vez."""
+    tabla = request.GET.get('tabla', 'renglones')
+    if tabla not in historial.COLUMNAS:
+        return HttpResponseBadRequest(f"Tablas: {', '.join(historial.COLUMNAS)}")
+    try:
+        desde, hasta = _rango_fechas(request.GET, 365)
+    except ValueError:
+        return HttpResponseBadRequest("Rango de fechas inválido")
+    cambios_desde = None
+    if request.GET.get('cambios_desde'):
+        cambios_desde = parse_datetime(request.GET['cambios_desde'])
+        if cambios_desde is None:
+            return HttpResponseBadRequest("cambios_desde inválido")
+        if timezone.is_naive(cambios_desde):
+            cambios_desde = timezone.make_aware(cambios_desde)
+
+    trozos = historial.csv_en_trozos(request.sucursal, tabla, desde, hasta, cambios_desde)
+    response = StreamingHttpResponse(_en_sucursal(request.sucursal, trozos), content_type='application/gzip')
+    response["Content-Disposition"] = (
+        f'attachment; filename="{tabla}_{request.sucursal.clave}_{desde}_{hasta}.csv.gz"'
+    )
+    return response
+
+
+@require_POST
+@login_required
+@solo_admin
+def encolar_exportacion_historial(request):
+    """Encola el historial completo (todas las tablas) en un .zip; con `incremental`, solo lo cambiado."""
+    formato = request.POST.get('formato', 'csv')
+    if not historial.formato_disponible(formato):
+        return JsonResponse({"error": f"Formato no disponible: {formato}"}, status=400)
+    incremental = request.POST.get('incremental') in ('1', 'true', 'on')
+    parametros = {"sucursal": request.sucursal.id, "formato": formato, "incremental": incremental}
+    alcance = 'incremental'
+    # El incremental no lleva rango salvo que se pida
+    if not incremental or request.POST.get('desde') or request.POST.get('hasta'):
+        try:
+            desde, hasta = _rango_fechas(request.POST, 365)
+        except ValueError:
+            return JsonResponse({"error": "Rango de fechas inválido"}, status=400)
+        parametros.update(inicio=desde.isoformat(), fin=hasta.isoformat())
+        alcance += f":{desde}:{hasta}"
+
+    tarea = tareas.encolar(
+        'exportar_historial', parametros,
+        prioridad=3,
+        clave=f"exportar_historial:{request.sucursal.id}:{formato}:{alcance}",
+        usuario=request.user,
+    )
+    return JsonResponse(_tarea_json(tarea), status=202)
+
+# -------------------------
+# Caché
+# -------------------------
+@login_required
+@solo_admin
+def estadisticas_cache(request):
+    return JsonResponse(cache.estadisticas())
+
+
+# -------------------------
+# Métricas
+# -------------------------
+def metricas_prometheus(request):
+    """Exposición para Prometheus: admins con sesión o `Authorization: Bearer <CC_METRICAS_TOKEN>`."""
+    token = settings.METRICAS_TOKEN
+    con_token = bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}")
+    if not con_token and not (request.user.is_authenticated and rol_de(request.user) == 'admin'):
+        return HttpResponse('No autorizado', status=403, content_type='text/plain')
+    return HttpResponse(metricas.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# -------------------------
+# Perfiles de peticiones
+# -------------------------
+@login_required
+@solo_admin
+def lista_perfiles(request):
+    capturas = perfilador.capturas()
+    for captura in capturas:
+        captura['descargas'] = {
+            formato: reverse('descargar_perfil', args=[captura['id'], formato]) for formato in captura['formatos']
+        }
+    return JsonResponse({'perfiles': capturas})
+
+
+@login_required
+@solo_admin
+def descargar_perfil(request, perfil_id, formato):
+    ruta = perfilador.ruta_captura(perfil_id, formato)
+    if ruta is None:
+        raise Http404("Perfil no encontrado")
+    return FileResponse(
+        default_storage.open(ruta, 'rb'), as_attachment=True, filename=f"{perfil_id}.{formato}",
+        content_type=perfilador.FORMATOS[formato],
+    )
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -18,11 +19,18 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'backend.core.middleware.MetricasMiddleware',
+    'backend.core.middleware.GZipTextoMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    'backend.core.middleware.PaginasEstaticasMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'backend.core.middleware.PerfiladorMiddleware',
+    'backend.core.middleware.SucursalMiddleware',
+    'backend.core.middleware.OrigenConsultasMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -45,13 +53,65 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# 🔒 SQLite con varios procesos escribiendo a la vez:
+# - IMMEDIATE: cada transacción pide el candado de escritura al empezar; con el
+#   modo diferido dos transacciones que leen y luego escriben se bloquean entre sí
+#   y una falla al instante con "database is locked" sin esperar `timeout`.
+# - WAL: las lecturas no esperan a la escritura en curso.
+# - timeout: segundos que una escritura espera el candado antes de fallar.
+OPCIONES_SQLITE = {
+    'timeout': int(os.environ.get('CC_SQLITE_TIMEOUT', '20')),
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': OPCIONES_SQLITE,
     }
 }
 
+# 🏢 Una base SQLite por sucursal (opcional): CC_SUCURSALES_BD="centro=db_centro.sqlite3,norte=db_norte.sqlite3"
+# El alias debe coincidir con Sucursal.base_datos.
+SUCURSALES_BD = dict(
+    par.split('=', 1) for par in os.environ.get('CC_SUCURSALES_BD', '').split(',') if '=' in par
+)
+for alias, archivo in SUCURSALES_BD.items():
+    DATABASES[alias] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / archivo, 'OPTIONS': OPCIONES_SQLITE}
+DATABASE_ROUTERS = ['backend.core.routers.SucursalRouter'] if SUCURSALES_BD else []
+
+# 🗄️ Caché compartida entre procesos (CC_CACHE): 'archivo' (por defecto), 'bd' o 'redis'
+CC_CACHE = os.environ.get('CC_CACHE', 'archivo')
+if CC_CACHE == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CC_REDIS_URL', 'redis://127.0.0.1:6379/1'),
+            'TIMEOUT': 300,
+        }
+    }
+elif CC_CACHE == 'bd':
+    # Requiere `python manage.py createcachetable`
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cc_cache',
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 5000, 'CULL_FREQUENCY': 4},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / '.cache',
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 2000, 'CULL_FREQUENCY': 4},
+        }
+    }
+
 LANGUAGE_CODE = 'es-mx'
 TIME_ZONE = 'America/Mexico_City'
 USE_I18N = True
@@ -62,9 +122,40 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'frontend' / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# 🎨 Paquetes CSS/JS por página (backend/core/estaticos.py); collectstatic agrega
+# huellas a los nombres y escribe variantes .gz/.br
+STATICFILES_FINDERS = [
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    'backend.core.estaticos.PaquetesFinder',
+]
+PAQUETES_ROOT = BASE_DIR / '.paquetes'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'backend.core.estaticos.EstaticosComprimidosStorage'},
+}
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 📈 Métricas (/metrics): un archivo por proceso; vaciar el directorio en cada despliegue
+METRICAS_DIR = BASE_DIR / '.metricas'
+METRICAS_TOKEN = os.environ.get('CC_METRICAS_TOKEN', '')
+
+# 🐢 Consultas lentas (`python manage.py reporte_consultas_lentas`); 0 desactiva
+CONSULTAS_LENTAS_MS = float(os.environ.get('CC_CONSULTAS_LENTAS_MS', '200'))
+CONSULTAS_LENTAS_ARCHIVO = BASE_DIR / 'logs' / 'consultas_lentas.jsonl'
+
+# 🧰 Mantenimiento de SQLite (`python manage.py mantenimiento_bd`): respaldos en caliente,
+# ANALYZE y vacío incremental; la tarea se reprograma sola a esta hora local
+RESPALDOS_DIR = Path(os.environ.get('CC_RESPALDOS_DIR', BASE_DIR / 'respaldos'))
+RESPALDOS_CONSERVAR = int(os.environ.get('CC_RESPALDOS_CONSERVAR', '7'))
+MANTENIMIENTO_HORA = int(os.environ.get('CC_MANTENIMIENTO_HORA', '4'))
+
+# 🌐 Páginas públicas pre-renderizadas (`python manage.py generar_paginas`)
+PAGINAS_ESTATICAS_ROOT = BASE_DIR / 'paginas_estaticas'
+PAGINAS_ESTATICAS_MAX_AGE = 3600
+
 LOGIN_REDIRECT_URL = 'menu'
 LOGOUT_REDIRECT_URL = 'login'
 LOGIN_URL = '/login/'
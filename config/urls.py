@@ -1,13 +1,25 @@
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from backend.core.estaticos import servir_estatico
+from backend.core.medios import servir_medio
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('backend.core.urls')),
 ]
 
+# Fotos con caché inmutable y soporte de Range (tareas/ y tickets/ no son públicos)
+urlpatterns += [
+    re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<ruta>.+)$', servir_medio),
+]
+
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+else:
+    # Estáticos con huella y variantes precomprimidas (si no los sirve nginx)
+    urlpatterns += [
+        re_path(rf'^{settings.STATIC_URL.lstrip("/")}(?P<ruta>.+)$', servir_estatico),
+    ]
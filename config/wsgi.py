@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Con CC_PRECALENTAR=1 el proceso se precalienta antes de recibir peticiones;
+# con `gunicorn --preload` ocurre una sola vez en el maestro, antes del fork.
+if os.environ.get('CC_PRECALENTAR') == '1':
+    from backend.core.arranque import precalentar
+
+    precalentar()
@@ -0,0 +1,36 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.getElementById('exportar-mes-form');
+    const estado = document.getElementById('exportar-mes-estado');
+    if (!form) return;
+
+    // Consulta el estado de la tarea hasta que termine
+    function consultar(url) {
+        fetch(url, { credentials: 'same-origin' })
+            .then(respuesta => respuesta.json())
+            .then(tarea => {
+                if (tarea.estado === 'completada' && tarea.descarga) {
+                    estado.textContent = 'Listo.';
+                    window.location.href = tarea.descarga;
+                } else if (tarea.estado === 'fallida') {
+                    estado.textContent = 'No se pudo generar el archivo.';
+                } else {
+                    estado.textContent = 'Generando archivo...';
+                    setTimeout(() => consultar(url), 2000);
+                }
+            });
+    }
+
+    form.addEventListener('submit', function(evento) {
+        evento.preventDefault();
+        estado.textContent = 'Encolando...';
+        fetch(form.action, { method: 'POST', body: new FormData(form), credentials: 'same-origin' })
+            .then(respuesta => respuesta.json())
+            .then(tarea => {
+                if (tarea.error) {
+                    estado.textContent = tarea.error;
+                    return;
+                }
+                consultar(tarea.url);
+            });
+    });
+});